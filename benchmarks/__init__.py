@@ -0,0 +1,73 @@
+"""
+Benchmarks for the hot paths of the API
+- each module is run on its own, for example:
+    python -m benchmarks.progress --logs 50000
+- the benchmarks run against a throwaway test database created
+from the configured one, the same way the test runner does
+- Helper functions:
+    - setup_django: configure django to use the project settings
+    - test_database: context manager creating and destroying
+    the test database
+    - measure: time and trace the memory of a callable
+    - percentile: the percentile of a list of numbers
+"""
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def setup_django():
+    """Configure django to use the project settings"""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Create the test database and destroy it at the end"""
+    from django.test.utils import (
+        setup_databases,
+        setup_test_environment,
+        teardown_databases,
+        teardown_test_environment
+    )
+    setup_test_environment(debug=False)
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(function, repeat=1, trace_memory=True):
+    """
+    Call the function `repeat` times
+    - returns (timings in milliseconds, peak traced memory in bytes)
+    - the memory is traced on an extra call so it does not
+    slow down the timed calls
+    """
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return timings, peak
+
+
+def percentile(values, percent):
+    """The nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, int(round(percent / 100 * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
@@ -0,0 +1,310 @@
+"""
+Load test of the API endpoints, in-process with the DRF test client
+- seeds users x workouts x exercises x logs through the ORM with bulk
+inserts, every user gets a token so the requests go through the
+token authentication
+- sends `--requests` requests to each endpoint of core/urls.py, the
+ids and payloads are drawn from a seeded random generator and prepared
+before the timing, so two runs send the same requests
+- reports for each endpoint the throughput of one client, the
+p50/p95/p99 latency and the queries of each request as JSON
+- `--output` saves the results and `--compare` prints the change of
+each endpoint against saved results, so the runs of two commits
+can be compared
+- Usage:
+    python -m benchmarks.api --users 50 --workouts 20 --exercises 30 \
+--logs 5 --requests 200 --output before.json
+    python -m benchmarks.api ... --compare before.json
+"""
+import argparse
+import json
+import random
+import subprocess
+import time
+from benchmarks import percentile, setup_django, test_database
+
+PASSWORD = 'bench1234'
+
+
+def seed(users, workouts_per_user, exercises_per_user, logs_per_workout,
+         rand):
+    """
+    Create the dataset with bulk inserts
+    - returns the list of (user, token key, exercise ids, workout ids)
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from rest_framework.authtoken.models import Token
+    from exercise.models import Exercise, ExerciseLog
+    from exercise.progress import rebuild_progress
+    from exercise.search import index_exercises
+    from workout.models import WorkoutLog
+    from benchmarks.search import EQUIPMENT, MODIFIERS, MOVEMENTS
+
+    User = get_user_model()
+    password = make_password(PASSWORD)
+    created_users = User.objects.bulk_create(
+        [User(email=f"user{i}@gmail.com", password=password)
+         for i in range(users)])
+    tokens = Token.objects.bulk_create(
+        [Token(user=user, key=Token.generate_key())
+         for user in created_users])
+
+    exercises = list()
+    for user in created_users:
+        names = set()
+        while len(names) < exercises_per_user:
+            names.add(f"{rand.choice(MODIFIERS)} {rand.choice(EQUIPMENT)} "
+                      f"{rand.choice(MOVEMENTS)} {rand.randint(1, 9999)}")
+        exercises += [Exercise(name=name, user=user) for name in names]
+    exercises = Exercise.objects.bulk_create(exercises, batch_size=5000)
+    index_exercises(exercises)
+
+    workouts = WorkoutLog.objects.bulk_create(
+        [WorkoutLog(user=user, name=f"workout {i}")
+         for user in created_users for i in range(workouts_per_user)],
+        batch_size=5000)
+
+    exercises_by_user = dict()
+    for exercise in exercises:
+        exercises_by_user.setdefault(exercise.user_id, []).append(exercise)
+    workouts_by_user = dict()
+    for workout in workouts:
+        workouts_by_user.setdefault(workout.user_id, []).append(workout)
+
+    logs = list()
+    for workout in workouts:
+        for exercise in rand.sample(exercises_by_user[workout.user_id],
+                                    min(logs_per_workout,
+                                        exercises_per_user)):
+            logs.append(ExerciseLog(
+                user_id=workout.user_id, workout_log=workout,
+                exercise=exercise, number_of_sets=rand.randint(1, 5),
+                number_of_reps=rand.randint(5, 12),
+                weight_in_kg=rand.randint(20, 120)))
+    ExerciseLog.objects.bulk_create(logs, batch_size=5000)
+    for exercise in exercises:
+        rebuild_progress(exercise.user_id, exercise.id)
+
+    return [(user, token.key,
+             [exercise.id for exercise in exercises_by_user[user.id]],
+             [workout.id for workout in workouts_by_user.get(user.id, [])])
+            for user, token in zip(created_users, tokens)]
+
+
+def prepare_requests(dataset, count, auth_count, rand):
+    """
+    Returns {endpoint: [(method, url, data, token key), ...]}
+    - signup and signin get only `auth_count` requests, each one
+    hashes a password which takes hundreds of milliseconds
+    - the rows deleted by the delete endpoints are created here,
+    so they are not part of the timing
+    """
+    from django.urls import reverse
+    from exercise.models import ExerciseLog
+    from workout.models import WorkoutLog
+    from benchmarks.search import QUERIES
+
+    def pick():
+        return rand.choice(dataset)
+
+    def log_of(user):
+        return rand.choice(ExerciseLog.objects.filter(user=user)
+                           .order_by('id').values_list('id', flat=True))
+
+    requests = {name: list() for name in [
+        'signup', 'signin', 'user_retrieve', 'workout_list',
+        'workout_create', 'workout_retrieve', 'workout_retrieve_expanded',
+        'workout_update', 'workout_delete', 'exercise_list',
+        'exercise_log_list', 'exercise_log_create', 'exercise_log_bulk',
+        'exercise_log_retrieve', 'exercise_log_update',
+        'exercise_log_delete', 'exercise_search', 'exercise_autocomplete',
+        'exercise_progress']}
+    for i in range(count):
+        user, key, exercise_ids, workout_ids = pick()
+        if i < auth_count:
+            requests['signup'].append(
+                ('post', reverse('user:create'),
+                 {'email': f"new{i}@gmail.com", 'password': PASSWORD},
+                 None))
+            requests['signin'].append(
+                ('post', reverse('user:token_obtain'),
+                 {'email': user.email, 'password': PASSWORD}, None))
+        requests['user_retrieve'].append(
+            ('get', reverse('user:get_update'), None, key))
+
+        user, key, exercise_ids, workout_ids = pick()
+        workout_url = reverse('workout:workoutlog-detail',
+                              args=[rand.choice(workout_ids)])
+        requests['workout_list'].append(
+            ('get', reverse('workout:workoutlog-list'), None, key))
+        requests['workout_create'].append(
+            ('post', reverse('workout:workoutlog-list'),
+             {'name': f"workout new {i}"}, key))
+        requests['workout_retrieve'].append(('get', workout_url, None, key))
+        requests['workout_retrieve_expanded'].append(
+            ('get', workout_url + '?expand=exercise_logs', None, key))
+        requests['workout_update'].append(
+            ('patch', workout_url, {'description': f"updated {i}"}, key))
+        doomed = WorkoutLog.objects.create(user=user, name='to delete')
+        requests['workout_delete'].append(
+            ('delete', reverse('workout:workoutlog-detail',
+                               args=[doomed.id]), None, key))
+
+        user, key, exercise_ids, workout_ids = pick()
+        requests['exercise_list'].append(
+            ('get', reverse('exercise:exercise-list'), None, key))
+        requests['exercise_log_list'].append(
+            ('get', reverse('exercise:exerciselog-list'), None, key))
+        requests['exercise_log_create'].append(
+            ('post', reverse('exercise:exerciselog-list'),
+             {'workout_log': rand.choice(workout_ids),
+              'exercise_name': f"new exercise {rand.randint(1, 20)}",
+              'number_of_sets': 3, 'number_of_reps': 10,
+              'weight_in_kg': rand.randint(20, 120)}, key))
+        requests['exercise_log_bulk'].append(
+            ('post', reverse('exercise:exerciselog-bulk-create'),
+             {'logs': [{'workout_log': rand.choice(workout_ids),
+                        'exercise_name': f"bulk exercise {j}",
+                        'number_of_sets': 3, 'number_of_reps': 8}
+                       for j in range(10)]}, key))
+        log_url = reverse('exercise:exerciselog-detail', args=[log_of(user)])
+        requests['exercise_log_retrieve'].append(('get', log_url, None, key))
+        requests['exercise_log_update'].append(
+            ('patch', log_url, {'weight_in_kg': rand.randint(20, 120)}, key))
+        doomed = ExerciseLog.objects.create(
+            user=user, workout_log_id=rand.choice(workout_ids),
+            exercise_id=rand.choice(exercise_ids), number_of_sets=1)
+        requests['exercise_log_delete'].append(
+            ('delete', reverse('exercise:exerciselog-detail',
+                               args=[doomed.id]), None, key))
+        requests['exercise_search'].append(
+            ('get', reverse('exercise:exercise-search') +
+             f"?name={rand.choice(QUERIES)}", None, key))
+        query = rand.choice(QUERIES)
+        requests['exercise_autocomplete'].append(
+            ('get', reverse('exercise:exercise-autocomplete') +
+             f"?name={query[:rand.randint(1, len(query))]}", None, key))
+        requests['exercise_progress'].append(
+            ('get', reverse('exercise:exercise-progress') +
+             f"?exercise_id={rand.choice(exercise_ids)}", None, key))
+    return requests
+
+
+def send(client, method, url, data, key):
+    """Send one request and fail on an error response"""
+    client.credentials(**({'HTTP_AUTHORIZATION': f"Token {key}"}
+                          if key else {}))
+    res = getattr(client, method)(url, data, format='json')
+    if res.status_code >= 400:
+        raise AssertionError(
+            f"{method.upper()} {url} returned {res.status_code}: "
+            f"{res.content[:500]}")
+    return res
+
+
+def run(users, workouts, exercises, logs, count, auth_count, seed_value):
+    """Seed the dataset, send the requests and return the results"""
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    rand = random.Random(seed_value)
+    dataset = seed(users, workouts, exercises, logs, rand)
+    requests = prepare_requests(dataset, count, auth_count, rand)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    client = APIClient()
+    results = {
+        'commit': git_commit(),
+        'parameters': {'users': users, 'workouts': workouts,
+                       'exercises': exercises, 'logs': logs,
+                       'requests': count, 'auth_requests': auth_count,
+                       'seed': seed_value},
+        'endpoints': dict(),
+    }
+    for endpoint, endpoint_requests in requests.items():
+        timings, query_counts = list(), list()
+        started = time.perf_counter()
+        for method, url, data, key in endpoint_requests:
+            # the query log is bounded, a full one counts no queries
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                send(client, method, url, data, key)
+                timings.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries))
+        elapsed = time.perf_counter() - started
+        results['endpoints'][endpoint] = {
+            'throughput_rps': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'queries_mean': round(sum(query_counts) / len(query_counts), 2),
+            'queries_max': max(query_counts),
+        }
+    return results
+
+
+def compare(baseline, results):
+    """The change of each endpoint between two runs"""
+    changes = dict()
+    for endpoint, current in results['endpoints'].items():
+        before = baseline['endpoints'].get(endpoint)
+        if before is None:
+            continue
+        changes[endpoint] = {
+            key: {'before': before[key], 'after': current[key],
+                  'change_percent': round(
+                      (current[key] - before[key]) / before[key] * 100, 1)
+                  if before[key] else None}
+            for key in ['p50_ms', 'p99_ms', 'queries_max']}
+    return {'before': baseline.get('commit'), 'after': results['commit'],
+            'endpoints': changes}
+
+
+def git_commit():
+    """The commit the benchmark runs on, None outside of a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--workouts', type=int, default=20,
+                        help="workouts for each user")
+    parser.add_argument('--exercises', type=int, default=30,
+                        help="exercises for each user")
+    parser.add_argument('--logs', type=int, default=5,
+                        help="exercise logs for each workout")
+    parser.add_argument('--requests', type=int, default=200,
+                        help="requests sent to each endpoint")
+    parser.add_argument('--auth-requests', type=int, default=20,
+                        help="requests sent to signup and signin")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="save the results to this file")
+    parser.add_argument('--compare', help="results saved by a previous run")
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run(args.users, args.workouts, args.exercises, args.logs,
+                      args.requests, args.auth_requests, args.seed)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=4)
+    if args.compare:
+        with open(args.compare) as baseline:
+            results = compare(json.load(baseline), results)
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
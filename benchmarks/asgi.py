@@ -0,0 +1,249 @@
+"""
+Benchmark of the read endpoints under concurrency, ASGI vs WSGI
+- seeds the dataset of benchmarks/api.py and prepares GET requests
+to the workout list/detail, exercise list, search and progress
+endpoints, each one with the token of its user
+- asgi: the ASGI application of core/asgi.py, its read endpoints are
+the async views of core/urls_asgi.py, driven in-process by an event
+loop keeping `concurrency` requests in flight
+- asgi_drf: the same ASGI application routed with core/urls.py, so
+the DRF views run in threads, to tell the async views apart from
+the cost of ASGI itself
+- wsgi: the WSGI application with the DRF views, called in-process
+by `concurrency` threads, like the threads of a WSGI server
+- the ASGI application closes the connections at the end of each
+request (see core/asgi.py), the WSGI one keeps them for DB_CONN_MAX_AGE
+- the response cache is disabled so every request reads the database,
+`--response-cache` keeps it
+- reports for each concurrency and application the throughput and
+the p50/p99 latency as JSON
+- Usage:
+    python -m benchmarks.asgi --concurrency 1 8 32 64 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from io import BytesIO
+from benchmarks import percentile, setup_django, test_database
+
+HOST = 'testserver'
+
+
+def prepare_requests(dataset, count, rand):
+    """Returns [(path, query string, token key), ...]"""
+    from django.urls import reverse
+    from benchmarks.search import QUERIES
+
+    requests = list()
+    for _ in range(count // 5 + 1):
+        user, key, exercise_ids, workout_ids = rand.choice(dataset)
+        requests += [
+            (reverse('workout:workoutlog-list'), '', key),
+            (reverse('workout:workoutlog-detail',
+                     args=[rand.choice(workout_ids)]), '', key),
+            (reverse('exercise:exercise-list'), '', key),
+            (reverse('exercise:exercise-search'),
+             f"name={rand.choice(QUERIES)}", key),
+            (reverse('exercise:exercise-progress'),
+             f"exercise_id={rand.choice(exercise_ids)}", key),
+        ]
+    return requests[:count]
+
+
+async def asgi_get(application, path, query, key):
+    """Send a GET request to the ASGI application, returns the status"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+        'headers': [(b'host', HOST.encode()),
+                    (b'authorization', f"Token {key}".encode())],
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    response = dict()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # the client never disconnects
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+
+    await application(scope, receive, send)
+    return response['status']
+
+
+def wsgi_get(application, path, query, key):
+    """Send a GET request to the WSGI application, returns the status"""
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+        'SCRIPT_NAME': '', 'SERVER_NAME': HOST, 'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'HTTP_HOST': HOST,
+        'HTTP_AUTHORIZATION': f"Token {key}", 'wsgi.input': BytesIO(),
+        'wsgi.errors': BytesIO(), 'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0), 'wsgi.multithread': True,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    response = dict()
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split()[0])
+
+    body = application(environ, start_response)
+    for _ in body:
+        pass
+    body.close()
+    return response['status']
+
+
+def check(status, path, query):
+    if status != 200:
+        raise AssertionError(f"GET {path}?{query} returned {status}")
+
+
+def run_asgi(application, requests, concurrency):
+    """Send the requests with `concurrency` of them in flight,
+    returns (elapsed seconds, timings in milliseconds)"""
+    timings = list()
+    pending = iter(requests)
+
+    async def client():
+        for path, query, key in pending:
+            start = time.perf_counter()
+            check(await asgi_get(application, path, query, key), path, query)
+            timings.append((time.perf_counter() - start) * 1000)
+
+    async def main():
+        started = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+        return time.perf_counter() - started
+
+    return asyncio.run(main()), timings
+
+
+def run_wsgi(application, requests, concurrency):
+    """Send the requests from `concurrency` threads,
+    returns (elapsed seconds, timings in milliseconds)"""
+    def send(request):
+        path, query, key = request
+        start = time.perf_counter()
+        check(wsgi_get(application, path, query, key), path, query)
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        timings = list(executor.map(send, requests))
+        return time.perf_counter() - started, timings
+
+
+@contextmanager
+def per_request_connections():
+    """Close the connections at the end of each request while the ASGI
+    application runs, like core/asgi.py does"""
+    from django.db import connections
+    saved = {alias: connections.settings[alias]['CONN_MAX_AGE']
+             for alias in connections}
+    for alias in saved:
+        connections.settings[alias]['CONN_MAX_AGE'] = 0
+    try:
+        yield
+    finally:
+        for alias, max_age in saved.items():
+            connections.settings[alias]['CONN_MAX_AGE'] = max_age
+
+
+def run(users, workouts, exercises, logs, count, concurrency_levels,
+        seed_value):
+    """Seed the dataset, send the requests and return the results"""
+    from django.conf import settings
+    from django.core.handlers.asgi import ASGIHandler
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.test.utils import override_settings
+    from benchmarks.api import seed
+
+    rand = random.Random(seed_value)
+    dataset = seed(users, workouts, exercises, logs, rand)
+    requests = prepare_requests(dataset, count, rand)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+    # the threads of the benchmark open their own connections
+    connection.close()
+
+    applications = {
+        'asgi': (ASGIHandler(), run_asgi, settings.ASGI_ROOT_URLCONF),
+        'asgi_drf': (ASGIHandler(), run_asgi, settings.ROOT_URLCONF),
+        'wsgi': (WSGIHandler(), run_wsgi, settings.ROOT_URLCONF),
+    }
+    connection_settings = {'asgi': per_request_connections,
+                           'asgi_drf': per_request_connections,
+                           'wsgi': nullcontext}
+    results = {
+        'parameters': {'users': users, 'workouts': workouts,
+                       'exercises': exercises, 'logs': logs,
+                       'requests': count, 'seed': seed_value},
+        'concurrency': dict(),
+    }
+    for concurrency in concurrency_levels:
+        level = results['concurrency'][concurrency] = dict()
+        for name, (application, send_all, urlconf) in applications.items():
+            with override_settings(ASGI_ROOT_URLCONF=urlconf), \
+                    connection_settings[name]():
+                # warm up the application and the caches of the process
+                send_all(application, requests[:concurrency * 2],
+                         concurrency)
+                elapsed, timings = send_all(application, requests,
+                                            concurrency)
+            level[name] = {
+                'throughput_rps': round(len(timings) / elapsed, 1),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+            }
+        for other in ['asgi_drf', 'wsgi']:
+            level[f"asgi_vs_{other}_throughput"] = round(
+                level['asgi']['throughput_rps'] /
+                level[other]['throughput_rps'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--workouts', type=int, default=20,
+                        help="workouts for each user")
+    parser.add_argument('--exercises', type=int, default=30,
+                        help="exercises for each user")
+    parser.add_argument('--logs', type=int, default=5,
+                        help="exercise logs for each workout")
+    parser.add_argument('--requests', type=int, default=2000,
+                        help="requests sent at each concurrency")
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 8, 32, 64],
+                        help="requests in flight, each one can hold a "
+                        "database connection")
+    parser.add_argument('--response-cache', action='store_true',
+                        help="keep the response cache enabled")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import override_settings
+    cache_settings = {} if args.response_cache else \
+        {'RESPONSE_CACHE_TTL': 0}
+    with test_database(), override_settings(**cache_settings):
+        results = run(args.users, args.workouts, args.exercises, args.logs,
+                      args.requests, args.concurrency, args.seed)
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark of autocompleting exercise names keystroke by keystroke
+- database: search_exercises limited to the first results, the path
+of the search endpoint
+- memory: the in-memory prefix index of exercise/autocomplete.py, the
+first keystroke of a user builds the index and is timed apart
+- each query is typed one character at a time, for regular users and
+for a few heavy users with many exercises
+- Usage:
+    python -m benchmarks.autocomplete --users 1000 --exercises 100
+"""
+import argparse
+import json
+import random
+from benchmarks import measure, percentile, setup_django, test_database
+from benchmarks.search import QUERIES, seed
+
+
+def run(users, exercises_per_user, heavy_users, heavy_exercises, repeat,
+        limit):
+    """Run both paths and return the results"""
+    from django.db import connection
+    from exercise.autocomplete import AutocompleteCache
+    from exercise.search import search_exercises
+
+    created_users = seed(users, exercises_per_user)
+    created_heavy_users = seed(heavy_users, heavy_exercises, first=users)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def database_path(user, name):
+        return list(search_exercises(user, name)[:limit])
+
+    results = {
+        'users': users, 'exercises': users * exercises_per_user,
+        'heavy_users': heavy_users,
+        'heavy_user_exercises': heavy_exercises, 'queries': repeat,
+        'limit': limit}
+    rand = random.Random(1)
+    for group, group_users in [('regular', created_users),
+                               ('heavy', created_heavy_users)]:
+        if not group_users:
+            continue
+        samples = [(rand.choice(group_users), rand.choice(QUERIES))
+                   for _ in range(repeat)]
+        keystrokes = [(user, query[:i]) for user, query in samples
+                      for i in range(1, len(query) + 1)]
+        cache = AutocompleteCache(max_users=len(group_users), ttl=3600)
+        build_timings, memory_timings, database_timings = [], [], []
+        built = set()
+        for user, name in keystrokes:
+            timing, _ = measure(
+                lambda: cache.search(user.id, name, limit), repeat=1,
+                trace_memory=False)
+            if user.id not in built:
+                built.add(user.id)
+                build_timings += timing
+            else:
+                memory_timings += timing
+            if name.strip():
+                timing, _ = measure(lambda: database_path(user, name),
+                                    repeat=1, trace_memory=False)
+                database_timings += timing
+        results[group] = {'keystrokes': len(keystrokes)}
+        for path_name, timings in [('database', database_timings),
+                                   ('memory', memory_timings),
+                                   ('memory_first_keystroke', build_timings)]:
+            results[group][path_name] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--exercises', type=int, default=100,
+                        help="exercises for each user")
+    parser.add_argument('--heavy-users', type=int, default=2)
+    parser.add_argument('--heavy-exercises', type=int, default=20000,
+                        help="exercises for each heavy user")
+    parser.add_argument('--repeat', type=int, default=200,
+                        help="queries typed for each group of users")
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.users, args.exercises, args.heavy_users,
+                             args.heavy_exercises, args.repeat, args.limit),
+                         indent=4))
+
+
+if __name__ == '__main__':
+    main()
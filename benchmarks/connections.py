@@ -0,0 +1,74 @@
+"""
+Benchmark of the database connections of small endpoints
+- sends GET requests to /user/get_update/ and a workout log through
+the WSGI application, so the connections are handled like behind a
+WSGI server: closed or kept at the end of each request
+- per_request: CONN_MAX_AGE = 0, a new connection for each request
+- persistent: CONN_MAX_AGE = DB_CONN_MAX_AGE with the health checks
+of DB_CONN_HEALTH_CHECKS, the connection is reused
+- reports the p50/p99 latency and the connection counters of
+core/metrics.py for each one as JSON
+- Usage:
+    python -m benchmarks.connections --requests 1000
+"""
+import argparse
+import json
+from benchmarks import measure, percentile, setup_django, test_database
+
+
+def run(count):
+    """Send the requests with both settings and return the results"""
+    from django.conf import settings
+    from django.db import connection
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+    from core.metrics import ConnectionStats, connection_metrics_store
+    from workout.models import WorkoutLog
+    from benchmarks.asgi import check, wsgi_get
+
+    user = get_user_model().objects.create_user('bench@gmail.com',
+                                                'bench1234')
+    key = Token.objects.create(user=user).key
+    workout_log = WorkoutLog.objects.create(user=user, name='leg day')
+    urls = [reverse('user:get_update'),
+            reverse('workout:workoutlog-detail', args=[workout_log.id])]
+    application = WSGIHandler()
+
+    results = {'requests': count}
+    for name, max_age in [('per_request', 0),
+                          ('persistent', settings.DB_CONN_MAX_AGE)]:
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connection.close()
+        for url in urls:
+            def send():
+                check(wsgi_get(application, url, '', key), url, '')
+            send()
+            connection_metrics_store.clear()
+            timings, _ = measure(send, count, trace_memory=False)
+            results.setdefault(url, dict())[name] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'connections': connection_metrics_store.as_dict().get(
+                    'default', ConnectionStats().as_dict()),
+            }
+    for url in urls:
+        results[url]['speedup_p50'] = round(
+            results[url]['per_request']['p50_ms'] /
+            results[url]['persistent']['p50_ms'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.requests), indent=4))
+
+
+if __name__ == '__main__':
+    main()
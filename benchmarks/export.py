@@ -0,0 +1,71 @@
+"""
+Benchmark of exporting the training history of a user
+- serializer: all the exercise logs of the user serialized and rendered
+at once, the way the exercise log list would without pagination
+- stream: the CSV and gzipped NDJSON chunks of the export endpoint,
+read with a server-side cursor and dropped as they are produced
+- the peak memory of each path is traced for each number of logs, the
+streamed exports should stay flat while the serializer grows
+- Usage:
+    python -m benchmarks.export --logs 1000 10000 100000 --repeat 3
+"""
+import argparse
+import json
+from collections import deque
+from benchmarks import measure, percentile, setup_django, test_database
+
+
+def run(sizes, repeat):
+    """Run the paths for each number of logs and return the results"""
+    from django.db import connection, transaction
+    from core.renderers import ORJSONRenderer
+    from exercise.export import CSV, NDJSON, export_chunks, export_rows
+    from exercise.models import ExerciseLog
+    from exercise.serializers import ExerciseLogSerializer
+    from benchmarks.progress import seed
+
+    results = {'repeat': repeat}
+    for logs in sizes:
+        with transaction.atomic():
+            user, _ = seed(logs)
+            # the plans of the rows of this size, not of the last one
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+            def serializer_path():
+                ORJSONRenderer().render(ExerciseLogSerializer(
+                    ExerciseLog.objects.filter(user=user)
+                    .select_related('exercise'), many=True).data)
+
+            def stream_path(export_format, compress):
+                return lambda: deque(export_chunks(
+                    export_rows(user.id), export_format, compress), 0)
+
+            results[logs] = dict()
+            for name, path in [('serializer', serializer_path),
+                               ('stream_csv', stream_path(CSV, False)),
+                               ('stream_ndjson_gzip',
+                                stream_path(NDJSON, True))]:
+                timings, peak = measure(path, repeat)
+                results[logs][name] = {
+                    'p50_ms': round(percentile(timings, 50), 1),
+                    'peak_memory_kb': round(peak / 1024),
+                }
+            transaction.set_rollback(True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logs', type=int, nargs='+',
+                        default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.logs, args.repeat), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark of the indexes of the hot queries
+- seeds the dataset of benchmarks/api.py and analyzes the tables
+- runs EXPLAIN ANALYZE on each hot query: the logs of an exercise
+read by the progress, the first page of the workout log and exercise
+log lists and the case-insensitive exercise name lookups
+- each query is run with its index and with the index dropped in a
+transaction rolled back afterwards, reporting the scans of the plan
+and the execution time of both as JSON
+- Usage:
+    python -m benchmarks.indexes --users 20 --workouts 300 \
+--exercises 200 --logs 10
+"""
+import argparse
+import json
+import random
+import re
+from benchmarks import percentile, setup_django, test_database
+
+
+class Rollback(Exception):
+    """Raised to roll back the transaction dropping an index"""
+
+
+def explain(sql, params, repeat):
+    """Returns (scans of the plan, p50 execution time in ms)"""
+    from django.db import connection
+    timings, plan = list(), ''
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            cursor.execute(f"EXPLAIN (ANALYZE, FORMAT TEXT) {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            timings.append(float(re.search(
+                r"Execution Time: ([\d.]+) ms", plan).group(1)))
+    scans = re.findall(r"((?:Seq|Index|Index Only|Bitmap Index) Scan"
+                       r"(?: Backward)? (?:using|on) \w+)", plan)
+    return {'scans': scans, 'p50_ms': round(percentile(timings, 50), 3)}
+
+
+def hot_queries(user_id, exercise_id):
+    """Returns {name: (queryset, index name)}"""
+    from django.db.models.functions import Lower
+    from exercise.models import Exercise, ExerciseLog
+    from exercise.progress import PROGRESS_ROW_FIELDS
+    from workout.models import WorkoutLog
+
+    def index_on(model, fields):
+        return next(index.name for index in model._meta.indexes
+                    if list(index.fields) == fields)
+
+    names = list(Exercise.objects.filter(user_id=user_id)
+                 .values_list('name', flat=True)[:10])
+    return {
+        'progress_logs': (
+            ExerciseLog.objects.filter(user_id=user_id,
+                                       exercise_id=exercise_id)
+            .order_by('created_at', 'id').values_list(*PROGRESS_ROW_FIELDS),
+            'exerciselog_user_exercise_idx'),
+        'workout_log_page': (
+            WorkoutLog.objects.filter(user_id=user_id)
+            .order_by('-created_at', '-id')[:51],
+            index_on(WorkoutLog, ['user', 'created_at', 'id'])),
+        'exercise_log_page': (
+            ExerciseLog.objects.filter(user_id=user_id)
+            .select_related('exercise').order_by('-created_at', '-id')[:51],
+            index_on(ExerciseLog, ['user', 'created_at', 'id'])),
+        'exercise_get_ci': (
+            Exercise.objects.filter_CI(names[0].upper(), user_id=user_id),
+            'unique_user_exercise_lower_name'),
+        'exercise_names_ci': (
+            Exercise.objects.annotate(lower_name=Lower('name'))
+            .filter(user_id=user_id,
+                    lower_name__in=[name.lower() for name in names]),
+            'unique_user_exercise_lower_name'),
+    }
+
+
+def run(users, workouts, exercises, logs, repeat, seed_value):
+    """Seed the dataset, explain the queries and return the results"""
+    from django.db import connection, transaction
+    from benchmarks.api import seed
+
+    rand = random.Random(seed_value)
+    dataset = seed(users, workouts, exercises, logs, rand)
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    user, _, exercise_ids, _ = rand.choice(dataset)
+
+    results = {'parameters': {'users': users, 'workouts': workouts,
+                              'exercises': exercises, 'logs': logs,
+                              'repeat': repeat},
+               'queries': dict()}
+    for name, (queryset, index) in hot_queries(
+            user.id, rand.choice(exercise_ids)).items():
+        sql, params = queryset.query.sql_with_params()
+        result = results['queries'][name] = {'index': index}
+        result['with_index'] = explain(sql, params, repeat)
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP INDEX "{index}"')
+                result['without_index'] = explain(sql, params, repeat)
+                raise Rollback()
+        except Rollback:
+            pass
+        result['speedup_p50'] = round(
+            result['without_index']['p50_ms'] /
+            result['with_index']['p50_ms'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--workouts', type=int, default=300,
+                        help="workouts for each user")
+    parser.add_argument('--exercises', type=int, default=200,
+                        help="exercises for each user")
+    parser.add_argument('--logs', type=int, default=10,
+                        help="exercise logs for each workout")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.users, args.workouts, args.exercises,
+                             args.logs, args.repeat, args.seed), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark of building the progress of an exercise
+- serializer: the old path, ExerciseLogProgressListSerializer over all
+the logs then extract_progress
+- stream: stream_progress over a values_list iterator
+- Usage:
+    python -m benchmarks.progress --logs 50000 --repeat 20
+"""
+import argparse
+import json
+import random
+from datetime import timedelta
+from benchmarks import measure, percentile, setup_django, test_database
+
+
+def seed(logs):
+    """Create a user with one exercise that has `logs` logs"""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from exercise.models import Exercise, ExerciseLog
+    from workout.models import WorkoutLog
+
+    user = get_user_model().objects.create_user('bench@gmail.com', 'bench')
+    exercise = Exercise.objects.create(name='Bench Press', user=user)
+    workouts = WorkoutLog.objects.bulk_create(
+        [WorkoutLog(user=user, name=f'workout_{i}')
+         for i in range(max(1, logs // 5))])
+
+    start = timezone.now() - timedelta(days=logs)
+    randint = random.Random(0).randint
+    ExerciseLog.objects.bulk_create(
+        [ExerciseLog(user=user, exercise=exercise,
+                     workout_log=workouts[i // 5],
+                     number_of_sets=3 + i // 40 % 3,
+                     number_of_reps=6 + i // 15 % 3,
+                     rest_between_sets_seconds=(1 + i // 25 % 2) * 60,
+                     duration_in_minutes=randint(5, 8),
+                     weight_in_kg=60 + i // 50)
+         for i in range(logs)],
+        batch_size=5000)
+    ExerciseLog.objects.filter(exercise=exercise).update(created_at=start)
+    return user, exercise
+
+
+def run(logs, repeat):
+    """Run both paths and return the results"""
+    from exercise.models import ExerciseLog
+    from exercise.progress import (
+        PROGRESS_ROW_FIELDS,
+        extract_progress,
+        stream_progress
+    )
+    from exercise.serializers import ExerciseLogProgressListSerializer
+
+    user, exercise = seed(logs)
+    queryset = ExerciseLog.objects.filter(
+        user=user, exercise=exercise).order_by('created_at', 'id')
+
+    def serializer_path():
+        data = ExerciseLogProgressListSerializer(queryset.all(),
+                                                 many=True).data
+        return extract_progress(data)
+
+    def stream_path():
+        rows = queryset.values_list(*PROGRESS_ROW_FIELDS)\
+            .iterator(chunk_size=2000)
+        return stream_progress(rows)[0]
+
+    if serializer_path() != stream_path():
+        raise AssertionError("The two paths built different progress")
+
+    results = {'logs': logs, 'repeat': repeat}
+    for name, path in [('serializer', serializer_path),
+                       ('stream', stream_path)]:
+        timings, peak = measure(path, repeat)
+        results[name] = {
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+    results['speedup_p99'] = round(
+        results['serializer']['p99_ms'] / results['stream']['p99_ms'], 2)
+    results['memory_ratio'] = round(
+        results['serializer']['peak_memory_kb'] /
+        results['stream']['peak_memory_kb'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logs', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.logs, args.repeat), indent=4))
+
+
+if __name__ == '__main__':
+    main()
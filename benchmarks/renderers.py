@@ -0,0 +1,85 @@
+"""
+Benchmark of rendering and parsing JSON
+- drf: the JSONRenderer and JSONParser of DRF
+- orjson: ORJSONRenderer and ORJSONParser of core, checked to give
+the same bytes and data first
+- payloads: a large list of serialized exercise logs, the progress
+of an exercise with many logs and a bulk exercise log request
+- Usage:
+    python -m benchmarks.renderers --logs 20000 --repeat 20
+"""
+import argparse
+import json
+from io import BytesIO
+from benchmarks import measure, percentile, setup_django, test_database
+
+
+def run(logs, repeat):
+    """Run both paths on each payload and return the results"""
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from core.parsers import ORJSONParser
+    from core.renderers import ORJSONRenderer
+    from exercise.models import ExerciseLog
+    from exercise.progress import get_progress
+    from exercise.serializers import ExerciseLogSerializer
+    from benchmarks.progress import seed
+
+    user, exercise = seed(logs)
+    log_list = ExerciseLogSerializer(
+        ExerciseLog.objects.filter(user=user).select_related('exercise'),
+        many=True).data
+    progress = {'exercise_id': exercise.id, 'exercise_name': exercise.name,
+                'progress': get_progress(user.id, exercise.id)}
+    bulk = JSONRenderer().render({'logs': [
+        {'workout_log': 1, 'exercise_name': f"exercise {i % 20}",
+         'number_of_sets': 3, 'number_of_reps': 8, 'weight_in_kg': 60,
+         'notes': 'felt strong today'} for i in range(1000)]})
+
+    results = {'logs': logs, 'repeat': repeat}
+    for name, data in [('exercise_log_list', log_list),
+                       ('progress', progress)]:
+        if ORJSONRenderer().render(data) != JSONRenderer().render(data):
+            raise AssertionError(f"The renderers differ on {name}")
+        results[name] = {'bytes': len(JSONRenderer().render(data))}
+        for path_name, renderer in [('drf', JSONRenderer()),
+                                    ('orjson', ORJSONRenderer())]:
+            timings, _ = measure(lambda: renderer.render(data), repeat,
+                                 trace_memory=False)
+            results[name][path_name] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+            }
+        results[name]['speedup_p50'] = round(
+            results[name]['drf']['p50_ms'] /
+            results[name]['orjson']['p50_ms'], 2)
+
+    results['bulk_request'] = {'bytes': len(bulk)}
+    for path_name, parser in [('drf', JSONParser()),
+                              ('orjson', ORJSONParser())]:
+        timings, _ = measure(
+            lambda: parser.parse(BytesIO(bulk), parser_context={}), repeat,
+            trace_memory=False)
+        results['bulk_request'][path_name] = {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
+    results['bulk_request']['speedup_p50'] = round(
+        results['bulk_request']['drf']['p50_ms'] /
+        results['bulk_request']['orjson']['p50_ms'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logs', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.logs, args.repeat), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark of charting an exercise over a year
+- logs: aggregating the logs of the year by period with GROUP BY
+- rollups: reading the stored rollups of the periods, see
+exercise/rollups.py
+- both are checked to give the same aggregates first, the time of
+rebuilding the rollups from the logs is reported as well
+- Usage:
+    python -m benchmarks.rollups --logs 20000 --repeat 20
+"""
+import argparse
+import json
+import random
+import time
+from datetime import timedelta
+from benchmarks import measure, percentile, setup_django, test_database
+
+
+def seed(logs):
+    """Create a user with one exercise that has `logs` logs spread
+    over the last year"""
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from exercise.models import Exercise, ExerciseLog
+    from workout.models import WorkoutLog
+
+    user = get_user_model().objects.create_user('bench@gmail.com', 'bench')
+    exercise = Exercise.objects.create(name='Bench Press', user=user)
+    workouts = WorkoutLog.objects.bulk_create(
+        [WorkoutLog(user=user, name=f'workout_{i}')
+         for i in range(max(1, logs // 5))])
+
+    rand = random.Random(0)
+    created = ExerciseLog.objects.bulk_create(
+        [ExerciseLog(user=user, exercise=exercise,
+                     workout_log=workouts[i // 5],
+                     number_of_sets=rand.randint(1, 5),
+                     number_of_reps=rand.randint(5, 12),
+                     duration_in_minutes=rand.randint(5, 8),
+                     weight_in_kg=rand.randint(20, 120))
+         for i in range(logs)],
+        batch_size=5000)
+    now = timezone.now()
+    for i, log in enumerate(created):
+        log.created_at = now - timedelta(days=364 * i / logs)
+    ExerciseLog.objects.bulk_update(created, ['created_at'], batch_size=5000)
+    return user, exercise
+
+
+def aggregate_logs(user, exercise, granularity, start):
+    """The aggregates of the periods computed from the logs"""
+    from django.db.models import (
+        BigIntegerField,
+        Count,
+        F,
+        Max,
+        Sum,
+        Value
+    )
+    from django.db.models.functions import (
+        Cast,
+        Coalesce,
+        TruncDay,
+        TruncMonth,
+        TruncWeek
+    )
+    from exercise.models import ExerciseLog
+    from exercise.rollups import period_start, start_of_day
+
+    trunc = {'day': TruncDay, 'week': TruncWeek,
+             'month': TruncMonth}[granularity]
+    volume = Cast('number_of_sets', BigIntegerField()) * \
+        F('number_of_reps') * F('weight_in_kg')
+    return list(
+        ExerciseLog.objects.filter(
+            user=user, exercise=exercise,
+            created_at__gte=start_of_day(period_start(start, granularity)))
+        .annotate(period_start=trunc('created_at')).order_by()
+        .values('period_start')
+        .annotate(max_weight_kg=Max('weight_in_kg'),
+                  total_volume_kg=Coalesce(Sum(volume), Value(0)),
+                  session_count=Count('workout_log', distinct=True),
+                  total_duration_minutes=Coalesce(
+                      Sum('duration_in_minutes'), Value(0)))
+        .order_by('period_start'))
+
+
+def run(logs, repeat):
+    """Run both paths for each granularity and return the results"""
+    from django.utils import timezone
+    from exercise.rollups import get_rollups, rebuild_rollups
+
+    user, exercise = seed(logs)
+    start = time.perf_counter()
+    rollup_count = rebuild_rollups(user.id)
+    results = {'logs': logs, 'repeat': repeat,
+               'rebuild': {'rollups': rollup_count,
+                           'ms': round((time.perf_counter() - start) * 1000,
+                                       1)}}
+
+    end = timezone.localdate()
+    year_start = end - timedelta(days=365)
+    for granularity in ['day', 'week', 'month']:
+        from_logs = aggregate_logs(user, exercise, granularity, year_start)
+        from_rollups = list(get_rollups(user.id, exercise.id, granularity,
+                                        year_start, end))
+        for row in from_logs:
+            row['period_start'] = timezone.localdate(row['period_start'])
+        if from_logs != from_rollups:
+            raise AssertionError(f"The aggregates differ by {granularity}")
+
+        result = results[granularity] = {'rows': len(from_rollups)}
+        for path_name, path in [
+                ('logs', lambda: aggregate_logs(user, exercise, granularity,
+                                                year_start)),
+                ('rollups', lambda: list(get_rollups(
+                    user.id, exercise.id, granularity, year_start, end)))]:
+            timings, _ = measure(path, repeat, trace_memory=False)
+            result[path_name] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+            }
+        result['speedup_p50'] = round(
+            result['logs']['p50_ms'] / result['rollups']['p50_ms'], 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--logs', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.logs, args.repeat), indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark of searching the exercises of a user by a part of the name
+- icontains: the old path, name__icontains then sorting by length in python
+- trigram: search_exercises, the trigram index ranked in the database
+- the queries are timed for regular users and for a few heavy users
+with many exercises, where scanning the exercises of the user costs most
+- Usage:
+    python -m benchmarks.search --users 1000 --exercises 100
+"""
+import argparse
+import json
+import random
+from benchmarks import measure, percentile, setup_django, test_database
+
+MODIFIERS = ['incline', 'decline', 'seated', 'standing', 'single arm',
+             'close grip', 'wide grip', 'reverse', 'paused', 'tempo']
+EQUIPMENT = ['barbell', 'dumbbell', 'cable', 'machine', 'smith',
+             'kettlebell', 'band', 'bodyweight']
+MOVEMENTS = ['bench press', 'row', 'curl', 'squat', 'deadlift', 'fly',
+             'pulldown', 'lunge', 'raise', 'extension', 'shrug', 'press']
+QUERIES = ['press', 'bench', 'row', 'curl', 'cable fly', 'dumbbell',
+           'incline bench', 'ext', 'squat', 'grip']
+
+
+def seed(users, exercises_per_user, first=0):
+    """Create users with exercises named from the vocabulary"""
+    from django.contrib.auth import get_user_model
+    from exercise.models import Exercise
+    from exercise.search import index_exercises
+
+    rand = random.Random(first)
+    User = get_user_model()
+    created_users = User.objects.bulk_create(
+        [User(email=f"user{i}@gmail.com", password='!')
+         for i in range(first, first + users)])
+    for user in created_users:
+        names = set()
+        while len(names) < exercises_per_user:
+            names.add(f"{rand.choice(MODIFIERS)} {rand.choice(EQUIPMENT)} "
+                      f"{rand.choice(MOVEMENTS)} {rand.randint(1, 9999)}")
+        exercises = Exercise.objects.bulk_create(
+            [Exercise(name=name, user=user) for name in names],
+            batch_size=5000)
+        index_exercises(exercises)
+    return created_users
+
+
+def run(users, exercises_per_user, heavy_users, heavy_exercises, repeat):
+    """Run both paths and return the results"""
+    from django.db import connection
+    from exercise.models import Exercise
+    from exercise.search import search_exercises
+
+    created_users = seed(users, exercises_per_user)
+    created_heavy_users = seed(heavy_users, heavy_exercises, first=users)
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def icontains_path(user, name):
+        exercises = list(Exercise.objects.filter(user=user,
+                                                 name__icontains=name))
+        return sorted(exercises, key=lambda exercise: len(exercise.name))
+
+    def trigram_path(user, name):
+        return list(search_exercises(user, name))
+
+    results = {
+        'users': users, 'exercises': users * exercises_per_user,
+        'heavy_users': heavy_users,
+        'heavy_user_exercises': heavy_exercises, 'queries': repeat}
+    rand = random.Random(1)
+    for group, group_users in [('regular', created_users),
+                               ('heavy', created_heavy_users)]:
+        if not group_users:
+            continue
+        samples = [(rand.choice(group_users), rand.choice(QUERIES))
+                   for _ in range(repeat)]
+        results[group] = dict()
+        for path_name, path in [('icontains', icontains_path),
+                                ('trigram', trigram_path)]:
+            timings = list()
+            for user, name in samples:
+                timing, _ = measure(lambda: path(user, name),
+                                    trace_memory=False)
+                timings += timing
+            results[group][path_name] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--exercises', type=int, default=100,
+                        help="exercises for each user")
+    parser.add_argument('--heavy-users', type=int, default=2)
+    parser.add_argument('--heavy-exercises', type=int, default=20000,
+                        help="exercises for each heavy user")
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        print(json.dumps(run(args.users, args.exercises, args.heavy_users,
+                             args.heavy_exercises, args.repeat),
+                         indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
+# the threads running the queries of an ASGI request end with it, so
+# their connections can not be kept for the next requests, they are
+# closed at the end of each request (or given back to the pool)
+for database in settings.DATABASES.values():
+    database['CONN_MAX_AGE'] = 0
+
 application = get_asgi_application()
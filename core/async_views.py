@@ -0,0 +1,195 @@
+"""
+Async views answering the read endpoints under ASGI
+- AsyncReadView: base of the async views, the GET requests of an
+endpoint are answered with the async ORM and the others are sent
+to its DRF view
+- AsyncListView, AsyncRetrieveView: the list and retrieve actions
+of a DRF view with the async ORM
+- see core/urls_asgi.py for the endpoints served by them
+"""
+from copy import copy
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from core.conditional import conditional_headers, conditional_response
+from core.renderers import ORJSONRenderer
+from core.response_cache import response_cache
+from core.routers import read_from_primary
+from user.authentication import CachedTokenAuthentication, token_cache
+from user.models import UserDataVersion
+
+JSON_MEDIA_TYPE = 'application/json'
+JSON_MEDIA_RANGES = {'*/*', 'application/*', JSON_MEDIA_TYPE}
+
+
+def accepts_json(request):
+    """Whether the DRF views would answer the request with compact JSON,
+    and not the browsable API or an indented JSON"""
+    accept = request.headers.get('Accept', '*/*')
+    if 'text/html' in accept or ';' in accept or 'format' in request.GET:
+        return False
+    return any(media_range.strip() in JSON_MEDIA_RANGES
+               for media_range in accept.split(','))
+
+
+class AsyncReadView(View):
+    """
+    Base of an async view answering the GET requests of an endpoint
+    - `sync_view`: the DRF view of the endpoint, it answers the other
+    methods and the requests the async view leaves to it: the ones
+    without a valid token, asking for another format than compact
+    JSON, with invalid parameters or for a missing row, so their
+    responses stay the ones of the DRF views
+    - the user of the token is taken from the token cache of
+    CachedTokenAuthentication, a token not cached yet is read with
+    the async ORM (from the primary database) and cached
+    - `conditional`: answer with a 304 like ConditionalListMixin
+    - `cached`: keep the responses in the response cache, a shared
+    cache is called in a thread so the event loop is not blocked
+    - subclasses implement `read(request, *args, **kwargs)`, returning
+    the data of the response or None to leave the request to the
+    DRF view
+    """
+    sync_view = None
+    conditional = False
+    cached = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # the DRF views are csrf exempt as well
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            response = await self.get(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        """Returns the response, None to leave it to the DRF view"""
+        if not accepts_json(request):
+            return None
+        user = await self.authenticate(request)
+        if user is None:
+            return None
+        request = Request(request)
+        request.user = user
+
+        etag = None
+        if self.conditional:
+            current = await UserDataVersion.objects.acurrent(user.id)
+            if current is not None:
+                etag, last_modified = conditional_headers(
+                    request, current, JSON_MEDIA_TYPE)
+                response = conditional_response(request, etag,
+                                                last_modified)
+                if response is not None:
+                    return self.finalize(response, etag, last_modified)
+
+        key = data = None
+        if self.cached and settings.RESPONSE_CACHE_TTL:
+            key = await self.call_cache(response_cache.key, request)
+            data = await self.call_cache(response_cache.get, key)
+        if data is None:
+            try:
+                data = await self.read(request, *args, **kwargs)
+            except APIException:
+                return None
+            if data is None:
+                return None
+            if key is not None:
+                await self.call_cache(response_cache.set, key, data)
+
+        response = HttpResponse(ORJSONRenderer().render(data),
+                                content_type=JSON_MEDIA_TYPE)
+        return self.finalize(response, etag, etag and last_modified)
+
+    @staticmethod
+    def finalize(response, etag, last_modified):
+        patch_vary_headers(response, ['Accept'])
+        if etag is not None:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    @staticmethod
+    async def authenticate(request):
+        """The user of the token of the request, None if not valid"""
+        auth = get_authorization_header(request).split()
+        keyword = CachedTokenAuthentication.keyword.lower().encode()
+        if len(auth) != 2 or auth[0].lower() != keyword:
+            return None
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            return None
+        cached = token_cache.get(key)
+        if cached is None:
+            with read_from_primary():
+                token = await Token.objects.select_related('user')\
+                    .filter(key=key).afirst()
+            if token is None or not token.user.is_active:
+                return None
+            token_cache.set(key, token.user, token)
+            cached = (token.user, token)
+        return copy(cached[0])
+
+    @staticmethod
+    async def call_cache(method, *args):
+        if response_cache.is_local:
+            return method(*args)
+        return await sync_to_async(method)(*args)
+
+    def get_drf_view(self, request, **kwargs):
+        """An instance of the DRF view of the endpoint, for its
+        queryset, serializer and paginator"""
+        view = self.sync_view.cls(**self.sync_view.initkwargs)
+        view.request = request
+        view.args = ()
+        view.kwargs = kwargs
+        view.format_kwarg = None
+        actions = getattr(self.sync_view, 'actions', None)
+        if actions:
+            view.action = actions['get']
+        return view
+
+    async def read(self, request, *args, **kwargs):
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    """Async view of the list action of a DRF view"""
+
+    async def read(self, request, *args, **kwargs):
+        view = self.get_drf_view(request, **kwargs)
+        queryset = view.filter_queryset(view.get_queryset())
+        if view.paginator is None:
+            rows = [row async for row in queryset] \
+                if hasattr(queryset, '__aiter__') else list(queryset)
+            return view.get_serializer(rows, many=True).data
+        page = await view.paginator.apaginate_queryset(
+            queryset, request, view)
+        return view.paginator.get_paginated_response(
+            view.get_serializer(page, many=True).data).data
+
+
+class AsyncRetrieveView(AsyncReadView):
+    """Async view of the retrieve action of a DRF view"""
+
+    async def read(self, request, *args, **kwargs):
+        view = self.get_drf_view(request, **kwargs)
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        instance = await view.filter_queryset(view.get_queryset()).filter(
+            **{view.lookup_field: kwargs[lookup_url_kwarg]}).afirst()
+        if instance is None:
+            return None
+        return view.get_serializer(instance).data
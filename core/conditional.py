@@ -0,0 +1,68 @@
+"""
+Conditional GET of the list endpoints
+- ConditionalListMixin: answers `304 Not Modified` to a client whose
+copy of the list is still up to date
+- conditional_headers: the ETag and Last-Modified of a list, also used
+by the async views
+- conditional_response: the 304 of a request whose copy is up to date
+"""
+from hashlib import blake2b
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from user.models import UserDataVersion
+
+
+def conditional_headers(request, current, media_type):
+    """
+    Returns the (ETag, Last-Modified timestamp) of a list for the
+    (version, updated_at) of the data of the user
+    """
+    version, updated_at = current
+    digest = blake2b(
+        f"{request.user.id} {request.get_full_path()} {media_type}".encode(),
+        digest_size=8).hexdigest()
+    return f'"{version}-{digest}"', int(updated_at.timestamp())
+
+
+def conditional_response(request, etag, last_modified):
+    """
+    Returns a 304 (or 412) response if the copy of the client is up to
+    date, None otherwise
+    - Last-Modified is rounded down to the second, a write later in the
+    same second has the same one: If-Modified-Since only matches when
+    the last write is in an earlier second than it, so a client sending
+    back the Last-Modified it got is answered with the list, the ETag
+    is the one telling an up to date copy
+    """
+    return get_conditional_response(request, etag=etag,
+                                    last_modified=last_modified + 1)
+
+
+class ConditionalListMixin:
+    """
+    ViewSet mixin for the ETag and Last-Modified of the list action
+    - the data version of the user (see user/models.py) is read before
+    anything else, a matching If-None-Match or If-Modified-Since is
+    answered with a 304 without running the queryset or the serializer
+    - the ETag is the version and a digest of the user, the full path
+    (page, cursor and filters) and the media type of the response, so
+    each page and format has its own ETag
+    - Last-Modified is the time of the last write with a precision
+    of a second, If-None-Match is used first when both are sent, see
+    conditional_response for If-Modified-Since
+    """
+
+    def list(self, request, *args, **kwargs):
+        current = UserDataVersion.objects.current(request.user.id)
+        if current is None:
+            return super().list(request, *args, **kwargs)
+
+        etag, last_modified = conditional_headers(
+            request, current, request.accepted_media_type)
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
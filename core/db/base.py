@@ -0,0 +1,60 @@
+"""
+The PostgreSQL database backend of the project
+- DatabaseWrapper: the postgresql backend of django counting the
+lifecycle of its connections in `connection_metrics_store`,
+see core/metrics.py
+- persistent connections, their health checks and the pool are the
+ones of django, set with the DB_* settings
+"""
+from time import perf_counter
+from django.db.backends.postgresql import base
+from core.metrics import connection_metrics_store
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The postgresql backend counting the opened, reused and closed
+    connections and the failed health checks
+    - a connection kept open at the end of a request is counted as
+    reused when the next request uses it
+    - the time spent in connect() is the time waited for the
+    connection, opening it or taking it from the pool
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.kept_for_reuse = False
+
+    def connect(self):
+        start = perf_counter()
+        super().connect()
+        self.kept_for_reuse = False
+        connection_metrics_store.record(
+            self.alias, 'opened', (perf_counter() - start) * 1000)
+
+    def ensure_connection(self):
+        if self.connection is not None and self.kept_for_reuse:
+            self.kept_for_reuse = False
+            connection_metrics_store.record(self.alias, 'reused')
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        """Called at the start and at the end of each request"""
+        # the checks use the connection, it is not reused by them
+        self.kept_for_reuse = False
+        super().close_if_unusable_or_obsolete()
+        self.kept_for_reuse = self.connection is not None
+
+    def close_if_health_check_failed(self):
+        checked = self.connection is not None and \
+            self.health_check_enabled and not self.health_check_done
+        super().close_if_health_check_failed()
+        if checked and self.connection is None:
+            connection_metrics_store.record(
+                self.alias, 'health_check_failures')
+
+    def _close(self):
+        had_connection = self.connection is not None
+        super()._close()
+        if had_connection:
+            connection_metrics_store.record(self.alias, 'closed')
@@ -0,0 +1,218 @@
+"""
+Per-request metrics of the API: query count and timings
+- RequestMetrics: the metrics of one request, the request being
+measured is kept in a ContextVar so it follows the request in the
+threads of WSGI servers and in the executors of ASGI
+- RouteStats: the histograms of the metrics of one route
+- MetricsStore: an in-process store of the RouteStats of each route,
+`request_metrics_store` is the one filled by the middleware,
+see core/middleware.py
+- the serializers are timed by wrapping is_valid and data of the
+base serializer of DRF once, see instrument_serializers
+- ConnectionStats: the lifecycle counters of the connections of one
+database, `connection_metrics_store` is the one filled by the database
+backend, see core/db/base.py
+"""
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from rest_framework.serializers import BaseSerializer
+
+# the upper bounds of the histogram buckets, the last bucket is unbounded
+TIMING_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+    """The query count and timings (milliseconds) of one request"""
+
+    def __init__(self):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.serializer_ms = 0.0
+        self.view_ms = 0.0
+        self._serializer_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """A database execute wrapper counting and timing the queries"""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.sql_ms += (perf_counter() - start) * 1000
+
+    def server_timing(self):
+        """Returns the value of the Server-Timing header"""
+        return (f'db;dur={self.sql_ms:.2f};desc="{self.query_count} '
+                f'queries", serializer;dur={self.serializer_ms:.2f}, '
+                f'view;dur={self.view_ms:.2f}')
+
+
+class Histogram:
+    """The count, sum and bucket counts of the values of a metric"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def as_dict(self):
+        bounds = [str(bound) for bound in self.buckets] + ['+inf']
+        return {
+            'count': self.count,
+            'mean': round(self.sum / self.count, 3) if self.count else None,
+            'buckets': dict(zip(bounds, self.counts)),
+        }
+
+
+class RouteStats:
+    """The histograms of the metrics of the requests of one route"""
+
+    def __init__(self):
+        self.query_count = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_ms = Histogram(TIMING_BUCKETS_MS)
+        self.serializer_ms = Histogram(TIMING_BUCKETS_MS)
+        self.view_ms = Histogram(TIMING_BUCKETS_MS)
+
+    def add(self, metrics):
+        self.query_count.add(metrics.query_count)
+        self.sql_ms.add(metrics.sql_ms)
+        self.serializer_ms.add(metrics.serializer_ms)
+        self.view_ms.add(metrics.view_ms)
+
+    def as_dict(self):
+        return {
+            'requests': self.view_ms.count,
+            'query_count': self.query_count.as_dict(),
+            'sql_ms': self.sql_ms.as_dict(),
+            'serializer_ms': self.serializer_ms.as_dict(),
+            'view_ms': self.view_ms.as_dict(),
+        }
+
+
+class MetricsStore:
+    """The RouteStats of each route ('METHOD url name') of this process"""
+
+    def __init__(self):
+        self._routes = dict()
+        self._lock = Lock()
+
+    def add(self, route, metrics):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.add(metrics)
+
+    def as_dict(self):
+        with self._lock:
+            return {route: stats.as_dict()
+                    for route, stats in sorted(self._routes.items())}
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+request_metrics_store = MetricsStore()
+
+
+class ConnectionStats:
+    """
+    The lifecycle of the connections of one database
+    - opened: connections opened, or taken from the pool
+    - reused: requests served by a connection kept from a previous one
+    - closed: connections closed, or given back to the pool
+    - health_check_failures: kept connections found broken
+    - connect_ms: the time waited for each opened connection
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self.reused = 0
+        self.closed = 0
+        self.health_check_failures = 0
+        self.connect_ms = Histogram(TIMING_BUCKETS_MS)
+
+    def as_dict(self):
+        return {
+            'opened': self.opened,
+            'reused': self.reused,
+            'closed': self.closed,
+            'health_check_failures': self.health_check_failures,
+            'connect_ms': self.connect_ms.as_dict(),
+        }
+
+
+class ConnectionMetricsStore:
+    """The ConnectionStats of each database alias of this process"""
+
+    def __init__(self):
+        self._databases = dict()
+        self._lock = Lock()
+
+    def record(self, alias, event, connect_ms=None):
+        """Count an event ('opened', 'reused', 'closed' or
+        'health_check_failures') of a connection"""
+        with self._lock:
+            stats = self._databases.get(alias)
+            if stats is None:
+                stats = self._databases[alias] = ConnectionStats()
+            setattr(stats, event, getattr(stats, event) + 1)
+            if connect_ms is not None:
+                stats.connect_ms.add(connect_ms)
+
+    def as_dict(self):
+        with self._lock:
+            return {alias: stats.as_dict()
+                    for alias, stats in sorted(self._databases.items())}
+
+    def clear(self):
+        with self._lock:
+            self._databases.clear()
+
+
+connection_metrics_store = ConnectionMetricsStore()
+
+
+def _timed(function):
+    """Add the time spent in a serializer method to the request metrics,
+    the serializers called inside it are not counted twice"""
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return function(*args, **kwargs)
+        metrics._serializer_depth += 1
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            metrics._serializer_depth -= 1
+            if not metrics._serializer_depth:
+                metrics.serializer_ms += (perf_counter() - start) * 1000
+    wrapper.__wrapped__ = function
+    return wrapper
+
+
+def instrument_serializers():
+    """
+    Time the validation and the representation of the serializers,
+    only while a request is measured, can be called more than once
+    """
+    if hasattr(BaseSerializer.is_valid, '__wrapped__'):
+        return
+    BaseSerializer.is_valid = _timed(BaseSerializer.is_valid)
+    BaseSerializer.data = property(_timed(BaseSerializer.data.fget))
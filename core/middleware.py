@@ -0,0 +1,170 @@
+"""
+Middlewares of the API
+- RequestMetricsMiddleware: measures the query count, the SQL time,
+the serializer time and the view time of the requests
+- ASGIUrlconfMiddleware: routes the requests of the ASGI application
+with ASGI_ROOT_URLCONF
+- PrimaryPinningMiddleware: tracks the writes of the requests for the
+replica router
+"""
+from contextlib import ExitStack
+from random import random
+from time import perf_counter
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from core.routers import end_request, start_request
+from core.metrics import (
+    RequestMetrics,
+    current_metrics,
+    instrument_serializers,
+    request_metrics_store
+)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure a sample of the requests
+    - enabled with REQUEST_METRICS_ENABLED, REQUEST_METRICS_SAMPLE_RATE
+    is the part of the requests measured (0 to 1), the others only cost
+    one random number
+    - a measured request gets a Server-Timing header and its metrics are
+    added to the histograms of its route, see core/views.py for the
+    endpoint showing them
+    - sync and async like ASGIUrlconfMiddleware, under ASGI the queries
+    run in the thread of the sync_to_async calls of the request (thread
+    sensitive, as the ORM does), so the wrappers counting them are set
+    on the connections of that thread
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        instrument_serializers()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                record_queries(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            metrics.view_ms = (perf_counter() - start) * 1000
+            current_metrics.reset(token)
+        return add_metrics(request, response, metrics)
+
+    async def __acall__(self, request):
+        if random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        stack = ExitStack()
+        try:
+            await sync_to_async(record_queries)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            metrics.view_ms = (perf_counter() - start) * 1000
+            current_metrics.reset(token)
+        return add_metrics(request, response, metrics)
+
+
+def record_queries(stack, metrics):
+    """Count the queries of the connections of the thread in the
+    metrics until the stack is closed"""
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(metrics.record_query))
+
+
+def add_metrics(request, response, metrics):
+    """Add the Server-Timing header to the response and the metrics to
+    the histograms of the route of the request"""
+    response['Server-Timing'] = metrics.server_timing()
+    match = request.resolver_match
+    route = match.view_name if match else 'unmatched'
+    request_metrics_store.add(f"{request.method} {route}", metrics)
+    return response
+
+
+class ASGIUrlconfMiddleware:
+    """
+    Route the requests of the ASGI application with ASGI_ROOT_URLCONF,
+    so the read endpoints are answered by the async views there
+    - the WSGI application keeps ROOT_URLCONF
+    - sync and async, so it does not switch the async views to a thread
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if isinstance(request, ASGIRequest):
+            request.urlconf = settings.ASGI_ROOT_URLCONF
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class PrimaryPinningMiddleware:
+    """
+    Track the writes of each request for ReplicaRouter, so the reads
+    following a write go to the primary, see core/routers.py
+    - the reads of a request go to the replicas until its first write
+    - the requests with the token of a request that wrote read from
+    the primary for DB_READ_AFTER_WRITE_SECONDS, while the replicas
+    catch up
+    - sync and async like ASGIUrlconfMiddleware
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_request(request)
+        try:
+            return self.get_response(request)
+        finally:
+            end_request(token)
+
+    async def __acall__(self, request):
+        token = start_request(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            end_request(token)
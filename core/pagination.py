@@ -0,0 +1,136 @@
+"""
+Pagination of the list endpoints
+- KeysetPagination: paginates on (created_at, id) with opaque cursors
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset pagination ordered on (created_at, id)
+    - a page is fetched by seeking past the (created_at, id) of the last
+    row of the previous page, so with an index on (user, created_at, id)
+    any page costs the same as the first one
+    - the cursor is an opaque token of that position and the direction
+    - the page size can be set with `page_size` up to API_MAX_PAGE_SIZE
+    - the response is the same as the one of CursorPagination:
+    `next`, `previous` and `results`
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self._page_queryset(queryset, request)
+        if page_queryset is None:
+            return None
+        return self._set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset with the async ORM, for the async views"""
+        page_queryset = self._page_queryset(queryset, request)
+        if page_queryset is None:
+            return None
+        return self._set_page([row async for row in page_queryset])
+
+    def _page_queryset(self, queryset, request):
+        """
+        Returns the query of the rows of the page and one more row,
+        None if the page size is 0
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.reverse = bool(self.cursor and self.cursor[2])
+
+        # walking to the previous page inverts the ordering of the query
+        descending = self.ordering[0].startswith('-')
+        fields = [field.lstrip('-') for field in self.ordering]
+        if descending != self.reverse:
+            lookup = 'lt'
+            ordering = [f"-{field}" for field in fields]
+        else:
+            lookup = 'gt'
+            ordering = fields
+
+        if self.cursor:
+            first, second, _ = self.cursor
+            queryset = queryset.filter(
+                Q(**{f"{fields[0]}__{lookup}": first}) |
+                Q(**{fields[0]: first, f"{fields[1]}__{lookup}": second}))
+        return queryset.order_by(*ordering)[:self.page_size + 1]
+
+    def _set_page(self, results):
+        """Keep the rows of the page out of the fetched rows"""
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(self.cursor)
+        return self.page
+
+    def _get_position(self, instance):
+        """The (created_at, id) of an instance"""
+        return tuple(getattr(instance, field.lstrip('-'))
+                     for field in self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position(self.page[-1])
+        else:
+            position = self.cursor[:2]
+        return self.encode_cursor((*position, False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._get_position(self.page[0])
+        else:
+            position = self.cursor[:2]
+        return self.encode_cursor((*position, True))
+
+    def decode_cursor(self, request):
+        """
+        Returns the (created_at, id, reverse) of the cursor in the request,
+        or None if there is no cursor
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            created_at, pk, reverse = json.loads(
+                urlsafe_b64decode(encoded.encode('ascii')))
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError("Invalid date")
+            return created_at, int(pk), bool(reverse)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        """Returns the url of the page at (created_at, id, reverse)"""
+        created_at, pk, reverse = cursor
+        token = json.dumps([created_at.isoformat(), pk, int(reverse)],
+                           separators=(',', ':'))
+        encoded = urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url,
+                                   self.cursor_query_param, encoded)
@@ -0,0 +1,45 @@
+"""
+Parsers of the API
+- ORJSONParser: parses JSON with orjson, giving the same data and
+the same errors as the JSONParser of DRF
+"""
+import codecs
+from io import BytesIO
+from rest_framework.parsers import JSONParser, get_encoding
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# orjson reads integers over 64 bits as floats, the bodies that may hold
+# one (any run of 20 digits, even in a string) are parsed by DRF,
+# the runs are found by turning the digits to 0 and the rest to spaces
+DIGITS_TABLE = bytes(b'0'[0] if byte in b'0123456789' else b' '[0]
+                     for byte in range(256))
+LONG_DIGITS = b'0' * 20
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser using orjson for UTF-8 request bodies
+    - bodies orjson refuses (invalid JSON, lone surrogates) are parsed
+    again by the JSONParser of DRF, so the accepted data and the error
+    messages stay the same, as are the bodies with integers too big
+    for orjson
+    - other charsets, non strict settings and a missing orjson use the
+    JSONParser of DRF directly
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = get_encoding(parser_context or {})
+        if orjson is None or not self.strict or \
+                codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if LONG_DIGITS in body.translate(DIGITS_TABLE):
+            return super().parse(BytesIO(body), media_type, parser_context)
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
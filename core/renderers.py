@@ -0,0 +1,55 @@
+"""
+Renderers of the API
+- ORJSONRenderer: renders JSON with orjson, byte for byte the same
+output as the JSONRenderer of DRF
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer using orjson for the compact output of the API
+    - dicts, lists, tuples, strings and numbers are encoded by orjson,
+    datetimes, dates, times, Decimals, timedeltas and the rest go
+    through the encoder of DRF so they keep their representation
+    (e.g. '2024-11-17T10:00:00Z' and not '+00:00')
+    - \\u2028 and \\u2029 are escaped like DRF does
+    - floats are written by orjson, they only differ for exponents
+    (1e16 and not 1e+16) and NaN (null and not an error), the
+    serializers of the API do not output such floats
+    - indented output (`; indent=4` or the browsable API), non compact
+    or ascii settings, data orjson refuses (e.g. integers over 64 bits)
+    and a missing orjson fall back to the JSONRenderer of DRF
+    """
+    options = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+               if orjson else None)
+    default = staticmethod(JSONEncoder().default)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or not self.compact or self.ensure_ascii or \
+                self.get_indent(accepted_media_type,
+                                renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.default,
+                               option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        if LINE_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028')
+        if PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -0,0 +1,153 @@
+"""
+Cache of the responses of the read endpoints
+- ResponseCache: the responses of each user kept in a django cache,
+dropped by the writes of that user
+- cache_response: decorator of a view method whose responses are cached
+- CachedListMixin: caches the list action of a view
+"""
+from functools import wraps
+from hashlib import blake2b
+from threading import Lock
+from time import time_ns
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+class ResponseCache:
+    """
+    Cache of the data of the responses of the users
+    - kept in the django cache RESPONSE_CACHE_ALIAS, a local memory
+    cache of each process by default, any django cache backend
+    (e.g. redis or memcached) can be set for it in CACHES to share it
+    between the processes, which is needed when running several
+    processes so a write in one of them drops the responses of all
+    - the key is the user, the generation of the user, the route and
+    the query params, a write of the user increases the generation
+    (see user/signals.py) so only the responses of that user are
+    dropped
+    - the generation is increased right away and again after the
+    commit of the transaction of the write, so a response read before
+    the commit is not kept with the new generation
+    - hits, misses and invalidations are counted by each process
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.clear_stats()
+
+    @property
+    def backend(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    @property
+    def is_local(self):
+        """Whether the cache is in the memory of the process, so its
+        calls do no I/O and can be made from the async views"""
+        return isinstance(self.backend, LocMemCache)
+
+    @staticmethod
+    def _generation_key(user_id):
+        return f"response:{user_id}:generation"
+
+    def _generation(self, user_id):
+        """The generation of the cached responses of a user"""
+        key = self._generation_key(user_id)
+        generation = self.backend.get(key)
+        if generation is None:
+            # never a generation used before, the responses kept with
+            # an evicted generation are not found again
+            self.backend.add(key, time_ns(), timeout=None)
+            generation = self.backend.get(key)
+        return generation
+
+    def key(self, request):
+        """The key of the response of a request of a user"""
+        query = sorted(request.query_params.lists())
+        digest = blake2b(
+            f"{request.build_absolute_uri(request.path)} {query}".encode(),
+            digest_size=16).hexdigest()
+        return f"response:{request.user.id}:" \
+               f"{self._generation(request.user.id)}:{digest}"
+
+    def get(self, key):
+        """Returns the cached data, None if it is not cached"""
+        data = self.backend.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, key, data):
+        self.backend.set(key, data, settings.RESPONSE_CACHE_TTL)
+
+    def invalidate(self, user_id):
+        """Drop the cached responses of a user after a write"""
+        self._increase_generation(user_id)
+        with self._lock:
+            self.invalidations += 1
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(
+                lambda: self._increase_generation(user_id))
+
+    def _increase_generation(self, user_id):
+        try:
+            self.backend.incr(self._generation_key(user_id))
+        except ValueError:
+            # no generation, nothing is cached for the user
+            pass
+
+    def stats(self):
+        """The counters of this process"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': settings.CACHES[
+                    settings.RESPONSE_CACHE_ALIAS]['BACKEND'],
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4)
+                if lookups else None,
+                'invalidations': self.invalidations,
+            }
+
+    def clear_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.invalidations = 0
+
+
+response_cache = ResponseCache()
+
+
+def cache_response(method):
+    """
+    Decorator of a view method (e.g. `list` or `get`) keeping the data
+    of its 200 responses in the response cache of the user
+    - disabled when RESPONSE_CACHE_TTL is 0
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not settings.RESPONSE_CACHE_TTL or \
+                not request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+        key = response_cache.key(request)
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = method(self, request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            response_cache.set(key, response.data)
+        return response
+    return wrapper
+
+
+class CachedListMixin:
+    """View mixin caching the responses of the list action"""
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
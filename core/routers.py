@@ -0,0 +1,130 @@
+"""
+Database routers
+- ReplicaRouter: sends the reads of the requests to the replicas of
+DATABASE_REPLICAS, and the writes with the reads following them to
+the primary database
+- start_request, end_request: track the writes of a request, called by
+PrimaryPinningMiddleware, see core/middleware.py
+- read_from_primary: context manager sending the reads inside it to
+the primary
+- the pins of the tokens are kept in the DB_READ_AFTER_WRITE_CACHE_ALIAS
+cache, it must be shared by the processes (e.g. redis) or a token is
+only pinned on the process that served its write
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from hashlib import blake2b
+from itertools import count
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.authentication import get_authorization_header
+from rest_framework.permissions import SAFE_METHODS
+
+# the routing state of the request being served, None outside requests
+current_routing = ContextVar('current_routing', default=None)
+
+
+class RequestRouting:
+    """
+    The routing state of one request
+    - pinned: reads go to the primary, set for the requests that are
+    not reads, by the first write of the request or by a recent write
+    of the same token
+    - wrote: the request wrote to the primary
+    - session_key: the cache key of the token of the request
+    """
+
+    def __init__(self, session_key=None, pinned=False):
+        self.session_key = session_key
+        self.pinned = pinned
+        self.wrote = False
+
+
+def _session_key(request):
+    """The cache key of the token of a request, None without one"""
+    auth = get_authorization_header(request)
+    if not auth:
+        return None
+    return f"db:primary:{blake2b(auth, digest_size=16).hexdigest()}"
+
+
+def _pins():
+    """The cache of the tokens pinned to the primary"""
+    return caches[settings.DB_READ_AFTER_WRITE_CACHE_ALIAS]
+
+
+def start_request(request):
+    """
+    Start tracking the writes of a request
+    - the request is pinned to the primary when it is not a read (its
+    reads lead to writes, e.g. the row a PATCH updates) or when its
+    token wrote less than DB_READ_AFTER_WRITE_SECONDS ago
+    - returns the token to give to end_request
+    """
+    key = _session_key(request) if settings.DATABASE_REPLICAS else None
+    pinned = request.method not in SAFE_METHODS or \
+        key is not None and _pins().get(key) is not None
+    return current_routing.set(RequestRouting(key, pinned))
+
+
+def end_request(token):
+    """Stop tracking, a request that wrote pins the next requests of
+    its token for DB_READ_AFTER_WRITE_SECONDS"""
+    routing = current_routing.get()
+    current_routing.reset(token)
+    if routing is not None and routing.wrote and routing.session_key and \
+            settings.DB_READ_AFTER_WRITE_SECONDS > 0:
+        _pins().set(routing.session_key, 1,
+                    timeout=settings.DB_READ_AFTER_WRITE_SECONDS)
+
+
+@contextmanager
+def read_from_primary():
+    """Send the reads inside the block to the primary"""
+    token = current_routing.set(None)
+    try:
+        yield
+    finally:
+        current_routing.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Route the queries between the primary and the replicas
+    - the writes go to the primary and pin the rest of the request to
+    it, the requests other than GET, HEAD and OPTIONS are pinned from
+    their start
+    - the reads of a request go to a replica picked by
+    DB_REPLICA_SELECTION ('random' or 'round_robin'), unless the
+    request is pinned or the primary is in a transaction, so a request
+    reads what it wrote and a transaction reads its own rows
+    - the reads outside requests (commands, shell, tests without a
+    request) go to the primary
+    - without replicas everything goes to the primary
+    """
+    _turns = count()
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        routing = current_routing.get()
+        if not replicas or routing is None or routing.pinned or \
+                connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if settings.DB_REPLICA_SELECTION == 'round_robin':
+            return replicas[next(self._turns) % len(replicas)]
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.pinned = routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """The replicas hold the same rows as the primary"""
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,12 +41,16 @@ INSTALLED_APPS = [
     'user',
     'workout',
     'exercise',
+    'sync',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestMetricsMiddleware',
+    'core.middleware.ASGIUrlconfMiddleware',
+    'core.middleware.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,6 +61,9 @@ MIDDLEWARE = [
 ]
 
 ROOT_URLCONF = 'core.urls'
+# The urls of the ASGI application, its read endpoints are async views,
+# see core/urls_asgi.py
+ASGI_ROOT_URLCONF = 'core.urls_asgi'
 
 TEMPLATES = [
     {
@@ -78,17 +86,110 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
-from decouple import config
+from decouple import Csv, config
+# core.db is the postgresql backend counting the lifecycle of the
+# connections, see /api/stats/db_connections/
+# DB_CONN_MAX_AGE is how long (seconds) a connection is kept open for
+# the next requests (0 closes it at the end of each request) and
+# DB_CONN_HEALTH_CHECKS checks a kept connection before reusing it
+# DB_POOL_MAX_SIZE > 0 uses an in-process pool of DB_POOL_MIN_SIZE to
+# DB_POOL_MAX_SIZE connections instead, a request waits at most
+# DB_POOL_TIMEOUT seconds for one, it needs psycopg 3 (psycopg[pool],
+# not in requirements.txt, psycopg2 is used without it), the settings
+# raise ImproperlyConfigured if it is not installed
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True,
+                               cast=bool)
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=0, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db',
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'NAME': config('DB_NAME'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
     }
 }
+if DB_POOL_MAX_SIZE > 0:
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            'DB_POOL_MAX_SIZE > 0 needs psycopg 3 and its pool, '
+            'pip install "psycopg[pool]"')
+    # the pooled connections are given back at the end of each request
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {'pool': {
+        'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': DB_POOL_TIMEOUT,
+    }}
+
+# Read replicas of the default database, DB_REPLICA_HOSTS lists their
+# 'host' or 'host:port' (same name and credentials as default), they get
+# the aliases replica_1, replica_2... The reads of the requests go to a
+# replica picked by DB_REPLICA_SELECTION ('random' or 'round_robin'),
+# the writes go to default and so do the reads following them: in the
+# same request, and in the requests of the same token for
+# DB_READ_AFTER_WRITE_SECONDS (kept in the DB_READ_AFTER_WRITE_CACHE_ALIAS
+# cache, it must be shared by all the processes serving the API, see
+# Caches below), see core/routers.py
+DB_REPLICA_HOSTS = config('DB_REPLICA_HOSTS', default='', cast=Csv())
+for number, replica_host in enumerate(DB_REPLICA_HOSTS, 1):
+    replica_host, _, replica_port = replica_host.partition(':')
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        # the tests read the rows they write through the default one
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+DB_REPLICA_SELECTION = config('DB_REPLICA_SELECTION', default='random')
+DB_READ_AFTER_WRITE_SECONDS = config('DB_READ_AFTER_WRITE_SECONDS',
+                                     default=5, cast=int)
+DB_READ_AFTER_WRITE_CACHE_ALIAS = 'default'
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# 'default' keeps the read-after-write pins of the replica router, a
+# local memory cache of each process by default, which only pins the
+# requests served by the process that wrote: set DEFAULT_CACHE_BACKEND
+# and DEFAULT_CACHE_LOCATION to a shared cache (e.g.
+# django.core.cache.backends.redis.RedisCache and redis://host:6379/0)
+# when DB_REPLICA_HOSTS is set with several processes
+# 'responses' keeps the responses of the read endpoints, a local memory
+# cache of RESPONSE_CACHE_MAX_ENTRIES responses by default, set
+# RESPONSE_CACHE_BACKEND and RESPONSE_CACHE_LOCATION to a shared cache
+# (e.g. django.core.cache.backends.redis.RedisCache) with several
+# processes
+RESPONSE_CACHE_BACKEND = config(
+    'RESPONSE_CACHE_BACKEND',
+    default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': config(
+            'DEFAULT_CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('DEFAULT_CACHE_LOCATION', default=''),
+    },
+    'responses': {
+        'BACKEND': RESPONSE_CACHE_BACKEND,
+        'LOCATION': config('RESPONSE_CACHE_LOCATION', default='responses'),
+    },
+}
+if RESPONSE_CACHE_BACKEND.endswith('.LocMemCache'):
+    CACHES['responses']['OPTIONS'] = {
+        'MAX_ENTRIES': config('RESPONSE_CACHE_MAX_ENTRIES', default=1000,
+                              cast=int),
+    }
 
 
 # Password validation
@@ -138,8 +239,60 @@ AUTH_USER_MODEL = 'user.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    'PAGE_SIZE': config('API_PAGE_SIZE', default=50, cast=int),
 }
 
+# The in-process cache of the users of recently used tokens,
+# the number of tokens kept and how long (seconds) each one is kept
+AUTH_TOKEN_CACHE_SIZE = config('AUTH_TOKEN_CACHE_SIZE', default=5000,
+                               cast=int)
+AUTH_TOKEN_CACHE_TTL = config('AUTH_TOKEN_CACHE_TTL', default=300, cast=int)
+
+# The in-process indexes used to autocomplete exercise names,
+# the number of users kept and how long (seconds) each index is kept
+AUTOCOMPLETE_CACHE_USERS = config('AUTOCOMPLETE_CACHE_USERS', default=1000,
+                                  cast=int)
+AUTOCOMPLETE_CACHE_TTL = config('AUTOCOMPLETE_CACHE_TTL', default=300,
+                                cast=int)
+
+# Measuring the query count and timings of the requests,
+# see core/middleware.py, the part of the requests measured is 0 to 1
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=False,
+                                 cast=bool)
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE',
+                                     default=1.0, cast=float)
+
+# The largest page size a client can ask for with ?page_size=
+API_MAX_PAGE_SIZE = config('API_MAX_PAGE_SIZE', default=500, cast=int)
+
+# The response cache of the read endpoints, the cache of CACHES used
+# and how long (seconds) a response is kept, 0 disables it
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TTL = config('RESPONSE_CACHE_TTL', default=300, cast=int)
+
+# The sync endpoint: the most rows of each kind in one response,
+# how far (seconds) the new checkpoint is set back so the transactions
+# still running are not skipped, and how long (days) the tombstones of
+# the deleted rows are kept
+SYNC_MAX_CHANGES = config('SYNC_MAX_CHANGES', default=1000, cast=int)
+SYNC_CHECKPOINT_LAG = config('SYNC_CHECKPOINT_LAG', default=30, cast=int)
+SYNC_TOMBSTONE_DAYS = config('SYNC_TOMBSTONE_DAYS', default=90, cast=int)
+
+# The export endpoint: the rows fetched at once from the server-side
+# cursor and the size (bytes) of the chunks of the streamed response
+EXPORT_CURSOR_ROWS = config('EXPORT_CURSOR_ROWS', default=2000, cast=int)
+EXPORT_CHUNK_BYTES = config('EXPORT_CHUNK_BYTES', default=65536, cast=int)
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Fitness Tracker APIs',
     'DESCRIPTION': 'The end points for my fitness tracker api',
@@ -0,0 +1,25 @@
+"""
+Settings running the tests of the replica router on two SQLite
+databases standing in for the primary and a replica:
+    python manage.py test core.test.test_db_router \
+--settings=core.settings_replica_test
+- nothing replicates between them, the tests write the rows of the
+replica themselves
+- the tables are created from the models, some migrations of the
+project only run on PostgreSQL
+"""
+from core.settings import *  # noqa: F401, F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'primary.sqlite3',
+    },
+    'replica_1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'replica.sqlite3',
+    },
+}
+DATABASE_REPLICAS = ['replica_1']
+MIGRATION_MODULES = {app: None for app in
+                     ['user', 'workout', 'exercise', 'sync', 'authtoken']}
@@ -0,0 +1,78 @@
+"""
+Helpers for sending requests to the ASGI application of core/asgi.py
+- asgi_get: sends a GET request with a token and returns the response
+- the application runs the queries of a request in its own thread, so
+the tests using it are TransactionTestCase and see committed rows
+- the application closes the connections at the end of each request
+(CONN_MAX_AGE = 0), the settings of the other tests are restored after
+- its middlewares are loaded again for each request, so they follow
+override_settings
+"""
+import asyncio
+from contextlib import contextmanager
+from django.db import connections
+
+HOST = 'testserver'
+
+
+class ASGIResponse:
+    """The status, the headers and the body messages of a response"""
+
+    def __init__(self):
+        self.status = None
+        self.headers = dict()
+        self.chunks = list()
+
+    @property
+    def content(self):
+        return b''.join(self.chunks)
+
+
+@contextmanager
+def per_request_connections():
+    """Set CONN_MAX_AGE to 0 like core/asgi.py while the block runs"""
+    saved = {alias: connections.settings[alias]['CONN_MAX_AGE']
+             for alias in connections}
+    for alias in saved:
+        connections.settings[alias]['CONN_MAX_AGE'] = 0
+    try:
+        yield
+    finally:
+        for alias, max_age in saved.items():
+            connections.settings[alias]['CONN_MAX_AGE'] = max_age
+
+
+async def asgi_get(path, key, query=''):
+    """Send a GET request with the token key to the ASGI application,
+    returns an ASGIResponse"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': query.encode(),
+        'root_path': '', 'client': ('127.0.0.1', 0), 'server': (HOST, 80),
+        'headers': [(b'host', HOST.encode()),
+                    (b'authorization', f"Token {key}".encode())],
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    response = ASGIResponse()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # the client never disconnects
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response.status = message['status']
+            response.headers = {name.decode().lower(): value.decode()
+                                for name, value in message['headers']}
+        elif message.get('body'):
+            response.chunks.append(message['body'])
+
+    with per_request_connections():
+        from core.asgi import application
+        # the middlewares are built with the settings of the test
+        application.load_middleware(is_async=True)
+        await application(scope, receive, send)
+    return response
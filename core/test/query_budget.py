@@ -0,0 +1,39 @@
+"""
+Helpers for asserting the number of queries of the endpoints
+- QueryBudgetMixin: a TestCase mixin with assertQueriesDoNotGrow,
+it fails when the number of queries of a request grows with
+the number of rows it returns (N+1 queries)
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """Mixin for TestCase classes to check the query budget of requests"""
+
+    def assertQueriesDoNotGrow(self, request, add_rows, sizes=(1, 20)):
+        """
+        Assert that a request runs the same number of queries
+        whatever the number of rows
+        - request: sends the request and returns the response
+        - add_rows: creates the given number of extra rows
+        - sizes: the numbers of rows the request is sent with
+        - returns the number of queries of the request
+        """
+        counts = list()
+        created = 0
+        for size in sizes:
+            add_rows(size - created)
+            created = size
+            with CaptureQueriesContext(connection) as context:
+                res = request()
+            self.assertLess(res.status_code, 400, res.content)
+            counts.append((size, context.captured_queries))
+        small, small_queries = counts[0]
+        for size, queries in counts[1:]:
+            self.assertEqual(
+                len(queries), len(small_queries),
+                f"{len(small_queries)} queries with {small} rows but "
+                f"{len(queries)} with {size} rows:\n" +
+                '\n'.join(query['sql'] for query in queries))
+        return len(small_queries)
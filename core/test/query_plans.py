@@ -0,0 +1,61 @@
+"""
+Helpers for asserting the query plans of the hot queries
+- QueryPlanMixin: a TestCase mixin with assertUsesIndex, it fails when
+a query is not answered by an index scan of the given index
+- the test tables are tiny so the planner would read them whole, the
+plans are taken with sequential scans disabled: a query that still
+reads a table whole has no index it can use
+"""
+from django.db import connection
+
+
+def index_name(model, fields):
+    """The name of the index of a model on these fields"""
+    for index in model._meta.indexes:
+        if list(index.fields) == fields:
+            return index.name
+    raise LookupError(f"No index on {fields}")
+
+
+def explain(sql, params=None):
+    """Returns the plan of a query with sequential scans disabled"""
+    with connection.cursor() as cursor:
+        # SET LOCAL ends with the transaction of the test
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN {sql}", params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        cursor.execute("SET LOCAL enable_seqscan = on")
+    return plan
+
+
+class QueryPlanMixin:
+    """Mixin for TestCase classes to check the plans of queries"""
+
+    def assertUsesIndex(self, query, index_name):
+        """
+        Assert that a query is answered by scanning the index
+        - query: a queryset or the SQL of a query captured while it ran
+        - returns the plan
+        """
+        params = None
+        if not isinstance(query, str):
+            query, params = query.query.sql_with_params()
+        plan = explain(query, params)
+        self.assertNotIn('Seq Scan', plan, plan)
+        self.assertRegex(
+            plan, rf"Index (Only )?Scan( Backward)? (using|on) {index_name}\b",
+            plan)
+        return plan
+
+    def captured_query(self, queries, table, contains=''):
+        """The SQL of the first captured SELECT reading from a table
+        (and containing `contains`)"""
+        for query in queries:
+            sql = query['sql']
+            # the queries read with .iterator() declare a cursor
+            if sql.startswith('DECLARE'):
+                sql = sql.split(' FOR ', 1)[1]
+            if sql.startswith('SELECT') and f'FROM "{table}"' in sql and \
+                    contains in sql:
+                return sql
+        self.fail(f"No query on {table}")
@@ -0,0 +1,173 @@
+"""
+This file is for testing the async views of the read endpoints
+- Classes:
+    - AsyncReadViewTest: For the responses of the async views being
+    the same as the ones of the DRF views
+    - AsyncDelegationTest: For the requests left to the DRF views
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - WORKOUT_LOG_LIST_URL: the url for listing the workout logs
+    - EXERCISE_LIST_URL: the url for listing the exercises
+    - EXERCISE_SEARCH_URL: the url for searching the exercises
+    - EXERCISE_PROGRESS_URL: the url for the progress of an exercise
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.async_views import AsyncReadView
+from core.response_cache import response_cache
+from exercise.models import Exercise, ExerciseLog
+from user.authentication import token_cache
+from workout.models import WorkoutLog
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+EXERCISE_LIST_URL = reverse('exercise:exercise-list')
+EXERCISE_SEARCH_URL = reverse('exercise:exercise-search')
+EXERCISE_PROGRESS_URL = reverse('exercise:exercise-progress')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class AsyncViewTestCase(TestCase):
+    """Base of the tests, a user with a token and some rows"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.workout_log = WorkoutLog.objects.create(
+            user=self.user, name='leg day')
+        self.exercise = Exercise.objects.create(name='Squat', user=self.user)
+        ExerciseLog.objects.create(
+            user=self.user, workout_log=self.workout_log,
+            exercise=self.exercise, number_of_sets=3, weight_in_kg=60)
+        self.sync_client = APIClient()
+        self.sync_client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.async_client = AsyncClient(
+            AUTHORIZATION=f"Token {self.token.key}")
+        caches['responses'].clear()
+        token_cache.clear()
+        response_cache.clear_stats()
+
+
+class AsyncReadViewTest(AsyncViewTestCase):
+    """Test class for the responses of the async views"""
+
+    async def assertSameAsSync(self, url, data=None):
+        res = await self.async_client.get(url, data)
+        self.assertTrue(issubclass(res.resolver_match.func.view_class,
+                                   AsyncReadView))
+        sync_res = await sync_to_async(self.sync_client.get)(url, data)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, sync_res.content)
+        self.assertEqual(res['Content-Type'], sync_res['Content-Type'])
+        self.assertEqual(res.get('ETag'), sync_res.get('ETag'))
+        return res
+
+    async def test_same_responses_suc(self):
+        """Test SUCCESS: the async views give the bytes and the headers
+        of the DRF views"""
+        detail_url = reverse('workout:workoutlog-detail',
+                             args=[self.workout_log.id])
+        for url, data in [
+                (WORKOUT_LOG_LIST_URL, None),
+                (WORKOUT_LOG_LIST_URL, {'page_size': 1}),
+                (detail_url, None),
+                (detail_url, {'expand': 'exercise_logs'}),
+                (EXERCISE_LIST_URL, None),
+                (EXERCISE_SEARCH_URL, {'name': 'squ'}),
+                (EXERCISE_PROGRESS_URL, {'exercise_id': self.exercise.id})]:
+            with self.subTest(url=url, data=data):
+                await self.assertSameAsSync(url, data)
+
+    async def test_not_modified_suc(self):
+        """Test SUCCESS: an unchanged list is answered with a 304"""
+        res = await self.assertSameAsSync(WORKOUT_LOG_LIST_URL)
+        res = await self.async_client.get(
+            WORKOUT_LOG_LIST_URL, headers={'If-None-Match': res['ETag']})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+
+    async def test_cached_response_suc(self):
+        """Test SUCCESS: a repeated read is answered from the cache
+        shared with the DRF views, and dropped by a write"""
+        await self.assertSameAsSync(EXERCISE_SEARCH_URL, {'name': 'squ'})
+        self.assertEqual(response_cache.hits, 1)
+        await self.async_client.get(EXERCISE_SEARCH_URL, {'name': 'squ'})
+        self.assertEqual(response_cache.hits, 2)
+
+        await sync_to_async(Exercise.objects.create)(
+            name='Squat Jump', user=self.user)
+        res = await self.async_client.get(EXERCISE_SEARCH_URL,
+                                          {'name': 'squ'})
+        self.assertEqual(response_cache.hits, 2)
+        self.assertEqual(len(res.json()), 2)
+
+    async def test_token_read_once_suc(self):
+        """Test SUCCESS: the user of a token is cached"""
+        await self.async_client.get(WORKOUT_LOG_LIST_URL)
+        self.assertIsNotNone(token_cache.get(self.token.key))
+
+
+class AsyncDelegationTest(AsyncViewTestCase):
+    """Test class for the requests left to the DRF views"""
+
+    async def test_write_delegated_suc(self):
+        """Test SUCCESS: the other methods go to the DRF views"""
+        res = await self.async_client.post(
+            WORKOUT_LOG_LIST_URL, {'name': 'push day'},
+            content_type='application/json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()['name'], 'push day')
+
+    async def test_browsable_api_delegated_suc(self):
+        """Test SUCCESS: other formats are rendered by the DRF views"""
+        res = await self.async_client.get(
+            WORKOUT_LOG_LIST_URL, headers={'Accept': 'text/html'})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('text/html', res['Content-Type'])
+
+    async def test_invalid_token_error(self):
+        """Test ERROR: a request without a valid token gets the 401
+        of the DRF views"""
+        for client in [AsyncClient(), AsyncClient(
+                AUTHORIZATION='Token invalid')]:
+            res = await client.get(WORKOUT_LOG_LIST_URL)
+            self.assertEqual(res.status_code, 401)
+
+    async def test_other_user_workout_error(self):
+        """Test ERROR: a workout log of another user is not found"""
+        other = await sync_to_async(create_user)('other@gmail.com')
+        workout_log = await WorkoutLog.objects.acreate(user=other)
+        res = await self.async_client.get(
+            reverse('workout:workoutlog-detail', args=[workout_log.id]))
+        self.assertEqual(res.status_code, 404)
+
+    async def test_invalid_parameters_error(self):
+        """Test ERROR: invalid parameters get the errors of the DRF
+        views"""
+        for url, data, status_code in [
+                (EXERCISE_PROGRESS_URL, {}, 400),
+                (EXERCISE_PROGRESS_URL, {'exercise_id': 'a'}, 400),
+                (EXERCISE_PROGRESS_URL, {'exercise_id': 0}, 400),
+                (EXERCISE_PROGRESS_URL, {'exercise_id': 999999}, 404),
+                (EXERCISE_SEARCH_URL, {}, 400),
+                (WORKOUT_LOG_LIST_URL, {'cursor': 'invalid'}, 404)]:
+            with self.subTest(url=url, data=data):
+                res = await self.async_client.get(url, data)
+                sync_res = await sync_to_async(self.sync_client.get)(
+                    url, data)
+                self.assertEqual(res.status_code, status_code)
+                self.assertEqual(res.content, sync_res.content)
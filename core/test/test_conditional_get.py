@@ -0,0 +1,188 @@
+"""
+This file is for testing the conditional GET of the list endpoints
+- Classes:
+    - UserDataVersionTest: For the data version of the users
+    - ConditionalListTest: For the ETag and Last-Modified of the lists
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - WORKOUT_LOG_LIST_URL: the url for listing the workout logs
+    - EXERCISE_LIST_URL: the url for listing the exercises
+    - EXERCISE_LOG_LIST_URL: the url for listing the exercise logs
+    - EXERCISE_LOG_BULK_URL: the url for the bulk creation endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from exercise.models import Exercise, ExerciseLog
+from user.models import UserDataVersion
+from workout.models import WorkoutLog
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+EXERCISE_LIST_URL = reverse('exercise:exercise-list')
+EXERCISE_LOG_LIST_URL = reverse('exercise:exerciselog-list')
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class UserDataVersionTest(TestCase):
+    """Test class for the data version of the users"""
+
+    def setUp(self):
+        self.user = create_user()
+
+    def version(self, user=None):
+        return UserDataVersion.objects.get(user=user or self.user).version
+
+    def test_new_user_version_suc(self):
+        """Test SUCCESS: a new user starts at version 0"""
+        self.assertEqual(self.version(), 0)
+
+    def test_writes_bump_version_suc(self):
+        """Test SUCCESS: each write of the data increases the version"""
+        workout_log = WorkoutLog.objects.create(user=self.user)
+        exercise = Exercise.objects.create(name='Squat', user=self.user)
+        log = ExerciseLog.objects.create(
+            user=self.user, exercise=exercise, workout_log=workout_log)
+        self.assertEqual(self.version(), 3)
+        log.number_of_sets = 3
+        log.save()
+        self.assertEqual(self.version(), 4)
+        log.delete()
+        self.assertEqual(self.version(), 5)
+
+    def test_cascade_bumps_once_suc(self):
+        """Test SUCCESS: deleting a workout log with its exercise logs
+        increases the version once"""
+        workout_log = WorkoutLog.objects.create(user=self.user)
+        exercise = Exercise.objects.create(name='Squat', user=self.user)
+        for _ in range(3):
+            ExerciseLog.objects.create(
+                user=self.user, exercise=exercise, workout_log=workout_log)
+        before = self.version()
+        workout_log.delete()
+        self.assertEqual(self.version(), before + 1)
+
+    def test_other_user_version_error(self):
+        """Test ERROR: the writes of a user do not change the version
+        of another user"""
+        other = create_user('other@gmail.com')
+        WorkoutLog.objects.create(user=self.user)
+        self.assertEqual(self.version(other), 0)
+
+    def test_missing_version_created_suc(self):
+        """Test SUCCESS: a user without a version gets one on the
+        first read"""
+        UserDataVersion.objects.filter(user=self.user).delete()
+        self.assertIsNone(UserDataVersion.objects.current(self.user.id))
+        self.assertEqual(
+            UserDataVersion.objects.current(self.user.id)[0], 0)
+
+
+class ConditionalListTest(TestCase):
+    """Test class for the ETag and Last-Modified of the list endpoints"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_log = WorkoutLog.objects.create(user=self.user)
+
+    def test_list_has_etag_suc(self):
+        """Test SUCCESS: the lists have an ETag and a Last-Modified"""
+        for url in [WORKOUT_LOG_LIST_URL, EXERCISE_LIST_URL,
+                    EXERCISE_LOG_LIST_URL]:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            self.assertTrue(res['ETag'].startswith('"1-'))
+            self.assertEqual(res['Last-Modified'], http_date(int(
+                self.user.data_version.updated_at.timestamp())))
+
+    def test_unchanged_list_not_modified_suc(self):
+        """Test SUCCESS: an unchanged list is answered with a 304
+        after reading only the data version"""
+        for url in [WORKOUT_LOG_LIST_URL, EXERCISE_LIST_URL,
+                    EXERCISE_LOG_LIST_URL]:
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(1):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(res.status_code, 304)
+            self.assertEqual(res.content, b'')
+            self.assertEqual(res['ETag'], etag)
+
+    def test_if_modified_since_not_modified_suc(self):
+        """Test SUCCESS: If-Modified-Since after the second of the last
+        write gets a 304"""
+        updated_at = int(self.user.data_version.updated_at.timestamp())
+        res = self.client.get(WORKOUT_LOG_LIST_URL,
+                              HTTP_IF_MODIFIED_SINCE=http_date(
+                                  updated_at + 1))
+        self.assertEqual(res.status_code, 304)
+
+    def test_if_modified_since_same_second_error(self):
+        """Test ERROR: If-Modified-Since of the second of the last write
+        gets the list, another write in that second has the same
+        Last-Modified"""
+        last_modified = self.client.get(WORKOUT_LOG_LIST_URL)['Last-Modified']
+        updated_at = UserDataVersion.objects.get(user=self.user).updated_at
+        with mock.patch('django.utils.timezone.now',
+                        return_value=updated_at):
+            WorkoutLog.objects.create(user=self.user)
+        res = self.client.get(WORKOUT_LOG_LIST_URL,
+                              HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Last-Modified'], last_modified)
+
+    def test_changed_list_modified_error(self):
+        """Test ERROR: a write of the user gets the full list again"""
+        etag = self.client.get(EXERCISE_LIST_URL)['ETag']
+        self.client.post(EXERCISE_LIST_URL, {'name': 'Squat'})
+        res = self.client.get(EXERCISE_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_bulk_create_modified_error(self):
+        """Test ERROR: the bulk creation of logs changes the ETag"""
+        etag = self.client.get(EXERCISE_LOG_LIST_URL)['ETag']
+        self.client.post(EXERCISE_LOG_BULK_URL, {'logs': [
+            {'workout_log': self.workout_log.id, 'exercise_name': 'Squat',
+             'number_of_sets': 3}]}, format='json')
+        res = self.client.get(EXERCISE_LOG_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_other_page_modified_error(self):
+        """Test ERROR: each page and format has its own ETag"""
+        etag = self.client.get(WORKOUT_LOG_LIST_URL)['ETag']
+        res = self.client.get(WORKOUT_LOG_LIST_URL, {'page_size': 1},
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        res = self.client.get(WORKOUT_LOG_LIST_URL, {'format': 'api'},
+                              HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+
+    def test_other_user_etag_error(self):
+        """Test ERROR: the ETag of a user is not valid for another one"""
+        etag = self.client.get(WORKOUT_LOG_LIST_URL)['ETag']
+        other = create_user('other@gmail.com')
+        WorkoutLog.objects.create(user=other)
+        self.client.force_authenticate(other)
+        res = self.client.get(WORKOUT_LOG_LIST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+
+    def test_unauthenticated_list_error(self):
+        """Test ERROR: the version is not read for anonymous requests"""
+        res = APIClient().get(WORKOUT_LOG_LIST_URL, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(res.status_code, 401)
@@ -0,0 +1,123 @@
+"""
+This file is for testing the lifecycle of the database connections
+- Classes:
+    - ConnectionLifecycleTest: For counting the opened, reused and
+    closed connections and the failed health checks
+    - DatabaseConnectionStatsTest: For the endpoint of the counters
+- Helper functions:
+    - create_user: creates a user and returns it
+    - run_query: runs a query on the default database
+- static variables:
+    - STATS_URL: the url of the counters of the connections
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from time import monotonic
+from unittest.mock import patch
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.metrics import connection_metrics_store
+STATS_URL = reverse('api-stats-db-connections')
+
+
+def create_user(email='test@gmail.com', password='test1234', **kwargs):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password, **kwargs)
+
+
+def run_query():
+    """Helper method to run a query on the default database"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+class ConnectionLifecycleTest(TransactionTestCase):
+    """Test class for counting the lifecycle of the connections"""
+
+    def setUp(self):
+        connection.close()
+        connection_metrics_store.clear()
+
+    def stats(self):
+        return connection_metrics_store.as_dict()['default']
+
+    def test_persistent_settings_suc(self):
+        """Test SUCCESS: the connections are kept with health checks"""
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'],
+                         settings.DB_CONN_MAX_AGE)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_opened_and_reused_suc(self):
+        """Test SUCCESS: a connection kept at the end of a request is
+        reused once by the next one"""
+        run_query()
+        self.assertEqual(self.stats()['opened'], 1)
+        self.assertEqual(self.stats()['connect_ms']['count'], 1)
+
+        # the end of a request and the start of the next one
+        connection.close_if_unusable_or_obsolete()
+        connection.close_if_unusable_or_obsolete()
+        run_query()
+        run_query()
+        self.assertEqual(self.stats()['opened'], 1)
+        self.assertEqual(self.stats()['reused'], 1)
+
+        connection.close()
+        self.assertEqual(self.stats()['closed'], 1)
+
+    def test_obsolete_connection_suc(self):
+        """Test SUCCESS: a connection older than CONN_MAX_AGE is closed
+        and the next request opens a new one"""
+        run_query()
+        connection.close_at = monotonic() - 1
+        connection.close_if_unusable_or_obsolete()
+        run_query()
+        self.assertEqual(self.stats()['closed'], 1)
+        self.assertEqual(self.stats()['opened'], 2)
+        self.assertEqual(self.stats()['reused'], 0)
+
+    def test_failed_health_check_error(self):
+        """Test ERROR: a broken kept connection is replaced"""
+        run_query()
+        connection.close_if_unusable_or_obsolete()
+        with patch.object(connection, 'is_usable', return_value=False):
+            run_query()
+        self.assertEqual(self.stats()['health_check_failures'], 1)
+        self.assertEqual(self.stats()['opened'], 2)
+
+
+class DatabaseConnectionStatsTest(TestCase):
+    """Test class for the endpoint of the counters"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            create_user('admin@gmail.com', is_staff=True))
+
+    def test_stats_suc(self):
+        """Test SUCCESS: an admin sees the counters and resets them"""
+        connection_metrics_store.record('default', 'reused')
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['default']['reused'], 1)
+        self.assertEqual(res.data['default']['conn_max_age'],
+                         settings.DB_CONN_MAX_AGE)
+        self.assertNotIn('pool', res.data['default'])
+        res = self.client.delete(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(connection_metrics_store.as_dict(), {})
+
+    def test_stats_by_non_admin_error(self):
+        """Test ERROR: only admins can see the counters"""
+        client = APIClient()
+        client.force_authenticate(create_user())
+        res = client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
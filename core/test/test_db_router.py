@@ -0,0 +1,240 @@
+"""
+This file is for testing the replica router
+- Classes:
+    - ReplicaRouterTest: For the database picked for each query
+    - PrimaryPinningTest: For pinning the requests of a token to the
+    primary after its writes
+    - ReplicaRoutingTest: For the endpoints reading from a replica, only
+    run with two databases (core/settings_replica_test.py)
+- Helper functions:
+    - create_user: creates a user and returns it
+    - request_with_token: a request with a token header
+- static variables:
+    - REPLICAS: the replicas set while testing the router
+    - HAS_REPLICA: whether a replica database is configured
+    - WORKOUT_LOG_LIST_URL: the url for listing the workout logs
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings
+)
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.routers import (
+    ReplicaRouter,
+    RequestRouting,
+    current_routing,
+    end_request,
+    read_from_primary,
+    start_request
+)
+from user.models import UserDataVersion
+from workout.models import WorkoutLog
+REPLICAS = ['replica_1', 'replica_2']
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+HAS_REPLICA = 'replica_1' in settings.DATABASES and not settings.DATABASES[
+    'replica_1'].get('TEST', {}).get('MIRROR')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def request_with_token(key='key'):
+    """Helper method to build a request with a token header"""
+    return RequestFactory().get('/', HTTP_AUTHORIZATION=f"Token {key}")
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS,
+                   DB_REPLICA_SELECTION='round_robin')
+class ReplicaRouterTest(SimpleTestCase):
+    """Test class for the database picked for each query"""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.token = current_routing.set(RequestRouting())
+
+    def tearDown(self):
+        current_routing.reset(self.token)
+
+    def test_reads_on_replicas_suc(self):
+        """Test SUCCESS: the reads of a request take turns on the
+        replicas"""
+        picked = {self.router.db_for_read(WorkoutLog) for _ in range(4)}
+        self.assertEqual(picked, set(REPLICAS))
+
+    def test_random_selection_suc(self):
+        """Test SUCCESS: a random replica is picked"""
+        with self.settings(DB_REPLICA_SELECTION='random'):
+            self.assertIn(self.router.db_for_read(WorkoutLog), REPLICAS)
+
+    def test_write_pins_primary_suc(self):
+        """Test SUCCESS: the writes and the reads after them go to the
+        primary"""
+        self.assertEqual(self.router.db_for_write(WorkoutLog),
+                         DEFAULT_DB_ALIAS)
+        self.assertEqual(self.router.db_for_read(WorkoutLog),
+                         DEFAULT_DB_ALIAS)
+
+    def test_primary_reads_suc(self):
+        """Test SUCCESS: the reads go to the primary outside requests,
+        in transactions, in read_from_primary and without replicas"""
+        with read_from_primary():
+            self.assertEqual(self.router.db_for_read(WorkoutLog),
+                             DEFAULT_DB_ALIAS)
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.router.db_for_read(WorkoutLog),
+                             DEFAULT_DB_ALIAS)
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.in_atomic_block = True
+        try:
+            self.assertEqual(self.router.db_for_read(WorkoutLog),
+                             DEFAULT_DB_ALIAS)
+        finally:
+            connection.in_atomic_block = False
+        current_routing.set(None)
+        self.assertEqual(self.router.db_for_read(WorkoutLog),
+                         DEFAULT_DB_ALIAS)
+
+    def test_allow_relation_suc(self):
+        """Test SUCCESS: rows of the primary and the replicas can be
+        related"""
+        workout_log, replica_log = WorkoutLog(), WorkoutLog()
+        workout_log._state.db = DEFAULT_DB_ALIAS
+        replica_log._state.db = 'replica_2'
+        self.assertTrue(self.router.allow_relation(workout_log,
+                                                   replica_log))
+        replica_log._state.db = 'other'
+        self.assertIsNone(self.router.allow_relation(workout_log,
+                                                     replica_log))
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS,
+                   DB_READ_AFTER_WRITE_SECONDS=5)
+class PrimaryPinningTest(SimpleTestCase):
+    """Test class for pinning the requests of a token to the primary"""
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def serve(self, request, write=False):
+        """Serve a request, returns whether it started pinned"""
+        token = start_request(request)
+        pinned = current_routing.get().pinned
+        if write:
+            ReplicaRouter().db_for_write(WorkoutLog)
+        end_request(token)
+        return pinned
+
+    def test_pinned_after_write_suc(self):
+        """Test SUCCESS: the next requests of a token that wrote read
+        from the primary"""
+        self.assertFalse(self.serve(request_with_token()))
+        self.assertFalse(self.serve(request_with_token(), write=True))
+        self.assertTrue(self.serve(request_with_token()))
+        self.assertIsNone(current_routing.get())
+
+    def test_write_request_pinned_suc(self):
+        """Test SUCCESS: the requests other than reads are pinned"""
+        self.assertTrue(self.serve(RequestFactory().patch('/')))
+
+    def test_other_token_error(self):
+        """Test ERROR: the requests of other tokens are not pinned"""
+        self.serve(request_with_token(), write=True)
+        self.assertFalse(self.serve(request_with_token('other')))
+        self.assertFalse(self.serve(RequestFactory().get('/')))
+
+    def test_disabled_error(self):
+        """Test ERROR: nothing is pinned when the window is 0"""
+        with self.settings(DB_READ_AFTER_WRITE_SECONDS=0):
+            self.serve(request_with_token(), write=True)
+            self.assertFalse(self.serve(request_with_token()))
+
+    def test_shared_cache_suc(self):
+        """Test SUCCESS: the pins of a shared cache are seen by the other
+        processes"""
+        with TemporaryDirectory() as location, self.settings(
+                CACHES={**settings.CACHES, 'pins': {
+                    'BACKEND': 'django.core.cache.backends.filebased.'
+                               'FileBasedCache',
+                    'LOCATION': location}},
+                DB_READ_AFTER_WRITE_CACHE_ALIAS='pins'):
+            self.serve(request_with_token(), write=True)
+            # another process builds its own cache
+            del caches['pins']
+            self.assertTrue(self.serve(request_with_token()))
+
+
+@skipUnless(HAS_REPLICA,
+            "needs a replica database, see core/settings_replica_test.py")
+@override_settings(DB_REPLICA_SELECTION='random', RESPONSE_CACHE_TTL=0,
+                   DB_READ_AFTER_WRITE_SECONDS=5)
+class ReplicaRoutingTest(TransactionTestCase):
+    """Test class for the endpoints reading from a replica"""
+    databases = {'default', 'replica_1'} if HAS_REPLICA else {'default'}
+
+    def setUp(self):
+        caches['default'].clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        # the replica has the user but not the token yet
+        get_user_model().objects.using('replica_1').bulk_create(
+            [self.user])
+        UserDataVersion.objects.using('replica_1').bulk_create(
+            [UserDataVersion.objects.get(user=self.user)])
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def names(self, res):
+        return {row['name'] for row in res.data['results']}
+
+    def test_list_from_replica_suc(self):
+        """Test SUCCESS: a list is read from the replica, with a token
+        only on the primary"""
+        WorkoutLog.objects.create(user=self.user, name='primary')
+        WorkoutLog.objects.using('replica_1').create(
+            user=self.user, name='replica')
+        caches['default'].clear()
+        res = self.client.get(WORKOUT_LOG_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.names(res), {'replica'})
+
+    def test_read_after_write_suc(self):
+        """Test SUCCESS: after a write, the requests of the token read
+        what was written from the primary"""
+        res = self.client.post(WORKOUT_LOG_LIST_URL, {'name': 'leg day'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        res = self.client.get(WORKOUT_LOG_LIST_URL)
+        self.assertEqual(self.names(res), {'leg day'})
+
+        caches['default'].clear()
+        res = self.client.get(WORKOUT_LOG_LIST_URL)
+        self.assertEqual(self.names(res), set())
+
+    def test_update_after_read_suc(self):
+        """Test SUCCESS: a write request reads the row it updates from
+        the primary"""
+        workout_log = WorkoutLog.objects.create(user=self.user, name='a')
+        res = self.client.patch(
+            reverse('workout:workoutlog-detail', args=[workout_log.id]),
+            {'name': 'b'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        workout_log.refresh_from_db()
+        self.assertEqual(workout_log.name, 'b')
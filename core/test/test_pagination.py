@@ -0,0 +1,151 @@
+"""
+This file is for testing the keyset pagination of the list endpoints
+- Classes:
+    - KeysetPaginationTest: For paginating the list endpoints
+- Helper functions:
+    - create_user: creates a user and returns it
+    - create_workout_log: create a workout_log with specific user
+    - get_cursor_path: the path of a link with its query parameters
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from urllib.parse import urlsplit
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from exercise.models import Exercise
+from workout.models import WorkoutLog
+WORKOUT_LOG_LIST_CREATE_URL = reverse('workout:workoutlog-list')
+EXERCISE_LIST_CREATE_URL = reverse('exercise:exercise-list')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_workout_log(user=None, name='default_name'):
+    """Helper method to create a workoutlog"""
+    return WorkoutLog.objects.create(user=user, name=name)
+
+
+def get_cursor_path(link):
+    """Helper method to get the path and query of a link"""
+    parts = urlsplit(link)
+    return f"{parts.path}?{parts.query}"
+
+
+class KeysetPaginationTest(TestCase):
+    """Test class for the keyset pagination of the list endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.workouts = [create_workout_log(user=self.user, name=f"w{i}")
+                         for i in range(7)]
+        # newest first
+        self.expected_ids = [workout.id for workout in self.workouts][::-1]
+
+    def walk_forward(self, page_size):
+        """Helper method to walk all the pages with the next links"""
+        ids = list()
+        res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL,
+                              {'page_size': page_size})
+        pages = [res]
+        ids += [workout['id'] for workout in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(get_cursor_path(res.data['next']))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res)
+            ids += [workout['id'] for workout in res.data['results']]
+        return ids, pages
+
+    def test_list_first_page_suc(self):
+        """
+        Test SUCCESS: the first page has the newest items and no previous
+        """
+        res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL, {'page_size': 3})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [workout['id'] for workout in res.data['results']]
+        self.assertEqual(ids, self.expected_ids[:3])
+        self.assertIsNone(res.data['previous'])
+        self.assertIsNotNone(res.data['next'])
+
+    def test_walk_all_pages_forward_suc(self):
+        """
+        Test SUCCESS: walking the next links returns every item once
+        """
+        ids, pages = self.walk_forward(page_size=3)
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[-1].data['next'])
+
+    def test_walk_pages_backward_suc(self):
+        """
+        Test SUCCESS: the previous links return the same pages
+        """
+        _, pages = self.walk_forward(page_size=3)
+        res = pages[-1]
+        for page in reversed(pages[:-1]):
+            res = self.client.get(get_cursor_path(res.data['previous']))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.data['results'], page.data['results'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_same_created_at_suc(self):
+        """
+        Test SUCCESS: items with the same created_at are ordered by id
+        and none of them is skipped or repeated
+        """
+        WorkoutLog.objects.filter(user=self.user).update(
+            created_at=timezone.now())
+        ids, _ = self.walk_forward(page_size=2)
+        self.assertEqual(ids, sorted(self.expected_ids, reverse=True))
+
+    def test_new_items_do_not_shift_pages_suc(self):
+        """
+        Test SUCCESS: creating items while paginating does not
+        repeat items on the next pages
+        """
+        res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL, {'page_size': 3})
+        create_workout_log(user=self.user, name='new')
+        res = self.client.get(get_cursor_path(res.data['next']))
+        ids = [workout['id'] for workout in res.data['results']]
+        self.assertEqual(ids, self.expected_ids[3:6])
+
+    def test_only_user_items_suc(self):
+        """
+        Test SUCCESS: pages only have the items of the user
+        """
+        other_user = create_user(email='tmp@gmail.com')
+        other_workout = create_workout_log(user=other_user)
+        ids, _ = self.walk_forward(page_size=2)
+        self.assertNotIn(other_workout.id, ids)
+
+    @override_settings(API_MAX_PAGE_SIZE=4)
+    def test_page_size_limited_suc(self):
+        """
+        Test SUCCESS: the page size can not be larger than the limit
+        """
+        Exercise.objects.bulk_create(
+            [Exercise(name=f"exer{i}", user=self.user) for i in range(6)])
+        res = self.client.get(EXERCISE_LIST_CREATE_URL, {'page_size': 1000})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 4)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_invalid_cursor_error(self):
+        """
+        Test ERROR: sending a cursor that was not given by the api
+        """
+        for cursor in ['abc', 'W10=', '!!!']:
+            res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL,
+                                  {'cursor': cursor})
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
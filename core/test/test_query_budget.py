@@ -0,0 +1,122 @@
+"""
+This file is for testing that the list endpoints run a fixed
+number of queries whatever the number of rows they return
+- Classes:
+    - ListQueryBudgetTest: For the list endpoints of each application
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - WORKOUT_LOG_LIST_URL: the url for listing the workout logs
+    - EXERCISE_LIST_URL: the url for listing the exercises
+    - EXERCISE_LOG_LIST_URL: the url for listing the exercise logs
+    - EXERCISE_SEARCH_URL: the url for searching the exercises
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.test.query_budget import QueryBudgetMixin
+from exercise.models import Exercise, ExerciseLog
+from exercise.search import index_exercises
+from workout.models import WorkoutLog
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+EXERCISE_LIST_URL = reverse('exercise:exercise-list')
+EXERCISE_LOG_LIST_URL = reverse('exercise:exerciselog-list')
+EXERCISE_SEARCH_URL = reverse('exercise:exercise-search')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+# the rows are added with bulk_create, which does not drop the cached
+# responses, and the queries of the views are the ones measured
+@override_settings(RESPONSE_CACHE_TTL=0)
+class ListQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Test class for the number of queries of the list endpoints"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_log = WorkoutLog.objects.create(user=self.user)
+        self.created = 0
+
+    def add_exercises(self, count):
+        """Create `count` exercises for the user, indexed for the
+        search like the bulk created exercises of the views"""
+        index_exercises(Exercise.objects.bulk_create(
+            [Exercise(name=f"exer {self.created + i}", user=self.user)
+             for i in range(count)]))
+        self.created += count
+
+    def add_exercise_logs(self, count):
+        """Create `count` logs, each one with its own exercise"""
+        exercises = Exercise.objects.bulk_create(
+            [Exercise(name=f"exer {self.created + i}", user=self.user)
+             for i in range(count)])
+        ExerciseLog.objects.bulk_create(
+            [ExerciseLog(exercise=exercise, workout_log=self.workout_log,
+                         user=self.user) for exercise in exercises])
+        self.created += count
+
+    def add_workout_logs(self, count):
+        """Create `count` workout logs for the user"""
+        WorkoutLog.objects.bulk_create(
+            [WorkoutLog(user=self.user, name=f"workout {i}")
+             for i in range(count)])
+
+    def test_workout_log_list_suc(self):
+        """Test SUCCESS: listing workout logs"""
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(WORKOUT_LOG_LIST_URL),
+            self.add_workout_logs)
+
+    def test_exercise_list_suc(self):
+        """Test SUCCESS: listing exercises"""
+        self.assertQueriesDoNotGrow(
+            lambda: self.client.get(EXERCISE_LIST_URL), self.add_exercises)
+
+    def test_exercise_log_list_suc(self):
+        """Test SUCCESS: listing exercise logs with their exercises"""
+        queries = self.assertQueriesDoNotGrow(
+            lambda: self.client.get(EXERCISE_LOG_LIST_URL),
+            self.add_exercise_logs)
+        # the data version of the user and the page of logs
+        self.assertEqual(queries, 2)
+
+    def test_exercise_log_retrieve_suc(self):
+        """Test SUCCESS: retrieving an exercise log with its exercise"""
+        self.add_exercise_logs(1)
+        log = ExerciseLog.objects.get()
+        with self.assertNumQueries(1):
+            self.client.get(
+                reverse('exercise:exerciselog-detail', args=[log.id]))
+
+    def test_exercise_search_suc(self):
+        """Test SUCCESS: searching exercises, all of them are found"""
+        def search():
+            res = self.client.get(EXERCISE_SEARCH_URL, {'name': 'exer'})
+            self.assertEqual(len(res.data), self.created)
+            return res
+
+        self.assertQueriesDoNotGrow(search, self.add_exercises)
+        self.assertEqual(self.created, 20)
+
+    def test_query_budget_detects_n_plus_one_error(self):
+        """Test ERROR: the helper fails when the queries grow with
+        the rows, as listing logs without select_related"""
+        def list_logs_one_by_one():
+            for log in ExerciseLog.objects.filter(user=self.user):
+                log.exercise.name
+            return self.client.get(EXERCISE_LOG_LIST_URL)
+
+        with self.assertRaises(AssertionError):
+            self.assertQueriesDoNotGrow(list_logs_one_by_one,
+                                        self.add_exercise_logs)
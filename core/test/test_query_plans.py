@@ -0,0 +1,112 @@
+"""
+This file is for testing that the hot queries are answered by
+index scans, the queries are captured while the code runs them
+- Classes:
+    - HotQueryPlanTest: For the plans of the progress, the lists and
+    the case-insensitive exercise lookups
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - WORKOUT_LOG_LIST_URL: the url for listing the workout logs
+    - EXERCISE_LIST_URL: the url for listing the exercises
+    - EXERCISE_LOG_LIST_URL: the url for listing the exercise logs
+    - EXERCISE_LOG_BULK_URL: the url for the bulk creation endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from unittest import skipUnless
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.test.query_plans import QueryPlanMixin, index_name
+from exercise.models import Exercise, ExerciseLog
+from exercise.progress import rebuild_progress
+from workout.models import WorkoutLog
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+EXERCISE_LIST_URL = reverse('exercise:exercise-list')
+EXERCISE_LOG_LIST_URL = reverse('exercise:exerciselog-list')
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+@skipUnless(connection.vendor == 'postgresql', "reads PostgreSQL plans")
+@override_settings(RESPONSE_CACHE_TTL=0)
+class HotQueryPlanTest(QueryPlanMixin, TestCase):
+    """Test class for the plans of the hot queries"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_log = WorkoutLog.objects.create(user=self.user)
+        self.exercise = Exercise.objects.create(name='Squat', user=self.user)
+        # enough rows for the planner to prefer the index matching the
+        # order of each query
+        exercises = Exercise.objects.bulk_create(
+            [Exercise(name=f"exercise {i}", user=self.user)
+             for i in range(200)])
+        WorkoutLog.objects.bulk_create(
+            [WorkoutLog(user=self.user) for _ in range(200)])
+        ExerciseLog.objects.bulk_create(
+            [ExerciseLog(user=self.user, workout_log=self.workout_log,
+                         exercise=exercises[i % 20], number_of_sets=3)
+             for i in range(400)])
+        with connection.cursor() as cursor:
+            for model in [Exercise, ExerciseLog, WorkoutLog]:
+                cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+
+    def test_progress_logs_suc(self):
+        """Test SUCCESS: the logs of an exercise are read in order from
+        the (user, exercise, created_at, id) index"""
+        with CaptureQueriesContext(connection) as context:
+            rebuild_progress(self.user.id, self.exercise.id)
+        plan = self.assertUsesIndex(
+            self.captured_query(context, ExerciseLog._meta.db_table),
+            'exerciselog_user_exercise_idx')
+        self.assertNotIn('Sort', plan)
+
+    def test_lists_suc(self):
+        """Test SUCCESS: the pages of the lists are read in order from
+        the (user, created_at, id) indexes"""
+        for url, model in [(WORKOUT_LOG_LIST_URL, WorkoutLog),
+                           (EXERCISE_LIST_URL, Exercise),
+                           (EXERCISE_LOG_LIST_URL, ExerciseLog)]:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(url)
+                plan = self.assertUsesIndex(
+                    self.captured_query(context, model._meta.db_table),
+                    index_name(model, ['user', 'created_at', 'id']))
+                self.assertNotIn('Sort', plan)
+
+    def test_case_insensitive_name_suc(self):
+        """Test SUCCESS: the exercises are found by name with the
+        (user, LOWER(name)) index"""
+        self.assertUsesIndex(
+            Exercise.objects.filter_CI('squat', user=self.user),
+            'unique_user_exercise_lower_name')
+        with CaptureQueriesContext(connection) as context:
+            self.client.post(EXERCISE_LOG_BULK_URL, {'logs': [
+                {'workout_log': self.workout_log.id,
+                 'exercise_name': name} for name in ['SQUAT', 'Lunge']]},
+                format='json')
+        self.assertUsesIndex(
+            self.captured_query(context, Exercise._meta.db_table, 'LOWER'),
+            'unique_user_exercise_lower_name')
+
+    def test_case_insensitive_lookup_suc(self):
+        """Test SUCCESS: the lookups still ignore the case"""
+        self.assertEqual(Exercise.objects.get_CI('sQuAt', user=self.user),
+                         self.exercise)
+        self.assertFalse(Exercise.objects.filter_CI(
+            'squat', user=create_user('other@gmail.com')).exists())
@@ -0,0 +1,165 @@
+"""
+This file is for testing the orjson renderer and parser
+- Classes:
+    - ORJSONRendererTest: For rendering the same bytes as DRF
+    - ORJSONParserTest: For parsing the same data and errors as DRF
+    - ORJSONEndpointTest: For the responses of the endpoints
+- Helper functions:
+    - create_user: creates a user and returns it
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+import datetime
+from decimal import Decimal
+from io import BytesIO
+from uuid import UUID
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from workout.models import WorkoutLog
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class ORJSONRendererTest(SimpleTestCase):
+    """Test class for rendering the same bytes as DRF"""
+
+    def assertSameAsDRF(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type))
+
+    def test_basic_types_suc(self):
+        """Test SUCCESS: dicts, lists, strings and numbers"""
+        self.assertSameAsDRF({'id': 1, 'name': 'Bench Press', 'ok': True,
+                              'none': None, 'list': [1, 2.5, 'a'],
+                              'nested': {'empty': {}, 'rows': []}})
+        self.assertSameAsDRF([])
+        self.assertSameAsDRF('text')
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_date_and_time_types_suc(self):
+        """Test SUCCESS: datetimes, dates, times and timedeltas"""
+        utc = datetime.datetime(2024, 11, 17, 10, 0, 0, 123456,
+                                tzinfo=datetime.timezone.utc)
+        self.assertSameAsDRF({
+            'utc': utc,
+            'offset': utc.astimezone(
+                datetime.timezone(datetime.timedelta(hours=3))),
+            'naive': datetime.datetime(2024, 11, 17, 10, 0),
+            'now': timezone.now(),
+            'date': datetime.date(2024, 11, 17),
+            'time': datetime.time(10, 30, 5),
+            'duration': datetime.timedelta(hours=1, minutes=5, seconds=3),
+        })
+
+    def test_other_python_types_suc(self):
+        """Test SUCCESS: Decimals, tuples, UUIDs, lazy strings,
+        error details and the containers of the serializers"""
+        self.assertSameAsDRF({
+            'weight': Decimal('70.50'),
+            'progress': [(60, '2024-11-17', 1), ((3, 8, 60), '24-11-17', 2)],
+            'uuid': UUID('12345678123456781234567812345678'),
+            'lazy': gettext_lazy('This field is required.'),
+            'error': [ErrorDetail('invalid', code='invalid')],
+            'returned': ReturnDict({'a': ReturnList([1], serializer=None)},
+                                   serializer=None),
+            'set': {1},
+        })
+
+    def test_non_string_keys_suc(self):
+        """Test SUCCESS: integer keys, as the errors of the bulk logs"""
+        self.assertSameAsDRF({'logs': {0: {'name': ['required']},
+                                       12: {'name': ['required']}}})
+
+    def test_unicode_and_separators_suc(self):
+        """Test SUCCESS: unicode is not escaped except \\u2028 and
+        \\u2029"""
+        self.assertSameAsDRF({'name': 'تمرين 💪', 'quote': '"\\/\n\t',
+                              'separators': 'a\u2028b\u2029c'})
+
+    def test_fallback_to_drf_suc(self):
+        """Test SUCCESS: what orjson does not handle is rendered by DRF"""
+        self.assertSameAsDRF({'big': 2 ** 70})
+        self.assertSameAsDRF({'id': 1}, 'application/json; indent=4')
+
+    def test_timezone_aware_time_error(self):
+        """Test ERROR: aware times can not be rendered, like DRF"""
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render(
+                {'time': datetime.time(10, tzinfo=datetime.timezone.utc)})
+
+
+class ORJSONParserTest(SimpleTestCase):
+    """Test class for parsing the same data and errors as DRF"""
+
+    def parse(self, parser, body):
+        return parser.parse(BytesIO(body), parser_context={})
+
+    def test_parse_suc(self):
+        """Test SUCCESS: the data is the same as the one of DRF"""
+        for body in [b'{"logs": [{"name": "\xd8\xaa", "sets": 3}]}',
+                     b'[1, 2.5, null, true]', b'"\\ud800"',
+                     b'{"big": 12345678901234567890123}']:
+            self.assertEqual(self.parse(ORJSONParser(), body),
+                             self.parse(JSONParser(), body))
+
+    def test_parse_invalid_error(self):
+        """Test ERROR: invalid bodies raise the same error as DRF"""
+        for body in [b'{"a": }', b'', b'{"a": NaN}']:
+            with self.assertRaises(ParseError) as drf_error:
+                self.parse(JSONParser(), body)
+            with self.assertRaises(ParseError) as error:
+                self.parse(ORJSONParser(), body)
+            self.assertEqual(str(error.exception),
+                             str(drf_error.exception))
+
+
+class ORJSONEndpointTest(TestCase):
+    """Test class for the responses of the endpoints"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_workout_log_response_suc(self):
+        """Test SUCCESS: a response has the bytes DRF would render"""
+        workout_log = WorkoutLog.objects.create(user=self.user)
+        workout_log.started_at = timezone.now()
+        workout_log.finished_at = workout_log.started_at + \
+            datetime.timedelta(minutes=45)
+        workout_log.save()
+        res = self.client.get(
+            reverse('workout:workoutlog-detail', args=[workout_log.id]))
+        self.assertIsInstance(res.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(res.content, JSONRenderer().render(res.data))
+
+    def test_json_request_parsed_suc(self):
+        """Test SUCCESS: a JSON request is parsed with orjson"""
+        res = self.client.post(reverse('workout:workoutlog-list'),
+                               b'{"name": "leg day"}',
+                               content_type='application/json')
+        self.assertEqual(res.data['name'], 'leg day')
+
+    def test_invalid_json_request_error(self):
+        """Test ERROR: an invalid JSON request gets a 400 response"""
+        res = self.client.post(reverse('workout:workoutlog-list'),
+                               b'{"name": ', content_type='application/json')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('JSON parse error', res.data['detail'])
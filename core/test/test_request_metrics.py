@@ -0,0 +1,161 @@
+"""
+This file is for testing the metrics of the requests
+- Classes:
+    - HistogramTest: For the histograms of the metrics
+    - RequestMetricsMiddlewareTest: For measuring the requests and
+    the endpoint showing the metrics
+    - RequestMetricsASGITest: For measuring the requests served by the
+    ASGI application of core/asgi.py
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - API_STATS_URL: the url for the endpoint showing the metrics
+    - EXERCISE_LOG_LIST_URL: the url for listing the exercise logs
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import (
+    AsyncClient,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase
+)
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.metrics import Histogram, request_metrics_store
+from core.middleware import RequestMetricsMiddleware
+from core.test.asgi import asgi_get
+API_STATS_URL = reverse('api-stats')
+EXERCISE_LOG_LIST_URL = reverse('exercise:exerciselog-list')
+EXERCISE_LOG_ROUTE = 'GET exercise:exerciselog-list'
+
+
+def create_user(email='test@gmail.com', password='test1234', **kwargs):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password, **kwargs)
+
+
+class HistogramTest(SimpleTestCase):
+    """Test class for the histograms of the metrics"""
+
+    def test_values_counted_in_buckets_suc(self):
+        """Test SUCCESS: each value is counted in the first bucket
+        holding it"""
+        histogram = Histogram((1, 10))
+        for value in [0.5, 1, 3, 50]:
+            histogram.add(value)
+        self.assertEqual(histogram.as_dict(), {
+            'count': 4, 'mean': 13.625,
+            'buckets': {'1': 2, '10': 1, '+inf': 1}})
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsMiddlewareTest(TestCase):
+    """Test class for measuring the requests"""
+
+    def setUp(self):
+        request_metrics_store.clear()
+        self.user = create_user()
+        self.admin = create_user(email='admin@gmail.com', is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header_suc(self):
+        """Test SUCCESS: a measured request has a Server-Timing header"""
+        res = self.client.get(EXERCISE_LOG_LIST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertRegex(res['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="2 queries", '
+                         r'serializer;dur=[\d.]+, view;dur=[\d.]+$')
+
+    def test_stats_per_route_suc(self):
+        """Test SUCCESS: the metrics are aggregated by route"""
+        self.client.get(EXERCISE_LOG_LIST_URL)
+        self.client.get(EXERCISE_LOG_LIST_URL)
+        self.client.force_authenticate(self.admin)
+        res = self.client.get(API_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stats = res.data[EXERCISE_LOG_ROUTE]
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['query_count']['buckets']['2'], 2)
+        self.assertEqual(stats['view_ms']['count'], 2)
+
+    def test_stats_cleared_suc(self):
+        """Test SUCCESS: an admin can clear the metrics"""
+        self.client.get(EXERCISE_LOG_LIST_URL)
+        self.client.force_authenticate(self.admin)
+        res = self.client.delete(API_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertNotIn(EXERCISE_LOG_ROUTE, request_metrics_store.as_dict())
+
+    def test_stats_by_non_admin_error(self):
+        """Test ERROR: only admins can see the metrics"""
+        res = self.client.get(API_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        res = APIClient().get(API_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_not_sampled_suc(self):
+        """Test SUCCESS: requests out of the sample are not measured"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get(EXERCISE_LOG_LIST_URL)
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(request_metrics_store.as_dict(), {})
+
+    @override_settings(REQUEST_METRICS_ENABLED=False)
+    def test_disabled_suc(self):
+        """Test SUCCESS: nothing is measured when disabled"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.get(EXERCISE_LOG_LIST_URL)
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(request_metrics_store.as_dict(), {})
+
+    async def test_server_timing_under_asgi_suc(self):
+        """Test SUCCESS: the queries are counted under ASGI"""
+        token = await sync_to_async(Token.objects.create)(user=self.user)
+        res = await AsyncClient().get(
+            EXERCISE_LOG_LIST_URL, AUTHORIZATION=f"Token {token.key}")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="3 queries"', res['Server-Timing'])
+
+
+@override_settings(REQUEST_METRICS_ENABLED=True)
+class RequestMetricsASGITest(TransactionTestCase):
+    """Test class for measuring the requests under core/asgi.py"""
+
+    def setUp(self):
+        request_metrics_store.clear()
+        self.token = Token.objects.create(user=create_user())
+
+    def test_async_middleware_suc(self):
+        """Test SUCCESS: the middleware is async under ASGI"""
+
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(
+            RequestMetricsMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(
+            RequestMetricsMiddleware(lambda request: None)))
+
+    async def test_server_timing_suc(self):
+        """Test SUCCESS: the queries run in the threads of the request
+        are counted"""
+        res = await asgi_get(EXERCISE_LOG_LIST_URL, self.token.key)
+        self.assertEqual(res.status, status.HTTP_200_OK)
+        self.assertRegex(res.headers['server-timing'],
+                         r'^db;dur=[\d.]+;desc="3 queries", '
+                         r'serializer;dur=[\d.]+, view;dur=[\d.]+$')
+        stats = request_metrics_store.as_dict()[EXERCISE_LOG_ROUTE]
+        self.assertEqual(stats['query_count']['buckets']['5'], 1)
@@ -0,0 +1,189 @@
+"""
+This file is for testing the response cache of the read endpoints
+- Classes:
+    - ResponseCacheTest: For caching and dropping the responses
+    - ResponseCacheStatsTest: For the endpoint of the counters
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - WORKOUT_LOG_LIST_URL: the url for listing the workout logs
+    - EXERCISE_LIST_URL: the url for listing the exercises
+    - EXERCISE_LOG_LIST_URL: the url for listing the exercise logs
+    - EXERCISE_LOG_BULK_URL: the url for the bulk creation endpoint
+    - EXERCISE_SEARCH_URL: the url for searching the exercises
+    - EXERCISE_PROGRESS_URL: the url for the progress of an exercise
+    - STATS_URL: the url of the counters of the response cache
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.response_cache import response_cache
+from exercise.models import Exercise, ExerciseLog
+from workout.models import WorkoutLog
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+EXERCISE_LIST_URL = reverse('exercise:exercise-list')
+EXERCISE_LOG_LIST_URL = reverse('exercise:exerciselog-list')
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+EXERCISE_SEARCH_URL = reverse('exercise:exercise-search')
+EXERCISE_PROGRESS_URL = reverse('exercise:exercise-progress')
+STATS_URL = reverse('api-stats-response-cache')
+
+
+def create_user(email='test@gmail.com', password='test1234', **kwargs):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password, **kwargs)
+
+
+class ResponseCacheTest(TestCase):
+    """Test class for caching and dropping the responses"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_log = WorkoutLog.objects.create(user=self.user)
+        self.exercise = Exercise.objects.create(name='Squat', user=self.user)
+        caches['responses'].clear()
+        response_cache.clear_stats()
+
+    def test_cached_response_suc(self):
+        """Test SUCCESS: a repeated read is answered without queries,
+        except the data version of the conditional lists"""
+        for url, params, queries in [
+                (WORKOUT_LOG_LIST_URL, {}, 1),
+                (EXERCISE_LIST_URL, {}, 1),
+                (EXERCISE_SEARCH_URL, {'name': 'squ'}, 0),
+                (EXERCISE_PROGRESS_URL, {'exercise_id': self.exercise.id},
+                 0)]:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            with self.assertNumQueries(queries):
+                cached = self.client.get(url, params)
+            self.assertEqual(cached.content, res.content)
+        self.assertEqual(response_cache.stats()['hits'], 4)
+        self.assertEqual(response_cache.stats()['misses'], 4)
+
+    def test_not_cached_list_error(self):
+        """Test ERROR: the exercise logs list is not cached"""
+        self.client.get(EXERCISE_LOG_LIST_URL)
+        self.client.get(EXERCISE_LOG_LIST_URL)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_write_drops_responses_suc(self):
+        """Test SUCCESS: a write of the user drops its responses"""
+        self.client.get(EXERCISE_LIST_URL)
+        self.client.post(EXERCISE_LIST_URL, {'name': 'Deadlift'})
+        res = self.client.get(EXERCISE_LIST_URL)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+        self.assertEqual(response_cache.stats()['invalidations'], 1)
+
+    def test_exercise_log_drops_progress_suc(self):
+        """Test SUCCESS: a new exercise log is in the next progress"""
+        params = {'exercise_id': self.exercise.id}
+        self.client.get(EXERCISE_PROGRESS_URL, params)
+        ExerciseLog.objects.create(
+            user=self.user, exercise=self.exercise,
+            workout_log=self.workout_log, weight_in_kg=100)
+        res = self.client.get(EXERCISE_PROGRESS_URL, params)
+        self.assertEqual(res.data['progress']['weight_in_kg'][0][0], 100)
+
+    def test_bulk_create_drops_responses_suc(self):
+        """Test SUCCESS: the bulk creation of logs drops the responses"""
+        self.client.get(EXERCISE_LIST_URL)
+        self.client.post(EXERCISE_LOG_BULK_URL, {'logs': [
+            {'workout_log': self.workout_log.id,
+             'exercise_name': 'Deadlift', 'number_of_sets': 3}]},
+            format='json')
+        res = self.client.get(EXERCISE_LIST_URL)
+        self.assertEqual(len(res.data['results']), 2)
+
+    def test_dropped_again_after_commit_suc(self):
+        """Test SUCCESS: the responses read before the commit of a write
+        are dropped after it"""
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkoutLog.objects.create(user=self.user)
+            self.client.get(WORKOUT_LOG_LIST_URL)
+        res = self.client.get(WORKOUT_LOG_LIST_URL)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_other_user_write_error(self):
+        """Test ERROR: the writes of another user do not drop
+        the responses of the user"""
+        self.client.get(EXERCISE_LIST_URL)
+        WorkoutLog.objects.create(user=create_user('other@gmail.com'))
+        self.client.get(EXERCISE_LIST_URL)
+        self.assertEqual(response_cache.stats()['hits'], 1)
+
+    def test_other_params_error(self):
+        """Test ERROR: other query params are not the same response,
+        the same params in another order are"""
+        Exercise.objects.create(name='Squat Jump', user=self.user)
+        self.client.get(EXERCISE_SEARCH_URL, {'name': 'squat'})
+        res = self.client.get(EXERCISE_SEARCH_URL, {'name': 'jump'})
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+        self.client.get(EXERCISE_LIST_URL + '?page_size=1&a=2')
+        self.client.get(EXERCISE_LIST_URL + '?a=2&page_size=1')
+        self.assertEqual(response_cache.stats()['hits'], 1)
+
+    def test_other_user_response_error(self):
+        """Test ERROR: a user does not get the response of another one"""
+        self.client.get(EXERCISE_LIST_URL)
+        self.client.force_authenticate(create_user('other@gmail.com'))
+        res = self.client.get(EXERCISE_LIST_URL)
+        self.assertEqual(res.data['results'], [])
+
+    def test_error_response_not_cached_error(self):
+        """Test ERROR: error responses are not cached"""
+        params = {'exercise_id': self.exercise.id + 1000}
+        self.client.get(EXERCISE_PROGRESS_URL, params)
+        res = self.client.get(EXERCISE_PROGRESS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response_cache.stats()['misses'], 2)
+
+    @override_settings(RESPONSE_CACHE_TTL=0)
+    def test_disabled_suc(self):
+        """Test SUCCESS: nothing is cached when the ttl is 0"""
+        self.client.get(EXERCISE_LIST_URL)
+        self.client.get(EXERCISE_LIST_URL)
+        self.assertEqual(response_cache.stats()['misses'], 0)
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+
+class ResponseCacheStatsTest(TestCase):
+    """Test class for the endpoint of the counters"""
+
+    def setUp(self):
+        response_cache.clear_stats()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            create_user('admin@gmail.com', is_staff=True))
+
+    def test_stats_suc(self):
+        """Test SUCCESS: an admin sees the counters and resets them"""
+        self.client.get(EXERCISE_LIST_URL)
+        res = self.client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['misses'], 1)
+        self.assertEqual(res.data['hit_ratio'], 0)
+        self.assertIn('LocMemCache', res.data['backend'])
+        res = self.client.delete(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response_cache.stats()['misses'], 0)
+
+    def test_stats_by_non_admin_error(self):
+        """Test ERROR: only admins can see the counters"""
+        client = APIClient()
+        client.force_authenticate(create_user())
+        res = client.get(STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
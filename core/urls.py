@@ -19,6 +19,11 @@ from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView
 )
+from core.views import (
+    DatabaseConnectionStatsView,
+    RequestStatsView,
+    ResponseCacheStatsView
+)
 
 urlpatterns = [
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
@@ -28,7 +33,13 @@ urlpatterns = [
         name='api-docs',
     ),
     path('admin/', admin.site.urls),
+    path('api/stats/', RequestStatsView.as_view(), name='api-stats'),
+    path('api/stats/response_cache/', ResponseCacheStatsView.as_view(),
+         name='api-stats-response-cache'),
+    path('api/stats/db_connections/', DatabaseConnectionStatsView.as_view(),
+         name='api-stats-db-connections'),
     path('user/', include('user.urls')),
     path('workout/', include('workout.urls')),
     path('exercise/', include('exercise.urls')),
+    path('sync/', include('sync.urls')),
 ]
@@ -0,0 +1,20 @@
+"""
+URL configuration of the ASGI application
+- the URLs of core/urls.py, the read endpoints of the workout and
+exercise apps are answered by async views (see core/async_views.py)
+- used for the requests of the ASGI application by ASGIUrlconfMiddleware,
+see ASGI_ROOT_URLCONF
+"""
+from django.urls import path, include
+from core.urls import urlpatterns as wsgi_urlpatterns
+from exercise.urls import asgi_urlpatterns as exercise_urlpatterns
+from workout.urls import asgi_urlpatterns as workout_urlpatterns
+
+ASYNC_APPS = {
+    'workout/': (workout_urlpatterns, 'workout'),
+    'exercise/': (exercise_urlpatterns, 'exercise'),
+}
+
+urlpatterns = [
+    path(route, include(app_urls)) for route, app_urls in ASYNC_APPS.items()
+] + [url for url in wsgi_urlpatterns if str(url.pattern) not in ASYNC_APPS]
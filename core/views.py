@@ -0,0 +1,101 @@
+"""
+Endpoints of the API itself
+- RequestStatsView: the per-route histograms of the request metrics
+- ResponseCacheStatsView: the hits, misses and invalidations of the
+response cache
+- DatabaseConnectionStatsView: the lifecycle counters of the database
+connections
+"""
+from drf_spectacular.utils import extend_schema
+from rest_framework import serializers
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import connections
+from core.metrics import (
+    ConnectionStats,
+    connection_metrics_store,
+    request_metrics_store
+)
+from core.response_cache import response_cache
+from user.authentication import CachedTokenAuthentication
+
+
+@extend_schema(
+    responses={200: serializers.DictField()},
+    description="The histograms of the query count, SQL time, serializer "
+                "time and view time of each route measured by this "
+                "process, only for admins. DELETE clears them."
+)
+class RequestStatsView(APIView):
+    """
+    Endpoint showing the metrics measured by RequestMetricsMiddleware
+    - the metrics are kept by each process, so behind several workers
+    each response only holds the requests of the worker answering it
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(request_metrics_store.as_dict())
+
+    def delete(self, request):
+        request_metrics_store.clear()
+        return Response(status=204)
+
+
+@extend_schema(
+    responses={200: serializers.DictField()},
+    description="The hits, misses, hit ratio and invalidations of the "
+                "response cache in this process, only for admins. DELETE "
+                "resets them."
+)
+class ResponseCacheStatsView(APIView):
+    """
+    Endpoint showing the counters of the response cache
+    - the counters are kept by each process, like the request metrics
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.stats())
+
+    def delete(self, request):
+        response_cache.clear_stats()
+        return Response(status=204)
+
+
+@extend_schema(
+    responses={200: serializers.DictField()},
+    description="The opened, reused and closed connections, the failed "
+                "health checks and the time waited for a connection of "
+                "each database in this process, with the settings of the "
+                "connections and the counters of the pool if there is one, "
+                "only for admins. DELETE resets the counters."
+)
+class DatabaseConnectionStatsView(APIView):
+    """
+    Endpoint showing the counters of the database connections
+    - the counters are kept by each process, like the request metrics
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        stats = connection_metrics_store.as_dict()
+        for alias in connections:
+            connection = connections[alias]
+            database = stats.setdefault(alias, ConnectionStats().as_dict())
+            database['conn_max_age'] = \
+                connection.settings_dict['CONN_MAX_AGE']
+            database['conn_health_checks'] = \
+                connection.settings_dict['CONN_HEALTH_CHECKS']
+            pool = getattr(connection, 'pool', None)
+            if pool is not None:
+                database['pool'] = pool.get_stats()
+        return Response(stats)
+
+    def delete(self, request):
+        connection_metrics_store.clear()
+        return Response(status=204)
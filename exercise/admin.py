@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import Exercise, ExerciseLog
+from .models import Exercise, ExerciseLog, ExerciseProgress, ExerciseRollup
 admin.site.register(Exercise)
 admin.site.register(ExerciseLog)
+admin.site.register(ExerciseProgress)
+admin.site.register(ExerciseRollup)
@@ -0,0 +1,41 @@
+"""
+Async views of the exercise read endpoints, served under ASGI
+- see core/async_views.py, the other methods and the error responses
+are left to the DRF views of exercise/views.py
+"""
+from core.async_views import AsyncListView, AsyncReadView
+from exercise.models import Exercise
+from exercise.progress import aget_progress
+
+
+class AsyncExerciseListView(AsyncListView):
+    """The list of the exercises, with a 304 and cached"""
+    conditional = True
+    cached = True
+
+
+class AsyncExerciseSearchView(AsyncListView):
+    """The exercise search, cached"""
+    cached = True
+
+
+class AsyncExerciseProgressView(AsyncReadView):
+    """The progress of an exercise, cached"""
+    cached = True
+
+    async def read(self, request, *args, **kwargs):
+        try:
+            exercise_id = int(request.GET.get('exercise_id', ''))
+        except ValueError:
+            return None
+        if exercise_id <= 0:
+            return None
+        exercise = await Exercise.objects.filter(
+            id=exercise_id, user=request.user).afirst()
+        if exercise is None:
+            return None
+        return {
+            "exercise_id": exercise.id,
+            "exercise_name": exercise.name,
+            "progress": await aget_progress(request.user.id, exercise.id)
+        }
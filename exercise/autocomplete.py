@@ -0,0 +1,226 @@
+"""
+Autocompleting the exercise names of a user from memory
+- PrefixIndex: the names of the exercises of one user, kept sorted by
+each word of the name so a prefix is found with bisect
+- AutocompleteCache: an in-process LRU of the indexes of the users that
+searched recently, an index is built on the first search of its user
+and expires `ttl` seconds after it was built, this bounds how long
+another process can serve names changed elsewhere
+- the indexes held are kept up to date by the Exercise signals and by
+the bulk log endpoint, see exercise/signals.py
+"""
+from bisect import bisect_left
+from collections import OrderedDict
+from heapq import nsmallest
+from threading import Lock
+from time import monotonic
+from django.conf import settings
+from exercise.models import Exercise
+
+# the rank of a text: (is not the first word, name length, exercise id)
+RANK_ID_BITS = 64
+RANK_LENGTH_BITS = 16
+RANK_MAX_LENGTH = (1 << RANK_LENGTH_BITS) - 1
+RANK_ID_MASK = (1 << RANK_ID_BITS) - 1
+# the prefixes short enough to keep their results
+SHORT_PREFIX_LENGTH = 2
+# sorts after any text starting with a prefix
+PREFIX_END = chr(0x10FFFF)
+
+
+def normalize(text):
+    """Lower the text and collapse its whitespaces to single spaces"""
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+    """
+    The exercise names of one user searchable by prefix
+    - each name is stored once for every word it contains, as the
+    name from that word to its end, so 'bench' finds both
+    'bench press' and 'incline bench press'
+    - the texts are kept sorted in one list and the rank of each text
+    in a parallel list, so a prefix is a slice of both found with bisect
+    - results are ranked: names starting with the prefix first,
+    then the shortest names, then the oldest exercises, the rank is
+    packed in one integer so the best ones are picked at C speed
+    - the results of the shortest prefixes, which match most of the
+    names, are kept until the index changes
+    """
+
+    def __init__(self, exercises=()):
+        self._names = dict()
+        self._short_results = dict()
+        entries = []
+        for exercise_id, name in exercises:
+            self._names[exercise_id] = name
+            entries.extend(self._name_entries(exercise_id, name))
+        entries.sort()
+        self._texts = [text for text, _ in entries]
+        self._ranks = [rank for _, rank in entries]
+
+    @staticmethod
+    def _name_entries(exercise_id, name):
+        """Returns the (text from a word, rank) of each word of a name"""
+        words = normalize(name).split(' ')
+        return [(' '.join(words[i:]),
+                 ((i > 0) << (RANK_ID_BITS + RANK_LENGTH_BITS))
+                 | (min(len(name), RANK_MAX_LENGTH) << RANK_ID_BITS)
+                 | exercise_id)
+                for i in range(len(words))]
+
+    def add(self, exercise_id, name):
+        """Add an exercise or update the name of an existing one"""
+        self.remove(exercise_id)
+        self._names[exercise_id] = name
+        self._short_results.clear()
+        for text, rank in self._name_entries(exercise_id, name):
+            i = bisect_left(self._texts, text)
+            self._texts.insert(i, text)
+            self._ranks.insert(i, rank)
+
+    def remove(self, exercise_id):
+        """Remove an exercise if it is in the index"""
+        name = self._names.pop(exercise_id, None)
+        if name is None:
+            return
+        self._short_results.clear()
+        for text, rank in self._name_entries(exercise_id, name):
+            i = bisect_left(self._texts, text)
+            while i < len(self._texts) and self._texts[i] == text:
+                if self._ranks[i] == rank:
+                    del self._texts[i]
+                    del self._ranks[i]
+                    break
+                i += 1
+
+    def search(self, prefix, limit):
+        """Returns the (id, name) of the best `limit` matches"""
+        prefix = normalize(prefix)
+        if len(prefix) <= SHORT_PREFIX_LENGTH:
+            key = (prefix, limit)
+            if key not in self._short_results:
+                self._short_results[key] = self._search(prefix, limit)
+            return self._short_results[key]
+        return self._search(prefix, limit)
+
+    def _search(self, prefix, limit):
+        start = bisect_left(self._texts, prefix)
+        end = bisect_left(self._texts, prefix + PREFIX_END, start)
+        ranks = self._ranks[start:end]
+        # a name can match with several words, ask for more ranks
+        # until `limit` different exercises are found
+        wanted = limit
+        while True:
+            best = nsmallest(wanted, ranks)
+            exercise_ids = list(dict.fromkeys(
+                rank & RANK_ID_MASK for rank in best))
+            if len(exercise_ids) >= limit or len(best) < wanted:
+                break
+            wanted *= 2
+        return [(exercise_id, self._names[exercise_id])
+                for exercise_id in exercise_ids[:limit]]
+
+    def __len__(self):
+        return len(self._names)
+
+
+class AutocompleteCache:
+    """
+    An in-process LRU cache of user id -> PrefixIndex
+    - holds the indexes of at most `max_users` users, the least
+    recently used one is dropped first
+    - add_exercises and remove_exercise only update the indexes
+    already held, the others are built from the database when needed
+    - an index is built outside the lock, the changes made meanwhile
+    bump the version of its user and the index is then not kept, as
+    it may miss them
+    """
+
+    def __init__(self, max_users, ttl):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._indexes = OrderedDict()
+        # user id -> [indexes being built, version], while building
+        self._versions = dict()
+        self._lock = Lock()
+
+    def search(self, user_id, prefix, limit):
+        """Returns the (id, name) of the best matches of the user"""
+        with self._lock:
+            index = self._get(user_id)
+            if index is not None:
+                return index.search(prefix, limit)
+            building = self._versions.setdefault(user_id, [0, 0])
+            building[0] += 1
+            version = building[1]
+        try:
+            index = PrefixIndex(Exercise.objects.filter(user_id=user_id)
+                                .values_list('id', 'name').iterator())
+        finally:
+            with self._lock:
+                building[0] -= 1
+                if not building[0]:
+                    del self._versions[user_id]
+        with self._lock:
+            # a concurrent request may have built the index first
+            if building[1] == version and self._get(user_id) is None \
+                    and self.max_users > 0:
+                self._indexes[user_id] = (index, monotonic() + self.ttl)
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+            return index.search(prefix, limit)
+
+    def add_exercises(self, exercises):
+        """Add created or renamed exercises to the indexes held"""
+        with self._lock:
+            for exercise in exercises:
+                self._bump(exercise.user_id)
+                index = self._get(exercise.user_id)
+                if index is not None:
+                    index.add(exercise.id, exercise.name)
+
+    def remove_exercise(self, exercise):
+        """Remove a deleted exercise from the index of its user"""
+        with self._lock:
+            self._bump(exercise.user_id)
+            index = self._get(exercise.user_id)
+            if index is not None:
+                index.remove(exercise.id)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def __contains__(self, user_id):
+        return user_id in self._indexes
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def _bump(self, user_id):
+        """Tell the indexes of a user being built that they are out of
+        date, the lock has to be held by the caller"""
+        building = self._versions.get(user_id)
+        if building is not None:
+            building[1] += 1
+
+    def _get(self, user_id):
+        """
+        Returns the index of a user if held and not expired,
+        the lock has to be held by the caller
+        """
+        entry = self._indexes.get(user_id)
+        if entry is None:
+            return None
+        index, expires_at = entry
+        if expires_at <= monotonic():
+            del self._indexes[user_id]
+            return None
+        self._indexes.move_to_end(user_id)
+        return index
+
+
+autocomplete_cache = AutocompleteCache(
+    max_users=settings.AUTOCOMPLETE_CACHE_USERS,
+    ttl=settings.AUTOCOMPLETE_CACHE_TTL)
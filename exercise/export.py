@@ -0,0 +1,142 @@
+"""
+Exporting the full training history of a user
+- one row for each exercise log with its workout log and its exercise,
+and one row for each workout log without exercise logs, in the order
+of the workout logs then of their exercise logs
+- export_rows: the rows read with a server-side cursor, so only
+EXPORT_CURSOR_ROWS rows are held at once whatever the size of the history
+- export_chunks: the rows encoded as CSV or NDJSON, optionally gzipped,
+in chunks of about EXPORT_CHUNK_BYTES for a StreamingHttpResponse
+- async_chunks: the chunks as an async iterator for the responses
+served under ASGI
+"""
+import csv
+import zlib
+from datetime import datetime
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from workout.models import WorkoutLog
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+CONTENT_TYPES = {CSV: 'text/csv; charset=utf-8',
+                 NDJSON: 'application/x-ndjson'}
+# (column, lookup from the workout log) of the exported rows, in order
+EXPORT_COLUMNS = (
+    ('workout_log_id', 'id'),
+    ('workout_log_name', 'name'),
+    ('workout_log_description', 'description'),
+    ('workout_log_started_at', 'started_at'),
+    ('workout_log_finished_at', 'finished_at'),
+    ('workout_log_created_at', 'created_at'),
+    ('exercise_id', 'exerciselog__exercise_id'),
+    ('exercise_name', 'exerciselog__exercise__name'),
+    ('exercise_log_id', 'exerciselog__id'),
+    ('number_of_sets', 'exerciselog__number_of_sets'),
+    ('number_of_reps', 'exerciselog__number_of_reps'),
+    ('rest_between_sets_seconds', 'exerciselog__rest_between_sets_seconds'),
+    ('duration_in_minutes', 'exerciselog__duration_in_minutes'),
+    ('weight_in_kg', 'exerciselog__weight_in_kg'),
+    ('notes', 'exerciselog__notes'),
+    ('exercise_log_created_at', 'exerciselog__created_at'),
+)
+COLUMNS = tuple(column for column, _ in EXPORT_COLUMNS)
+
+
+def export_rows(user_id):
+    """
+    Returns an iterator over the exported rows of a user, as tuples
+    of the EXPORT_COLUMNS values
+    - one query joining the exercise logs and their exercises to the
+    workout logs, read with a server-side cursor
+    - the database is picked when it is called, so the rows are read
+    from where the request is routed and not from where the response
+    is streamed
+    """
+    queryset = WorkoutLog.objects.filter(user_id=user_id)\
+        .order_by('created_at', 'id', 'exerciselog__created_at',
+                  'exerciselog__id')\
+        .values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+    return queryset.using(queryset.db)\
+        .iterator(chunk_size=settings.EXPORT_CURSOR_ROWS)
+
+
+class _Line:
+    """The file of a csv writer returning the written line"""
+
+    def write(self, line):
+        return line
+
+
+def csv_lines(rows):
+    """Yields the header then the rows as encoded CSV lines"""
+    writer = csv.writer(_Line())
+    yield writer.writerow(COLUMNS).encode()
+    for row in rows:
+        yield writer.writerow(
+            [value.isoformat() if isinstance(value, datetime) else value
+             for value in row]).encode()
+
+
+def ndjson_lines(rows):
+    """Yields the rows as JSON objects, one on each line"""
+    for row in rows:
+        yield orjson.dumps(dict(zip(COLUMNS, row)),
+                           option=orjson.OPT_APPEND_NEWLINE)
+
+
+def export_chunks(rows, export_format, compress=False):
+    """
+    Yields the rows encoded in the format, in chunks of about
+    EXPORT_CHUNK_BYTES so the response is not written line by line
+    - compress: gzip the chunks on the fly, a gzip file is yielded
+    """
+    lines = csv_lines(rows) if export_format == CSV else ndjson_lines(rows)
+    # wbits 16 + 15: a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    chunk_bytes = settings.EXPORT_CHUNK_BYTES
+    buffer = list()
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size < chunk_bytes:
+            continue
+        chunk = b''.join(buffer)
+        buffer.clear()
+        size = 0
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+async def async_chunks(chunks):
+    """
+    Yields the chunks of a sync iterator, each one read in the thread
+    of the sync_to_async calls of the request
+    - under ASGI a StreamingHttpResponse reads a sync iterator into a
+    list before sending it, the whole export would be held at once
+    - the server-side cursor stays on the connection of that thread,
+    the one the view ran in
+    """
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if hasattr(chunks, 'close'):
+            # the cursor is closed when the client leaves early
+            await sync_to_async(chunks.close, thread_sensitive=True)()
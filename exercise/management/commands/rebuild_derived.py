@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from time import perf_counter
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from exercise.rebuild import DERIVED, rebuild_user
+
+
+def init_worker():
+    """Set up django in a worker process started without forking"""
+    if not apps.ready:
+        django.setup()
+
+
+@contextmanager
+def rebuilt_users(rebuild, user_ids, workers):
+    """
+    Yields the (user_id, rows) results of rebuilding the users, in the
+    order of the users, as they are rebuilt
+    - with several workers, the users are sent to the processes in
+    chunks and the connections of this process are closed first, so
+    the forked processes open their own
+    - an interrupted run does not wait for the pending users
+    """
+    if workers <= 1:
+        yield map(rebuild, user_ids)
+        return
+    connections.close_all()
+    chunksize = max(1, min(100, len(user_ids) // (workers * 4)))
+    executor = ProcessPoolExecutor(workers, initializer=init_worker)
+    try:
+        yield executor.map(rebuild, user_ids, chunksize=chunksize)
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+class Command(BaseCommand):
+    help = "Recompute the data derived from the exercise logs (progress, " \
+           "workout totals, rollups and search trigrams) of all the users " \
+           "or of the given ones, the users are shared between worker " \
+           "processes and the rebuilt users are written to a state file " \
+           "so an interrupted run can be resumed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            dest='user_ids', metavar='USER_ID',
+                            help="rebuild this user only, can be repeated")
+        parser.add_argument('--only', action='append', dest='kinds',
+                            choices=list(DERIVED),
+                            help="rebuild this kind only, can be repeated")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="the number of worker processes, 1 "
+                                 "rebuilds in this process")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="the rows read and written at once")
+        parser.add_argument('--state-file', default='rebuild_derived.state',
+                            help="where the rebuilt users are written, "
+                                 "deleted once all the users are rebuilt")
+        parser.add_argument('--resume', action='store_true',
+                            help="skip the users of the state file")
+
+    def handle(self, *args, user_ids=None, kinds=None, workers, batch_size,
+               state_file, resume, **options):
+        kinds = [kind for kind in DERIVED if kind in (kinds or DERIVED)]
+        if user_ids is None:
+            user_ids = get_user_model().objects.order_by('id')\
+                .values_list('id', flat=True)
+        user_ids = sorted(set(user_ids))
+
+        done = set()
+        if resume and os.path.exists(state_file):
+            with open(state_file) as file:
+                done = {int(line) for line in file if line.strip()}
+        pending = [user_id for user_id in user_ids if user_id not in done]
+        self.stdout.write(
+            f"Rebuilding {', '.join(kinds)} of {len(pending)} users"
+            f" ({len(user_ids) - len(pending)} already rebuilt)")
+
+        rebuild = partial(rebuild_user, kinds=kinds, batch_size=batch_size)
+        # report about every 5% of the users
+        report_every = max(1, len(pending) // 20)
+        rebuilt = rows = 0
+        start = perf_counter()
+        with open(state_file, 'a' if resume else 'w') as state, \
+                rebuilt_users(rebuild, pending, workers) as results:
+            for user_id, written in results:
+                state.write(f"{user_id}\n")
+                state.flush()
+                rebuilt += 1
+                rows += written
+                if rebuilt % report_every == 0 or rebuilt == len(pending):
+                    self.report(rebuilt, len(pending), rows, start)
+        os.remove(state_file)
+        self.stdout.write(f"Rebuilt {rows} rows of {rebuilt} users")
+
+    def report(self, rebuilt, total, rows, start):
+        elapsed = perf_counter() - start
+        self.stdout.write(
+            f"{rebuilt}/{total} users, {rows} rows, "
+            f"{rows / elapsed if elapsed else 0:.0f} rows/s")
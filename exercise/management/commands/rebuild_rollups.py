@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from exercise.models import ExerciseLog, ExerciseRollup
+from exercise.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily, weekly and monthly rollups of the " \
+           "exercises from the exercise logs, of all the users or of " \
+           "the given ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append',
+                            dest='user_ids', metavar='USER_ID',
+                            help="rebuild the rollups of this user only, "
+                                 "can be repeated")
+
+    def handle(self, *args, user_ids=None, **options):
+        if user_ids is None:
+            # the users with logs, and the ones with rollups left over
+            user_ids = set(ExerciseLog.objects.values_list(
+                'user_id', flat=True).distinct()) | set(
+                ExerciseRollup.objects.values_list(
+                    'user_id', flat=True).distinct())
+        total = 0
+        for user_id in sorted(user_ids):
+            total += rebuild_rollups(user_id)
+        self.stdout.write(
+            f"Rebuilt {total} rollups of {len(user_ids)} users")
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0015_rename_weight_exerciselog_weight_in_kg'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress', models.JSONField(default=list)),
+                ('counters', models.JSONField(default=dict)),
+                ('last_log_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_log_created_at', models.DateTimeField(blank=True, null=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exercise.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'exercise'), name='unique_user_exercise_progress')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0016_exerciseprogress'),
+        ('workout', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='exercise_ex_user_id_b06eaa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciselog',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='exercise_ex_user_id_8a9905_idx'),
+        ),
+    ]
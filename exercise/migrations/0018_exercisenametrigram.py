@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def index_existing_exercises(apps, schema_editor):
+    """Store the trigrams of the names of the existing exercises"""
+    Exercise = apps.get_model('exercise', 'Exercise')
+    ExerciseNameTrigram = apps.get_model('exercise', 'ExerciseNameTrigram')
+    trigrams = list()
+    for pk, user_id, name in Exercise.objects.values_list(
+            'id', 'user_id', 'name').iterator(chunk_size=2000):
+        name = name.lower()
+        trigrams += [
+            ExerciseNameTrigram(exercise_id=pk, user_id=user_id,
+                                trigram=trigram)
+            for trigram in {name[i:i + 3] for i in range(len(name) - 2)}]
+        if len(trigrams) >= 5000:
+            ExerciseNameTrigram.objects.bulk_create(trigrams)
+            trigrams = list()
+    ExerciseNameTrigram.objects.bulk_create(trigrams)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0017_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseNameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exercise.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'trigram', 'exercise'], name='exercise_ex_user_id_abebd8_idx')],
+                'constraints': [models.UniqueConstraint(fields=('exercise', 'trigram'), name='unique_exercise_trigram')],
+            },
+        ),
+        migrations.RunPython(index_existing_exercises,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_updated_at(apps, schema_editor):
+    """The existing rows were last updated when they were created"""
+    for model_name in ['Exercise', 'ExerciseLog']:
+        apps.get_model('exercise', model_name).objects.update(
+            updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0018_exercisenametrigram'),
+        ('workout', '0004_sync_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='exerciselog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='exercise_ex_user_id_1654fb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciselog',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='exercise_ex_user_id_dc8c7f_idx'),
+        ),
+        migrations.RunPython(set_updated_at, migrations.RunPython.noop),
+    ]
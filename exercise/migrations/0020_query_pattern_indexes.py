@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0019_sync_updated_at'),
+        ('workout', '0004_sync_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='exercise',
+            name='exercise_ex_name_27aa8f_idx',
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(models.F('user'), django.db.models.functions.text.Lower('name'), name='exercise_user_lower_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciselog',
+            index=models.Index(fields=['user', 'exercise', 'created_at', 'id'], name='exerciselog_user_exercise_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:06
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """
+    Merge the exercises of a user whose names only differ by case, the
+    old check could let them be created concurrently and they would
+    break the new constraint
+    - the oldest exercise is kept and the logs of the others are moved
+    to it, updated so the sync sends them again
+    - the progress of the kept exercise is deleted, it is built again
+    when it is first read
+    - the other exercises get tombstones so the clients delete them
+    - the deferred foreign key checks are run at the end, the table
+    cannot be altered with pending trigger events
+    """
+    Exercise = apps.get_model('exercise', 'Exercise')
+    ExerciseLog = apps.get_model('exercise', 'ExerciseLog')
+    ExerciseProgress = apps.get_model('exercise', 'ExerciseProgress')
+    Tombstone = apps.get_model('sync', 'Tombstone')
+    duplicates = Exercise.objects.values('user_id', lower_name=Lower('name'))\
+        .annotate(count=Count('id'), kept_id=Min('id'))\
+        .filter(count__gt=1).order_by()
+    now = timezone.now()
+    for duplicate in duplicates:
+        merged_ids = list(Exercise.objects.annotate(lower_name=Lower('name'))
+                          .filter(user_id=duplicate['user_id'],
+                                  lower_name=duplicate['lower_name'])
+                          .exclude(id=duplicate['kept_id'])
+                          .values_list('id', flat=True))
+        ExerciseLog.objects.filter(exercise_id__in=merged_ids).update(
+            exercise_id=duplicate['kept_id'], updated_at=now)
+        ExerciseProgress.objects.filter(
+            exercise_id=duplicate['kept_id']).delete()
+        Tombstone.objects.bulk_create(
+            [Tombstone(user_id=duplicate['user_id'],
+                       model='exercise.exercise', object_id=merged_id)
+             for merged_id in merged_ids])
+        Exercise.objects.filter(id__in=merged_ids).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0020_query_pattern_indexes'),
+        ('sync', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='exercise',
+            constraint=models.UniqueConstraint(models.F('user'), django.db.models.functions.text.Lower('name'), name='unique_user_exercise_lower_name'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='exercise',
+            name='unique_user_exercise_name',
+        ),
+        migrations.RemoveIndex(
+            model_name='exercise',
+            name='exercise_user_lower_name_idx',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercise', '0021_case_insensitive_unique_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('max_weight_kg', models.PositiveIntegerField(blank=True, null=True)),
+                ('total_volume_kg', models.PositiveBigIntegerField(default=0)),
+                ('session_count', models.PositiveIntegerField(default=0)),
+                ('total_duration_minutes', models.PositiveIntegerField(default=0)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exercise.exercise')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'exercise', 'granularity', 'period_start'), name='unique_user_exercise_rollup')],
+            },
+        ),
+    ]
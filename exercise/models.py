@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Value
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from workout.models import WorkoutLog
 from .validators import validate_exercise_name
@@ -10,18 +13,81 @@ class ExerciseManager(models.Manager):
     - name is case in-sensitive
     - name is stored in the database with the same case not lowored
     - you can Query name in in-sensitive manner
+    - names are compared with LOWER() so the (user, LOWER(name)) unique
+    index is used (iexact compares with UPPER())
     """
     def get_CI(self, name, **extrakwargs):
         """
         Getting an exercise case-insensitively
         """
-        return self.get(name__iexact=name, **extrakwargs)
+        return self.filter_CI(name, **extrakwargs).get()
 
     def filter_CI(self, name, **extrakwargs):
         """
         Perform a case-insensitive filter on exercises.
         """
-        return self.filter(name__iexact=name, **extrakwargs)
+        return self.alias(lower_name=Lower('name'))\
+            .filter(lower_name=Lower(Value(name)), **extrakwargs)
+
+    def get_or_create_CI(self, names, user):
+        """
+        Getting the exercises of a user by name case-insensitively,
+        creating the missing ones
+        - returns ({lowered name: exercise}, [created exercises])
+        - the existing exercises are selected with one query, the missing
+        ones are inserted with one INSERT ... ON CONFLICT DO NOTHING
+        RETURNING, so creating the same name concurrently is not an
+        error, the exercises created by the other request are selected
+        after the insert
+        - the names are stripped but not validated and no signals are
+        sent, the caller validates the names and indexes the created
+        exercises like bulk_create
+        - raises IntegrityError when a name conflicts but its exercise is
+        not found after the insert
+        """
+        exercises = dict()
+        for name in names:
+            exercises.setdefault(name.strip().lower(), name.strip())
+        exercises.update(self._lower_names_in(user, exercises))
+
+        created = [self.model(name=name, user=user)
+                   for name in exercises.values() if isinstance(name, str)]
+        if created:
+            opts = self.model._meta
+            rows = self._insert(
+                created,
+                fields=[field for field in opts.concrete_fields
+                        if field is not opts.pk],
+                returning_fields=[opts.pk, opts.get_field('name')],
+                on_conflict=OnConflict.IGNORE)
+            # a single conflicting row is returned as None, not skipped
+            ids = {name.lower(): pk for pk, name in filter(None, rows)}
+            created = [exercise for exercise in created
+                       if exercise.name.lower() in ids]
+            for exercise in created:
+                exercise.pk = ids[exercise.name.lower()]
+                exercise._state.adding = False
+                exercise._state.db = self.db
+                exercises[exercise.name.lower()] = exercise
+        # the names another request created since the first query
+        exercises.update(self._lower_names_in(user, [
+            lowered for lowered, name in exercises.items()
+            if isinstance(name, str)]))
+        missing = [name for name in exercises.values()
+                   if isinstance(name, str)]
+        if missing:
+            # the conflicting exercises were deleted since the insert
+            raise IntegrityError(
+                f"The exercises {missing} could not be created or found")
+        return exercises, created
+
+    def _lower_names_in(self, user, lowered_names):
+        """Returns {lowered name: exercise} of the names found"""
+        if not lowered_names:
+            return dict()
+        return {exercise.lower_name: exercise for exercise in
+                self.annotate(lower_name=Lower('name'))
+                .filter(user=user, lower_name__in=lowered_names)}
 
 
 class Exercise(models.Model):
@@ -29,6 +95,9 @@ class Exercise(models.Model):
     - Exercise class that is responsible of the Exercise
     in each workout log
     - each exercise is unique byt it's name
+    - the uniqueness is enforced by the (user, LOWER(name)) unique
+    constraint, so saving an exercise is one INSERT or UPDATE and
+    concurrent saves can't create duplicates
     """
     name = models.CharField(max_length=254,
                             null=False,
@@ -37,37 +106,47 @@ class Exercise(models.Model):
     description = models.TextField(null=True, blank=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = ExerciseManager()
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=['user', 'name'],
-                                    name="unique_user_exercise_name")
+            # its unique index is used by get_CI and filter_CI as well
+            models.UniqueConstraint(F('user'), Lower('name'),
+                                    name="unique_user_exercise_lower_name")
         ]
         indexes = [
-            models.Index(fields=['name']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'updated_at', 'id']),
         ]
 
     def save(self, *args, **kwargs):
         if not self.name:
             raise KeyError("name has to be provided")
 
-        # Manually trigger the full validation process
-        self.full_clean()  # This will call the field-level validators
+        # Manually trigger the field-level validators, the user and the
+        # unique name are checked by the database on save
+        self.full_clean(exclude=['user'], validate_unique=False,
+                        validate_constraints=False)
 
         # strip whitespace
         self.name = self.name.strip()
 
-        # Check for duplicates, excluding the current instance
-        exercises_same_name = Exercise.objects.filter_CI(
-            name=self.name, user=self.user).exclude(pk=self.pk).first()
-        if exercises_same_name:
+        try:
+            # a savepoint, so the transaction can be used after a conflict
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError:
+            # Check for duplicates, excluding the current instance
+            exercises_same_name = Exercise.objects.filter_CI(
+                name=self.name, user_id=self.user_id)\
+                .exclude(pk=self.pk).first()
+            if exercises_same_name is None:
+                raise
             raise KeyError(
                 f"An exercise with the name '{exercises_same_name.name}' already exists.") # noqa
 
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.name + " with " + self.user.__str__()
 
@@ -84,8 +163,20 @@ class ExerciseLog(models.Model):
     duration_in_minutes = models.PositiveIntegerField(null=True, blank=True)
     weight_in_kg = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'updated_at', 'id']),
+            # the logs of an exercise in order, read by the progress
+            models.Index(fields=['user', 'exercise', 'created_at', 'id'],
+                         name='exerciselog_user_exercise_idx'),
+        ]
+
+    def normalize_sets_reps_rest(self):
+        """Make reps and rest time consistent with the number of sets,
+        called on save and before bulk creating logs"""
         if self.number_of_sets:
             if self.number_of_sets < 2:
                 self.rest_between_sets_seconds = 0
@@ -94,7 +185,132 @@ class ExerciseLog(models.Model):
         else:
             self.number_of_reps = None
             self.rest_between_sets_seconds = None
-        super().save(*args, **kwargs)
+
+    def save(self, *args, **kwargs):
+        self.normalize_sets_reps_rest()
+        # the log and the progress updated by its signals are
+        # committed together
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Exercise {self.exercise.name} in workout {self.workout_log.name}"  # noqa
+
+
+class ExerciseProgress(models.Model):
+    """
+    The stored progress of an exercise for a user, so tracking the
+    progress does not go through all the exercise logs on each request
+    - progress: list of [field, values] pairs, a list so the order
+    of the fields is kept
+    - counters: the number of logs since the last change of each field
+    - last_log_id, last_log_created_at: the last log added to the progress
+    """
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    progress = models.JSONField(default=list)
+    counters = models.JSONField(default=dict)
+    last_log_id = models.BigIntegerField(null=True, blank=True)
+    last_log_created_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'exercise'],
+                                    name="unique_user_exercise_progress")
+        ]
+
+    def load(self):
+        """
+        Returns the stored progress and counters, the values are
+        returned as tuples the same way extract_progress builds them
+        """
+        all_progress = dict()
+        for key, values in self.progress:
+            if key.startswith('number_exercises_between_each_'):
+                all_progress[key] = values
+                continue
+            all_progress[key] = [
+                (tuple(value) if isinstance(value, list) else value,
+                 created_at, workout_log)
+                for value, created_at, workout_log in values
+            ]
+        return all_progress, dict(self.counters)
+
+    def dump(self, all_progress, counter_each_field,
+             last_log_id=None, last_log_created_at=None):
+        """Sets the progress, counters and the last log to be stored"""
+        self.progress = [[key, values] for key, values in all_progress.items()]
+        self.counters = counter_each_field
+        self.last_log_id = last_log_id
+        self.last_log_created_at = last_log_created_at
+
+    def is_after_last_log(self, log):
+        """Check if a log comes after the last log in the progress"""
+        if self.last_log_id is None:
+            return True
+        return (log.created_at, log.id) > \
+            (self.last_log_created_at, self.last_log_id)
+
+    def __str__(self):
+        return f"Progress of {self.exercise.name} with {self.user}"
+
+
+class ExerciseRollup(models.Model):
+    """
+    The aggregates of the logs of an exercise for a user over a day,
+    a week (starting on monday) or a month, so a chart of a range reads
+    one row for each period instead of all the logs
+    - kept up to date with the exercise logs, see exercise/rollups.py
+    - period_start: the first day of the period, in TIME_ZONE
+    - total_volume_kg: sets x reps x weight of each log
+    - session_count: the number of workout logs with the exercise
+    """
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    GRANULARITY_CHOICES = [(DAY, 'Day'), (WEEK, 'Week'), (MONTH, 'Month')]
+
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    max_weight_kg = models.PositiveIntegerField(null=True, blank=True)
+    total_volume_kg = models.PositiveBigIntegerField(default=0)
+    session_count = models.PositiveIntegerField(default=0)
+    total_duration_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # its unique index is used to read the periods of a range
+            models.UniqueConstraint(
+                fields=['user', 'exercise', 'granularity', 'period_start'],
+                name="unique_user_exercise_rollup")
+        ]
+
+    def __str__(self):
+        return f"{self.exercise.name} of the {self.granularity} of " \
+            f"{self.period_start} with {self.user}"
+
+
+class ExerciseNameTrigram(models.Model):
+    """
+    The trigrams (every three consecutive characters) of the lowered
+    name of an exercise, used to search the exercises of a user by
+    a part of their names with an index instead of scanning them
+    - kept up to date with the exercises, see exercise/search.py
+    """
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['exercise', 'trigram'],
+                                    name="unique_exercise_trigram")
+        ]
+        indexes = [
+            models.Index(fields=['user', 'trigram', 'exercise']),
+        ]
+
+    def __str__(self):
+        return f"{self.trigram} of {self.exercise.name}"
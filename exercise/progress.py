@@ -0,0 +1,288 @@
+"""
+Tracking the progress of an exercise for a user
+- extract_progress: builds the progress out of a list of exercise logs
+- track_log: adds one exercise log to an already built progress
+- stream_progress: builds the progress in one pass over database rows
+- get_progress, aget_progress: read the stored progress
+- the progress of each (user, exercise) is persisted in ExerciseProgress
+and kept up to date whenever an exercise log is created, updated or deleted
+"""
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from exercise.models import ExerciseLog, ExerciseProgress
+
+# the fields of a log read by stream_progress, in this order
+PROGRESS_ROW_FIELDS = ('number_of_sets', 'number_of_reps',
+                       'rest_between_sets_seconds', 'duration_in_minutes',
+                       'weight_in_kg', 'created_at', 'workout_log', 'id')
+# the fields of the progress, in the order they are tracked
+PROGRESS_KEYS = ('duration_in_minutes', 'weight_in_kg', 'sets_reps_restTime')
+
+
+def progress_row(log):
+    """Returns the PROGRESS_ROW_FIELDS values of an exercise log instance"""
+    return (log.number_of_sets, log.number_of_reps,
+            log.rest_between_sets_seconds, log.duration_in_minutes,
+            log.weight_in_kg, log.created_at, log.workout_log_id, log.id)
+
+
+def track_log(all_progress, counter_each_field, log):
+    """
+    Adds one log to the progress, logs has to be tracked
+    in the order they were created
+    - all_progress and counter_each_field are updated in place
+    """
+    created_at = log.pop('created_at')
+    workout_log = log.pop('workout_log')
+
+    for key, value in log.items():
+        if value is None:
+            if f"count_{key}" in counter_each_field:
+                counter_each_field[f"count_{key}"] += 1
+            continue
+
+        # initializing the lists and counters
+        same_as_last = False  # if the current value is same as last one
+        if key not in all_progress:
+            all_progress[f"{key}"] = list()
+            all_progress[f"number_exercises_between_each_{key}"] = list()
+            counter_each_field[f"count_{key}"] = 0
+        else:
+            # calculating same_as_last
+            if key == 'sets_reps_restTime':
+                # if the rest is None, ignore it in the comparing
+                if value[2] is None:
+                    same_as_last = bool(
+                        value[0:2] == all_progress[f"{key}"][-1][0][0:2])
+                else:
+                    same_as_last = \
+                        bool(value == all_progress[f"{key}"][-1][0])
+            else:
+                same_as_last = bool(value == all_progress[f"{key}"][-1][0])
+            if not same_as_last:
+                all_progress[f"number_exercises_between_each_{key}"].\
+                    append(counter_each_field[f"count_{key}"])
+                counter_each_field[f"count_{key}"] = 0
+
+        if same_as_last:
+            counter_each_field[f"count_{key}"] += 1
+        else:
+            all_progress[key].append(
+                (value, created_at, workout_log)
+                )
+
+
+def stream_progress(rows, all_progress=None, counter_each_field=None):
+    """
+    Builds the progress in one pass over rows of PROGRESS_ROW_FIELDS
+    values, the same way track_log does but without building a dict
+    for each log, only the last value of each field is kept aside
+    - rows: any iterable, usually a values_list iterator over the logs
+    ordered by (created_at, id)
+    - all_progress, counter_each_field: an already built progress
+    to continue from
+    - returns the progress, the counters and the last row
+    """
+    if all_progress is None:
+        all_progress = dict()
+    if counter_each_field is None:
+        counter_each_field = dict()
+
+    # key -> (values list, counters list) of the tracked fields
+    tracked = dict()
+    counts = dict()
+    for key in PROGRESS_KEYS:
+        if key in all_progress:
+            tracked[key] = (
+                all_progress[key],
+                all_progress[f"number_exercises_between_each_{key}"])
+            counts[key] = counter_each_field.get(f"count_{key}", 0)
+
+    last_row = None
+    # the date of the last row is formatted once for all the rows of a day
+    last_day = date = None
+    for row in rows:
+        sets, reps, rests, duration, weight, created_at, workout_log, _ = row
+        sets_reps_rest = \
+            (sets, reps, rests) if sets or reps or rests else None
+
+        for key, value in (('duration_in_minutes', duration),
+                           ('weight_in_kg', weight),
+                           ('sets_reps_restTime', sets_reps_rest)):
+            if value is None:
+                if key in tracked:
+                    counts[key] += 1
+                continue
+
+            field = tracked.get(key)
+            if field is None:
+                values = all_progress[key] = list()
+                counters = \
+                    all_progress[f"number_exercises_between_each_{key}"] = \
+                    list()
+                tracked[key] = (values, counters)
+                counts[key] = 0
+            else:
+                values, counters = field
+                last_value = values[-1][0]
+                # if the rest is None, ignore it in the comparing
+                if key == 'sets_reps_restTime' and rests is None:
+                    same_as_last = value[0:2] == last_value[0:2]
+                else:
+                    same_as_last = value == last_value
+                if same_as_last:
+                    counts[key] += 1
+                    continue
+                counters.append(counts[key])
+                counts[key] = 0
+
+            if created_at.date() != last_day:
+                last_day = created_at.date()
+                date = created_at.strftime("%Y-%m-%d")
+            values.append((value, date, workout_log))
+        last_row = row
+
+    for key, count in counts.items():
+        counter_each_field[f"count_{key}"] = count
+    return all_progress, counter_each_field, last_row
+
+
+def extract_progress(all_logs):
+    """
+    Extracts progress for each field from a list of exercise logs.
+    Tracks meaningful progress, ignoring unchanged values.
+    - **Example**
+        - sets, reps and rest_time would be something like that:
+        *[((11, 12, 13), '2024-11-16', 1), ((21, 22, 23), '2024-11-16', 1)]*
+        - duration time will be something like this :
+        *[(214, '2024-11-16', 1), (215, '2024-11-16', 1)]*
+    """
+    all_progress = dict()
+    counter_each_field = dict()
+
+    for log in all_logs:
+        track_log(all_progress, counter_each_field, log)
+
+    return all_progress
+
+
+def rebuild_progress(user_id, exercise_id, create=True):
+    """
+    Recomputes the stored progress of an exercise from all of its logs
+    - create: if False, only an already stored progress is updated, used
+    while deleting so a progress is not created for an exercise that is
+    being deleted
+    - returns the progress record, or None if nothing was stored
+    """
+    rows = ExerciseLog.objects.filter(
+        user_id=user_id, exercise_id=exercise_id)\
+        .order_by('created_at', 'id')\
+        .values_list(*PROGRESS_ROW_FIELDS)\
+        .iterator(chunk_size=2000)
+    all_progress, counter_each_field, last_row = stream_progress(rows)
+
+    record = ExerciseProgress(user_id=user_id, exercise_id=exercise_id)
+    if last_row:
+        record.dump(all_progress, counter_each_field,
+                    last_log_id=last_row[-1], last_log_created_at=last_row[5])
+    else:
+        record.dump(all_progress, counter_each_field)
+    values = {
+        'progress': record.progress,
+        'counters': record.counters,
+        'last_log_id': record.last_log_id,
+        'last_log_created_at': record.last_log_created_at,
+    }
+    if not create:
+        ExerciseProgress.objects.filter(
+            user_id=user_id, exercise_id=exercise_id).update(**values)
+        return None
+    record, _ = ExerciseProgress.objects.update_or_create(
+        user_id=user_id, exercise_id=exercise_id, defaults=values)
+    return record
+
+
+def _extend_record(record, logs):
+    """
+    Adds logs ordered by (created_at, id) to a progress record,
+    returns False if the logs do not come after its last log
+    """
+    if not record.is_after_last_log(logs[0]):
+        return False
+    all_progress, counter_each_field = record.load()
+    stream_progress([progress_row(log) for log in logs],
+                    all_progress, counter_each_field)
+    record.dump(all_progress, counter_each_field,
+                last_log_id=logs[-1].id,
+                last_log_created_at=logs[-1].created_at)
+    return True
+
+
+def track_new_log(log):
+    """
+    Adds a newly created log to the stored progress of its exercise
+    - if the log is not the latest one, the progress is recomputed
+    """
+    with transaction.atomic():
+        record = ExerciseProgress.objects.select_for_update().filter(
+            user_id=log.user_id, exercise_id=log.exercise_id).first()
+        if record is None or not _extend_record(record, [log]):
+            rebuild_progress(log.user_id, log.exercise_id)
+            return
+        record.save()
+
+
+def track_new_logs(logs):
+    """
+    Adds logs created together (bulk_create does not send signals)
+    to the stored progress of their exercises in a fixed number of queries
+    - a progress that was not stored yet is built when it is first read
+    """
+    logs_by_key = defaultdict(list)
+    for log in logs:
+        logs_by_key[(log.user_id, log.exercise_id)].append(log)
+    if not logs_by_key:
+        return
+
+    with transaction.atomic():
+        records = ExerciseProgress.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in logs_by_key},
+            exercise_id__in={exercise_id for _, exercise_id in logs_by_key})
+        extended = list()
+        for record in records:
+            key = (record.user_id, record.exercise_id)
+            if key not in logs_by_key:
+                continue
+            new_logs = sorted(logs_by_key[key],
+                              key=lambda log: (log.created_at, log.id))
+            if _extend_record(record, new_logs):
+                extended.append(record)
+            else:
+                rebuild_progress(*key)
+        ExerciseProgress.objects.bulk_update(
+            extended, ['progress', 'counters',
+                       'last_log_id', 'last_log_created_at'])
+
+
+def get_progress(user_id, exercise_id):
+    """
+    Returns the progress of an exercise, computing and storing it
+    if it was not stored yet
+    """
+    record = ExerciseProgress.objects.filter(
+        user_id=user_id, exercise_id=exercise_id).first()
+    if record is None:
+        record = rebuild_progress(user_id, exercise_id)
+    all_progress, _ = record.load()
+    return all_progress
+
+
+async def aget_progress(user_id, exercise_id):
+    """get_progress with the async ORM, for the async views"""
+    record = await ExerciseProgress.objects.filter(
+        user_id=user_id, exercise_id=exercise_id).afirst()
+    if record is None:
+        record = await sync_to_async(rebuild_progress)(user_id, exercise_id)
+    all_progress, _ = record.load()
+    return all_progress
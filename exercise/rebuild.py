@@ -0,0 +1,129 @@
+"""
+Rebuilding the data derived from the exercise logs of users, after a
+migration or a bug left it out of date, see the rebuild_derived command
+- DERIVED: the kinds of derived data and the function rebuilding each
+of them for one user, each returns the number of rows written
+- rebuild_user: rebuilds the given kinds for one user
+- the logs and exercises are streamed with server-side cursors and the
+rows are written in batches, so the memory does not grow with the
+number of logs of a user
+- the autocomplete indexes are held in memory and expire by themselves,
+see exercise/autocomplete.py
+"""
+from itertools import groupby, islice
+from django.db import transaction
+from exercise.models import (
+    Exercise,
+    ExerciseLog,
+    ExerciseNameTrigram,
+    ExerciseProgress
+)
+from exercise.progress import PROGRESS_ROW_FIELDS, stream_progress
+from exercise.rollups import rebuild_rollups
+from exercise.search import index_exercises
+from workout.models import WorkoutLog
+from workout.summary import refresh_summaries
+from user.models import UserDataVersion
+from core.response_cache import response_cache
+
+PROGRESS_UPDATE_FIELDS = ['progress', 'counters', 'last_log_id',
+                          'last_log_created_at']
+
+
+def batches(iterable, size):
+    """Yields lists of up to size items of the iterable"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def rebuild_user_progress(user_id, batch_size):
+    """
+    Recompute the stored progress of all the exercises of a user in one
+    pass over its logs ordered by exercise, the same as rebuild_progress
+    for each exercise
+    - the progress of the exercises without logs is deleted, it is
+    stored again when it is first read
+    """
+    rows = ExerciseLog.objects.filter(user_id=user_id)\
+        .order_by('exercise_id', 'created_at', 'id')\
+        .values_list('exercise_id', *PROGRESS_ROW_FIELDS)\
+        .iterator(chunk_size=batch_size)
+
+    def records():
+        for exercise_id, exercise_rows in groupby(rows,
+                                                  key=lambda row: row[0]):
+            all_progress, counter_each_field, last_row = stream_progress(
+                row[1:] for row in exercise_rows)
+            record = ExerciseProgress(user_id=user_id,
+                                      exercise_id=exercise_id)
+            record.dump(all_progress, counter_each_field,
+                        last_log_id=last_row[-1],
+                        last_log_created_at=last_row[5])
+            yield record
+
+    written = 0
+    with transaction.atomic():
+        ExerciseProgress.objects.filter(user_id=user_id).delete()
+        for batch in batches(records(), batch_size):
+            # a log written meanwhile may have stored a progress again
+            ExerciseProgress.objects.bulk_create(
+                batch, update_conflicts=True,
+                unique_fields=['user', 'exercise'],
+                update_fields=PROGRESS_UPDATE_FIELDS)
+            written += len(batch)
+    return written
+
+
+def rebuild_user_summaries(user_id, batch_size):
+    """Recompute the totals of the workout logs of a user, one UPDATE
+    for each batch"""
+    workout_log_ids = WorkoutLog.objects.filter(user_id=user_id)\
+        .order_by().values_list('id', flat=True)\
+        .iterator(chunk_size=batch_size)
+    written = 0
+    for batch in batches(workout_log_ids, batch_size):
+        refresh_summaries(batch)
+        written += len(batch)
+    return written
+
+
+def rebuild_user_rollups(user_id, batch_size):
+    """Recompute the rollups of a user, see rebuild_rollups"""
+    return rebuild_rollups(user_id)
+
+
+def rebuild_user_search(user_id, batch_size):
+    """Store the trigrams of the exercises of a user again"""
+    exercises = Exercise.objects.filter(user_id=user_id).order_by()\
+        .only('id', 'user_id', 'name').iterator(chunk_size=batch_size)
+    written = 0
+    with transaction.atomic():
+        ExerciseNameTrigram.objects.filter(user_id=user_id).delete()
+        for batch in batches(exercises, batch_size):
+            written += len(index_exercises(batch))
+    return written
+
+
+# kind -> function rebuilding it for a user, in the order they are run
+DERIVED = {
+    'progress': rebuild_user_progress,
+    'summaries': rebuild_user_summaries,
+    'rollups': rebuild_user_rollups,
+    'search': rebuild_user_search,
+}
+
+
+def rebuild_user(user_id, kinds=tuple(DERIVED), batch_size=2000):
+    """
+    Rebuild the kinds of derived data of a user
+    - each kind is rebuilt as a whole, so rebuilding a user again gives
+    the same rows, this is what makes the command resumable
+    - the data version of the user is increased and its cached
+    responses are dropped, as the responses may have changed
+    - returns (user_id, number of rows written)
+    """
+    written = sum(DERIVED[kind](user_id, batch_size) for kind in kinds)
+    UserDataVersion.objects.bump(user_id)
+    response_cache.invalidate(user_id)
+    return user_id, written
@@ -0,0 +1,165 @@
+"""
+Time bucketed aggregates of the exercise logs of each user and exercise
+- the logs are aggregated by the day, the week (starting on monday) and
+the month of their created_at in TIME_ZONE into ExerciseRollup rows:
+the max weight, the total volume, the number of workout logs and the
+total duration
+- refresh_rollups: recomputes the periods of some logs of a user,
+called whenever exercise logs are created, updated or deleted
+- rebuild_rollups: recomputes all the rollups of users, see the
+rebuild_rollups command
+- get_rollups: reads the rollups of a range, one row for each period
+with logs
+"""
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from exercise.models import Exercise, ExerciseLog, ExerciseRollup
+
+GRANULARITIES = (ExerciseRollup.DAY, ExerciseRollup.WEEK,
+                 ExerciseRollup.MONTH)
+# the fields of a log read to aggregate it, in this order
+ROLLUP_ROW_FIELDS = ('exercise_id', 'created_at', 'workout_log_id',
+                     'number_of_sets', 'number_of_reps', 'weight_in_kg',
+                     'duration_in_minutes')
+# the fields identifying a rollup and the aggregated ones
+ROLLUP_KEY_FIELDS = ['user', 'exercise', 'granularity', 'period_start']
+ROLLUP_VALUE_FIELDS = ['max_weight_kg', 'total_volume_kg', 'session_count',
+                       'total_duration_minutes']
+
+
+def period_start(day, granularity):
+    """The first day of the period of the granularity containing day"""
+    if granularity == ExerciseRollup.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == ExerciseRollup.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def period_end(start, granularity):
+    """The first day of the period following the one starting on start"""
+    if granularity == ExerciseRollup.WEEK:
+        return start + timedelta(days=7)
+    if granularity == ExerciseRollup.MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def start_of_day(day):
+    """The aware datetime starting the day in TIME_ZONE"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def aggregate(rows):
+    """
+    Aggregates ROLLUP_ROW_FIELDS rows in one pass
+    - returns {(exercise_id, granularity, period_start): {field: value}}
+    with the ROLLUP_VALUE_FIELDS of each period
+    """
+    periods = dict()
+    for exercise_id, created_at, workout_log_id, sets, reps, weight, \
+            duration in rows:
+        day = timezone.localdate(created_at)
+        for granularity in GRANULARITIES:
+            key = (exercise_id, granularity, period_start(day, granularity))
+            period = periods.get(key)
+            if period is None:
+                period = periods[key] = {
+                    'max_weight_kg': None, 'total_volume_kg': 0,
+                    'session_count': set(), 'total_duration_minutes': 0}
+            if weight is not None and (period['max_weight_kg'] is None or
+                                       weight > period['max_weight_kg']):
+                period['max_weight_kg'] = weight
+            period['total_volume_kg'] += (sets or 0) * (reps or 0) * \
+                (weight or 0)
+            period['session_count'].add(workout_log_id)
+            period['total_duration_minutes'] += duration or 0
+    for period in periods.values():
+        period['session_count'] = len(period['session_count'])
+    return periods
+
+
+def _save(user_id, periods):
+    """Insert or update the rollups of aggregated periods of a user"""
+    ExerciseRollup.objects.bulk_create(
+        [ExerciseRollup(user_id=user_id, exercise_id=exercise_id,
+                        granularity=granularity, period_start=start,
+                        **values)
+         for (exercise_id, granularity, start), values in periods.items()],
+        batch_size=2000, update_conflicts=True,
+        unique_fields=ROLLUP_KEY_FIELDS, update_fields=ROLLUP_VALUE_FIELDS)
+
+
+def refresh_rollups(user_id, logs):
+    """
+    Recompute the periods of logs of a user from their logs
+    - logs: (exercise_id, created_at) of the created, updated or
+    deleted logs
+    - the logs of these periods are read with one query, the rollups
+    are updated with one query and the periods left without logs are
+    deleted with one more
+    - the exercises are locked first, so the refreshes of concurrent
+    writes of the same exercise run one after the other and each one
+    reads the logs the previous ones committed
+    """
+    periods = {(exercise_id, granularity,
+                period_start(timezone.localdate(created_at), granularity))
+               for exercise_id, created_at in logs
+               for granularity in GRANULARITIES}
+    if not periods:
+        return
+    first_day = min(start for _, _, start in periods)
+    last_day = max(period_end(start, granularity)
+                   for _, granularity, start in periods)
+    exercise_ids = {exercise_id for exercise_id, _, _ in periods}
+
+    with transaction.atomic(savepoint=False):
+        # no key: the inserts of logs referencing them are not blocked
+        list(Exercise.objects.select_for_update(no_key=True)
+             .filter(id__in=exercise_ids).order_by('id')
+             .values_list('id', flat=True))
+        rows = ExerciseLog.objects.filter(
+            user_id=user_id, exercise_id__in=exercise_ids,
+            created_at__gte=start_of_day(first_day),
+            created_at__lt=start_of_day(last_day))\
+            .values_list(*ROLLUP_ROW_FIELDS)
+        aggregated = {key: values for key, values in aggregate(rows).items()
+                      if key in periods}
+        _save(user_id, aggregated)
+        empty = periods - aggregated.keys()
+        if empty:
+            ExerciseRollup.objects.filter(user_id=user_id).filter(reduce(
+                or_, (Q(exercise_id=exercise_id, granularity=granularity,
+                        period_start=start)
+                      for exercise_id, granularity, start in empty)))\
+                .delete()
+
+
+def rebuild_rollups(user_id):
+    """
+    Recompute all the rollups of a user from its logs in one pass,
+    returns the number of rollups
+    """
+    rows = ExerciseLog.objects.filter(user_id=user_id).order_by()\
+        .values_list(*ROLLUP_ROW_FIELDS).iterator(chunk_size=2000)
+    periods = aggregate(rows)
+    with transaction.atomic():
+        ExerciseRollup.objects.filter(user_id=user_id).delete()
+        _save(user_id, periods)
+    return len(periods)
+
+
+def get_rollups(user_id, exercise_id, granularity, start, end):
+    """
+    Returns the rollups of the periods of an exercise starting between
+    the start and end dates (both included), in order
+    """
+    return ExerciseRollup.objects.filter(
+        user_id=user_id, exercise_id=exercise_id, granularity=granularity,
+        period_start__gte=period_start(start, granularity),
+        period_start__lte=end).order_by('period_start')\
+        .values('period_start', *ROLLUP_VALUE_FIELDS)
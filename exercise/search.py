@@ -0,0 +1,59 @@
+"""
+Searching the exercises of a user by a part of their names
+- the trigrams of each exercise name are stored in ExerciseNameTrigram,
+an exercise can only contain a text if it has all the trigrams of it,
+so the index narrows the exercises before checking the name itself
+- texts shorter than a trigram fall back to filtering the names directly
+- works the same on any database, including SQLite in the tests
+"""
+from django.db.models import Count
+from django.db.models.functions import Length
+from exercise.models import Exercise, ExerciseNameTrigram
+
+
+def name_trigrams(name):
+    """Returns the set of trigrams of the lowered name"""
+    name = name.lower()
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+
+def index_exercises(exercises):
+    """Store the trigrams of new exercises, used after bulk creating them,
+    returns the stored trigrams"""
+    return ExerciseNameTrigram.objects.bulk_create(
+        [ExerciseNameTrigram(exercise_id=exercise.id,
+                             user_id=exercise.user_id, trigram=trigram)
+         for exercise in exercises
+         for trigram in name_trigrams(exercise.name)])
+
+
+def reindex_exercise(exercise):
+    """Update the stored trigrams of an exercise to match its name"""
+    trigrams = name_trigrams(exercise.name)
+    stored = set(ExerciseNameTrigram.objects.filter(
+        exercise_id=exercise.id).values_list('trigram', flat=True))
+    if stored - trigrams:
+        ExerciseNameTrigram.objects.filter(
+            exercise_id=exercise.id, trigram__in=stored - trigrams).delete()
+    ExerciseNameTrigram.objects.bulk_create(
+        [ExerciseNameTrigram(exercise_id=exercise.id,
+                             user_id=exercise.user_id, trigram=trigram)
+         for trigram in trigrams - stored])
+
+
+def search_exercises(user, name):
+    """
+    Returns the exercises of a user that contain the name
+    case-insensitively, the shortest names first
+    """
+    exercises = Exercise.objects.filter(user=user, name__icontains=name)
+    trigrams = name_trigrams(name)
+    if trigrams:
+        matching = ExerciseNameTrigram.objects\
+            .filter(user=user, trigram__in=trigrams)\
+            .values('exercise')\
+            .annotate(matched=Count('trigram'))\
+            .filter(matched=len(trigrams))\
+            .values('exercise')
+        exercises = exercises.filter(id__in=matching)
+    return exercises.order_by(Length('name'), 'id')
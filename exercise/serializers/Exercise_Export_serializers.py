@@ -0,0 +1,11 @@
+from rest_framework import serializers
+from exercise.export import CSV, FORMATS
+
+
+class ExerciseExportSerializer(serializers.Serializer):
+    """
+    Serializer for the parameters of the export endpoint
+    - file_format and not format, format is the renderer of DRF
+    """
+    file_format = serializers.ChoiceField(choices=FORMATS, default=CSV)
+    gzip = serializers.BooleanField(default=False)
@@ -1,9 +1,47 @@
+from django.db import transaction
 from rest_framework import serializers
 from exercise.models import Exercise, ExerciseLog
+from exercise.progress import track_new_logs
+from exercise.rollups import refresh_rollups
+from exercise.search import index_exercises
+from exercise.autocomplete import autocomplete_cache
+from workout.models import WorkoutLog
+from workout.summary import refresh_summaries
+from user.models import UserDataVersion
+from core.response_cache import response_cache
 from .Exercise_serializers import ExerciseListSerializer
 from exercise.validators import validate_exercise_name
 
 
+def get_or_create_exercises(request, names, bump=True):
+    """
+    Returns {lowered name: exercise} of the names, creating the
+    exercises the user of the request doesn't have, see
+    ExerciseManager.get_or_create_CI
+    - the exercises are remembered on the request by name, so a request
+    logging the same exercise several times resolves it once
+    - the created exercises are indexed for the search and the
+    autocomplete, and unless `bump` is False the data version of the
+    user is increased and its cached responses are dropped
+    """
+    memo = getattr(request, '_exercises_by_name', None)
+    if memo is None:
+        memo = request._exercises_by_name = dict()
+    missing = [name for name in names if name.strip().lower() not in memo]
+    if missing:
+        exercises, created = Exercise.objects.get_or_create_CI(
+            missing, request.user)
+        memo.update(exercises)
+        if created:
+            index_exercises(created)
+            autocomplete_cache.add_exercises(created)
+            if bump:
+                UserDataVersion.objects.bump(request.user.id)
+                response_cache.invalidate(request.user.id)
+    return {name.strip().lower(): memo[name.strip().lower()]
+            for name in names}
+
+
 class ExerciseLogSerializer(serializers.ModelSerializer):
     """Serializer for the ExerciseLog model endpoints"""
     exercise_name = serializers.CharField(write_only=True, max_length=254,
@@ -71,7 +109,7 @@ class ExerciseLogSerializer(serializers.ModelSerializer):
         """make sure that the workout_log belongs to the current user"""
         if not self.instance:
             user = self.context['request'].user
-            if workout.user != user:
+            if workout.user_id != user.id:
                 workout = None
                 raise serializers.ValidationError(
                     "You can only add logs to your own workout logs")
@@ -81,14 +119,9 @@ class ExerciseLogSerializer(serializers.ModelSerializer):
     def get_or_create_exercise(self, exercise_name):
         """Make sure that the exercise belongs to the current
         user or create if it doesn't exist"""
-        user = self.context['request'].user
-        exercise = None
-        try:
-            exercise = Exercise.objects.get_CI(name=exercise_name, user=user)
-        except Exercise.DoesNotExist:
-            exercise = Exercise.objects.create(
-                name=exercise_name, user=user)
-        return exercise
+        exercises = get_or_create_exercises(self.context['request'],
+                                            [exercise_name])
+        return exercises[exercise_name.strip().lower()]
 
     def validate(self, data):
         """Perform validation in the object level"""
@@ -152,3 +185,84 @@ class ExerciseLogProgressListSerializer(serializers.ModelSerializer):
             ret['sets_reps_restTime'] = None
 
         return ret
+
+
+class ExerciseLogBulkItemSerializer(ExerciseLogSerializer):
+    """
+    Serializer of one log in the bulk creation endpoint
+    - it only validates the fields, the workout logs and exercises
+    are resolved for all the logs together by ExerciseLogBulkSerializer
+    """
+    workout_log = serializers.IntegerField(min_value=1)
+
+    def validate_workout_log(self, workout):
+        return workout
+
+    def validate(self, data):
+        """Perform validation in the object level"""
+        return ExerciseLogSerializer._process_sets_reps_rest(None, data)
+
+
+class ExerciseLogBulkSerializer(serializers.Serializer):
+    """
+    Serializer for creating many exercise logs in one request
+    for one or more workout logs of the current user
+    - exercises are resolved by name with one query, and the missing
+    ones are created with one insert
+    - the logs are created with bulk_create in one transaction, the
+    totals of their workout logs and the rollups of their exercises
+    are refreshed with a fixed number of queries
+    - the data version of the user is increased and its cached
+    responses are dropped once
+    - errors are reported for each log by its position in the list
+    """
+    MAX_LOGS = 1000
+
+    logs = ExerciseLogBulkItemSerializer(many=True, allow_empty=False,
+                                         max_length=MAX_LOGS)
+
+    def validate_logs(self, logs):
+        """make sure that all the workout_logs belong to the current user"""
+        user = self.context['request'].user
+        workout_ids = {log['workout_log'] for log in logs}
+        user_workout_ids = set(WorkoutLog.objects.filter(
+            user=user, id__in=workout_ids).values_list('id', flat=True))
+        # errors by the position of the log, the same way the list
+        # serializer reports the errors of the fields
+        errors = {
+            index: {'workout_log': [
+                "You can only add logs to your own workout logs"]}
+            for index, log in enumerate(logs)
+            if log['workout_log'] not in user_workout_ids
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        return logs
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        logs = validated_data['logs']
+        with transaction.atomic():
+            exercises = get_or_create_exercises(
+                self.context['request'],
+                [log['exercise_name'] for log in logs], bump=False)
+            exercise_logs = list()
+            for log in logs:
+                log = dict(log)
+                exercise_name = log.pop('exercise_name')
+                exercise_log = ExerciseLog(
+                    user=user,
+                    exercise=exercises[exercise_name.strip().lower()],
+                    workout_log_id=log.pop('workout_log'),
+                    **log)
+                exercise_log.normalize_sets_reps_rest()
+                exercise_logs.append(exercise_log)
+            exercise_logs = ExerciseLog.objects.bulk_create(exercise_logs)
+            track_new_logs(exercise_logs)
+            refresh_rollups(user.id, [(log.exercise_id, log.created_at)
+                                      for log in exercise_logs])
+            refresh_summaries(log.workout_log_id for log in exercise_logs)
+            # bulk_create sends no signals
+            UserDataVersion.objects.bump(user.id)
+            response_cache.invalidate(user.id)
+        return exercise_logs
@@ -0,0 +1,52 @@
+from datetime import timedelta
+from django.utils import timezone
+from rest_framework import serializers
+from exercise.models import ExerciseRollup
+from exercise.rollups import period_start
+
+
+class ExerciseAnalyticsSerializer(serializers.Serializer):
+    """
+    Serializer for the parameters of the analytics endpoint
+    - end is today and start is a year before end by default
+    - the range can have at most MAX_PERIODS periods, a year of days
+    """
+    MAX_PERIODS = 366
+
+    exercise_id = serializers.IntegerField(min_value=1)
+    granularity = serializers.ChoiceField(
+        choices=ExerciseRollup.GRANULARITY_CHOICES,
+        default=ExerciseRollup.WEEK)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        """Set the default range and check its number of periods"""
+        end = data.setdefault('end', timezone.localdate())
+        start = data.setdefault('start', end - timedelta(days=365))
+        if start > end:
+            raise serializers.ValidationError(
+                {'start': "start can not be after end"})
+        granularity = data['granularity']
+        start = period_start(start, granularity)
+        if granularity == ExerciseRollup.DAY:
+            periods = (end - start).days + 1
+        elif granularity == ExerciseRollup.WEEK:
+            periods = (end - start).days // 7 + 1
+        else:
+            periods = (end.year - start.year) * 12 + \
+                end.month - start.month + 1
+        if periods > self.MAX_PERIODS:
+            raise serializers.ValidationError(
+                f"The range can have at most {self.MAX_PERIODS} periods "
+                f"of a {granularity}, it has {periods}")
+        return data
+
+
+class ExerciseRollupSerializer(serializers.ModelSerializer):
+    """Serializer of the rollup of a period in the analytics endpoint"""
+    class Meta:
+        model = ExerciseRollup
+        fields = ['period_start', 'max_weight_kg', 'total_volume_kg',
+                  'session_count', 'total_duration_minutes']
+        read_only_fields = fields
@@ -9,31 +9,25 @@ class ExerciseSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'created_at', 'user']
         read_only_fields = ['id', 'user']
 
-    def validate_name(self, name):
-        """Validate that the exercise name is unique for the user"""
-        user = self.context['request'].user
-        exercise_id = self.instance.id if self.instance else None
-
-        # Check for duplicates, excluding the current instance
-        existing_exercise = Exercise.objects.filter_CI(name=name, user=user)\
-            .exclude(pk=exercise_id).first()
-        if existing_exercise:
-            raise serializers.ValidationError(
-                f"An exercise with the name '{existing_exercise.name}' already exists.") # noqa
-
-        return name
+    @staticmethod
+    def save_exercise(exercise):
+        """Save the exercise, the unique name is checked by the database
+        on save and a duplicate is reported as an error of the name"""
+        try:
+            exercise.save()
+        except KeyError as error:
+            raise serializers.ValidationError({'name': [error.args[0]]})
+        return exercise
 
     def create(self, validated_data):
         user = self.context.get('request').user
         validated_data['user'] = user
-        exercise = Exercise.objects.create(**validated_data)
-        return exercise
+        return self.save_exercise(Exercise(**validated_data))
 
     def update(self, instance, validated_data):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
-        return instance
+        return self.save_exercise(instance)
 
 
 class ExerciseListSerializer(serializers.ModelSerializer):
@@ -46,3 +40,10 @@ class ExerciseListSerializer(serializers.ModelSerializer):
 
 class ExerciseSearchSerializer(serializers.Serializer):
     name = serializers.CharField(required=False, max_length=254)
+
+
+class ExerciseAutocompleteSerializer(serializers.Serializer):
+    """Serializer for the parameters of the autocomplete endpoint"""
+    name = serializers.CharField(max_length=254)
+    limit = serializers.IntegerField(required=False, default=10,
+                                     min_value=1, max_value=50)
@@ -1,13 +1,22 @@
 from .Exercise_Log_serializers import (
     ExerciseLogSerializer,
-    ExerciseLogProgressListSerializer
+    ExerciseLogProgressListSerializer,
+    ExerciseLogBulkSerializer
 )
 from .Exercise_serializers import (
     ExerciseSerializer,
     ExerciseListSerializer,
-    ExerciseSearchSerializer
+    ExerciseSearchSerializer,
+    ExerciseAutocompleteSerializer
 )
+from .Exercise_Rollup_serializers import (
+    ExerciseAnalyticsSerializer,
+    ExerciseRollupSerializer
+)
+from .Exercise_Export_serializers import ExerciseExportSerializer
 
 __all__ = ['ExerciseLogSerializer', 'ExerciseSerializer',
            'ExerciseListSerializer', 'ExerciseSearchSerializer',
-           'ExerciseLogProgressListSerializer']
+           'ExerciseLogProgressListSerializer', 'ExerciseLogBulkSerializer',
+           'ExerciseAutocompleteSerializer', 'ExerciseAnalyticsSerializer',
+           'ExerciseRollupSerializer', 'ExerciseExportSerializer']
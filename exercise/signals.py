@@ -0,0 +1,131 @@
+"""
+Signals of the exercise application
+- keeps the stored progress of the exercises up to date
+with the exercise logs
+- keeps the trigrams of the exercise names up to date
+- keeps the autocomplete indexes held in memory up to date
+- keeps the totals of the workout logs up to date with their
+exercise logs
+- keeps the rollups of the exercises up to date with the exercise logs
+"""
+from collections import defaultdict
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+from exercise.models import Exercise, ExerciseLog
+from exercise import progress, rollups, search
+from exercise.autocomplete import autocomplete_cache
+from workout.models import WorkoutLog
+from workout.summary import refresh_summaries
+
+
+@receiver(post_save, sender=Exercise)
+def index_exercise_name(sender, instance, created, raw=False, **kwargs):
+    """Store the trigrams of the name after creating or renaming"""
+    if raw:
+        return
+    if created:
+        search.index_exercises([instance])
+    else:
+        search.reindex_exercise(instance)
+    autocomplete_cache.add_exercises([instance])
+
+
+@receiver(post_delete, sender=Exercise)
+def remove_exercise_name(sender, instance, **kwargs):
+    """Remove the name from the autocomplete index of the user"""
+    autocomplete_cache.remove_exercise(instance)
+
+
+@receiver(pre_save, sender=ExerciseLog)
+def remember_exercise_log_progress(sender, instance, raw=False, **kwargs):
+    """Keep the (user, exercise) and the workout log the log had
+    before updating it"""
+    instance._old_progress_key = instance._old_workout_log_id = None
+    if raw or instance._state.adding:
+        return
+    old = ExerciseLog.objects.filter(pk=instance.pk)\
+        .values_list('user_id', 'exercise_id', 'workout_log_id').first()
+    if old:
+        instance._old_progress_key = old[:2]
+        instance._old_workout_log_id = old[2]
+
+
+@receiver(post_save, sender=ExerciseLog)
+def update_exercise_log_progress(sender, instance, created,
+                                 raw=False, **kwargs):
+    """Update the stored progress, the rollups and the totals of the
+    workout log after creating or updating a log"""
+    if raw:
+        return
+    refresh_summaries([instance.workout_log_id,
+                       getattr(instance, '_old_workout_log_id', None)
+                       or instance.workout_log_id])
+    rollups.refresh_rollups(instance.user_id,
+                            [(instance.exercise_id, instance.created_at)])
+    if created:
+        progress.track_new_log(instance)
+        return
+    progress.rebuild_progress(instance.user_id, instance.exercise_id)
+    old_key = getattr(instance, '_old_progress_key', None)
+    if old_key and old_key != (instance.user_id, instance.exercise_id):
+        progress.rebuild_progress(*old_key, create=False)
+        rollups.refresh_rollups(old_key[0],
+                                [(old_key[1], instance.created_at)])
+
+
+def deleted_from(origin):
+    """The model of the object or the queryset a delete started from"""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(pre_delete, sender=ExerciseLog)
+def collect_deleted_exercise_log(sender, instance, origin=None, **kwargs):
+    """
+    Keep the logs a delete is about to delete on its origin, so their
+    exercises and workout logs are updated once for the whole delete
+    - the logs deleted with their user are skipped, everything derived
+    from them is deleted with the user
+    """
+    if deleted_from(origin) is get_user_model():
+        return
+    origin.__dict__.setdefault('_deleted_exercise_logs', list()).append(
+        (instance.user_id, instance.exercise_id, instance.workout_log_id,
+         instance.created_at))
+
+
+@receiver(post_delete, sender=ExerciseLog)
+def delete_exercise_log_progress(sender, instance, origin=None, **kwargs):
+    """
+    Update the stored progress, the rollups and the totals of the
+    workout logs after deleting logs
+    - all the logs of a delete are deleted before the first of them
+    gets this signal, so the logs collected for the delete are handled
+    then, and the following signals of the same delete do nothing
+    """
+    origin_model = deleted_from(origin)
+    if origin_model is get_user_model():
+        return
+    logs = origin.__dict__.get('_deleted_exercise_logs')
+    if not logs:
+        return
+    origin._deleted_exercise_logs = list()
+
+    # the progress and the rollups are deleted with the exercise
+    if origin_model is not Exercise:
+        for user_id, exercise_id in {log[:2] for log in logs}:
+            progress.rebuild_progress(user_id, exercise_id, create=False)
+        logs_by_user = defaultdict(list)
+        for user_id, exercise_id, _, created_at in logs:
+            logs_by_user[user_id].append((exercise_id, created_at))
+        for user_id, user_logs in logs_by_user.items():
+            rollups.refresh_rollups(user_id, user_logs)
+    # the workout logs are deleted with their logs
+    if origin_model is not WorkoutLog:
+        refresh_summaries(log[2] for log in logs)
@@ -195,6 +195,11 @@ class ExerciseCreationTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         msg = "An exercise with the name 'defaultName' already exists."
         self.assertIn(msg, res.data['name'])
+        res = self.client.post(EXERCISE_LIST_CREATE_URL,
+                               {'name': 'DEFAULTNAME '})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(msg, res.data['name'])
+        self.assertEqual(Exercise.objects.filter(user=self.user).count(), 1)
 
 
 class ExerciseRetrieveListTest(TestCase):
@@ -242,7 +247,7 @@ class ExerciseRetrieveListTest(TestCase):
         exer2 = create_exercise(name='e2', user=self.user)
         res = self.client.get(EXERCISE_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        ids = [exer['id'] for exer in res.data]
+        ids = [exer['id'] for exer in res.data['results']]
         self.assertIn(exer1.id, ids)
         self.assertIn(exer2.id, ids)
         exer1.delete()
@@ -255,7 +260,7 @@ class ExerciseRetrieveListTest(TestCase):
         other_exercise = create_exercise(name='e2', user=self.tmp_user)
         res = self.client.get(EXERCISE_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        ids = [exercise['id'] for exercise in res.data]
+        ids = [exercise['id'] for exercise in res.data['results']]
         self.assertIn(self.exercise.id, ids)
         self.assertNotIn(other_exercise.id, ids)
         other_exercise.delete()
@@ -266,7 +271,7 @@ class ExerciseRetrieveListTest(TestCase):
         details of the exercise only the id, name"""
         res = self.client.get(EXERCISE_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        for exer in res.data:
+        for exer in res.data['results']:
             self.assertNotIn('description', exer)
             self.assertIn('id', exer)
             self.assertIn('name', exer)
@@ -387,7 +392,7 @@ class ExerciseUpdateTest(TestCase):
         URL = GET_EXERCISE_DETAIL_URL(self.exercise.id)
         self.client.patch(URL, payload)
         res = self.client.get(EXERCISE_LIST_CREATE_URL)
-        ids = [exer['id'] for exer in res.data]
+        ids = [exer['id'] for exer in res.data['results']]
         self.assertIn(self.exercise.id, ids)
 
     def test_update_name_with_case_insensitive_error(self):
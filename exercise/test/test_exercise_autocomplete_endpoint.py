@@ -0,0 +1,232 @@
+"""
+This file is for testing the autocomplete of the exercise names
+- Classes:
+    - PrefixIndexTest: For the in-memory index of the names of a user
+    - AutocompleteCacheTest: For the LRU cache of the indexes
+    - ExerciseAutocompleteTest: For the autocomplete endpoint
+- Helper functions:
+    - create_user: creates a user and returns it
+    - create_exercise: create an exercise with specific user and name
+- static variables:
+    - EXERCISE_AUTOCOMPLETE_URL: the url for the autocomplete endpoint
+    - EXERCISE_LOG_BULK_URL: the url for the bulk creation endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from exercise.autocomplete import (
+    AutocompleteCache,
+    PrefixIndex,
+    autocomplete_cache
+)
+from exercise.models import Exercise
+from workout.models import WorkoutLog
+EXERCISE_AUTOCOMPLETE_URL = reverse('exercise:exercise-autocomplete')
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_exercise(name=None, user=None):
+    """A helper method to create an exercise with certain user"""
+    return Exercise.objects.create(name=name, user=user)
+
+
+class PrefixIndexTest(SimpleTestCase):
+    """Test class for the in-memory index of the names of a user"""
+
+    def setUp(self):
+        self.index = PrefixIndex([
+            (1, 'Incline Bench Press'),
+            (2, 'Bench Press'),
+            (3, 'Bench'),
+            (4, 'Push Up'),
+        ])
+
+    def test_prefix_ranked_suc(self):
+        """
+        Test SUCCESS: names starting with the prefix come first,
+        then the shortest names
+        """
+        self.assertEqual(self.index.search('bench', 10),
+                         [(3, 'Bench'), (2, 'Bench Press'),
+                          (1, 'Incline Bench Press')])
+
+    def test_prefix_of_a_word_suc(self):
+        """Test SUCCESS: any word of the name can match the prefix"""
+        self.assertEqual(self.index.search('PRE', 10),
+                         [(2, 'Bench Press'), (1, 'Incline Bench Press')])
+        self.assertEqual(self.index.search('bench  pr', 10),
+                         [(2, 'Bench Press'), (1, 'Incline Bench Press')])
+
+    def test_limit_suc(self):
+        """Test SUCCESS: only the best `limit` matches are returned"""
+        self.assertEqual(self.index.search('b', 2),
+                         [(3, 'Bench'), (2, 'Bench Press')])
+
+    def test_no_match_suc(self):
+        """Test SUCCESS: a prefix in the middle of a word does not match"""
+        self.assertEqual(self.index.search('ench', 10), [])
+
+    def test_add_rename_and_remove_suc(self):
+        """Test SUCCESS: the index follows the changes of the names"""
+        self.assertEqual(self.index.search('s', 10), [])
+        self.index.add(5, 'Bench Dip')
+        self.index.add(3, 'Squat')
+        self.index.remove(2)
+        self.index.remove(99)
+        self.assertEqual(self.index.search('bench', 10),
+                         [(5, 'Bench Dip'), (1, 'Incline Bench Press')])
+        self.assertEqual(self.index.search('squ', 10), [(3, 'Squat')])
+        self.assertEqual(self.index.search('s', 10), [(3, 'Squat')])
+        self.assertEqual(len(self.index), 4)
+
+
+class AutocompleteCacheTest(TestCase):
+    """Test class for the LRU cache of the indexes"""
+
+    def setUp(self):
+        self.users = [create_user(email=f"u{i}@gmail.com") for i in range(3)]
+        for user in self.users:
+            create_exercise(name='Squat', user=user)
+
+    def test_least_recently_used_dropped_suc(self):
+        """Test SUCCESS: the least recently used index is dropped first"""
+        cache = AutocompleteCache(max_users=2, ttl=60)
+        cache.search(self.users[0].id, 's', 10)
+        cache.search(self.users[1].id, 's', 10)
+        cache.search(self.users[0].id, 's', 10)
+        cache.search(self.users[2].id, 's', 10)
+        self.assertEqual(len(cache), 2)
+        self.assertIn(self.users[0].id, cache)
+        self.assertNotIn(self.users[1].id, cache)
+
+    def test_index_built_once_suc(self):
+        """Test SUCCESS: only the first search reads the database"""
+        cache = AutocompleteCache(max_users=2, ttl=60)
+        with self.assertNumQueries(1):
+            cache.search(self.users[0].id, 's', 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(cache.search(self.users[0].id, 's', 10)),
+                             1)
+
+    def test_expired_index_rebuilt_suc(self):
+        """Test SUCCESS: an index is built again after its ttl"""
+        cache = AutocompleteCache(max_users=2, ttl=60)
+        with mock.patch('exercise.autocomplete.monotonic', return_value=0):
+            cache.search(self.users[0].id, 's', 10)
+        with mock.patch('exercise.autocomplete.monotonic', return_value=60):
+            with self.assertNumQueries(1):
+                cache.search(self.users[0].id, 's', 10)
+
+    def test_changed_while_building_not_kept_suc(self):
+        """Test SUCCESS: an index built while an exercise of its user
+        is added is not kept, the next search sees the exercise"""
+        cache = AutocompleteCache(max_users=2, ttl=60)
+        user = self.users[0]
+
+        def added_while_building(exercises):
+            index = PrefixIndex(exercises)
+            cache.add_exercises([create_exercise(name='Step up',
+                                                 user=user)])
+            return index
+
+        with mock.patch('exercise.autocomplete.PrefixIndex',
+                        added_while_building):
+            cache.search(user.id, 's', 10)
+        self.assertNotIn(user.id, cache)
+        self.assertEqual(len(cache.search(user.id, 's', 10)), 2)
+        self.assertIn(user.id, cache)
+
+    def test_zero_size_caches_nothing_suc(self):
+        """Test SUCCESS: a cache with no size does not keep indexes"""
+        cache = AutocompleteCache(max_users=0, ttl=60)
+        self.assertEqual(len(cache.search(self.users[0].id, 's', 10)), 1)
+        self.assertEqual(len(cache), 0)
+
+
+class ExerciseAutocompleteTest(TestCase):
+    """Test class for the autocomplete endpoint"""
+
+    def setUp(self):
+        autocomplete_cache.clear()
+        self.user = create_user()
+        self.tmp_user = create_user(email='tmp@gmail.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.bench = create_exercise(name='Bench Press', user=self.user)
+        self.incline = create_exercise(name='Incline Bench Press',
+                                       user=self.user)
+        create_exercise(name='Bench Press', user=self.tmp_user)
+
+    def autocomplete(self, name, **params):
+        res = self.client.get(EXERCISE_AUTOCOMPLETE_URL,
+                              {'name': name, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [exercise['name'] for exercise in res.data]
+
+    def test_autocomplete_with_nonauth_user_error(self):
+        """Test ERROR: autocomplete with an unauthinticated user"""
+        self.client.force_authenticate(None)
+        res = self.client.get(EXERCISE_AUTOCOMPLETE_URL, {'name': 'b'})
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_autocomplete_ranked_suc(self):
+        """Test SUCCESS: only the user exercises, ranked by prefix"""
+        res = self.client.get(EXERCISE_AUTOCOMPLETE_URL, {'name': 'bench'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [
+            {'id': self.bench.id, 'name': 'Bench Press'},
+            {'id': self.incline.id, 'name': 'Incline Bench Press'},
+        ])
+
+    def test_autocomplete_limit_suc(self):
+        """Test SUCCESS: the number of names is limited"""
+        self.assertEqual(self.autocomplete('bench', limit=1),
+                         ['Bench Press'])
+
+    def test_autocomplete_without_queries_suc(self):
+        """Test SUCCESS: the keystrokes after the first one are in memory"""
+        self.autocomplete('b')
+        with self.assertNumQueries(0):
+            self.autocomplete('be')
+            self.autocomplete('ben')
+
+    def test_autocomplete_invalid_params_error(self):
+        """Test ERROR: the name is required and the limit bounded"""
+        res = self.client.get(EXERCISE_AUTOCOMPLETE_URL)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.get(EXERCISE_AUTOCOMPLETE_URL,
+                              {'name': 'b', 'limit': 51})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_after_create_rename_delete_suc(self):
+        """Test SUCCESS: the index follows the changes of the exercises"""
+        self.autocomplete('bench')
+        create_exercise(name='Bench Dip', user=self.user)
+        self.incline.name = 'Decline Press'
+        self.incline.save()
+        self.bench.delete()
+        self.assertEqual(self.autocomplete('bench'), ['Bench Dip'])
+        self.assertEqual(self.autocomplete('press'), ['Decline Press'])
+
+    def test_autocomplete_after_bulk_create_suc(self):
+        """Test SUCCESS: exercises created by bulk logs are indexed"""
+        self.autocomplete('bench')
+        workout_log = WorkoutLog.objects.create(user=self.user, name='w')
+        res = self.client.post(EXERCISE_LOG_BULK_URL, {'logs': [{
+            'workout_log': workout_log.id,
+            'exercise_name': 'Bench Row'}]}, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertIn('Bench Row', self.autocomplete('bench'))
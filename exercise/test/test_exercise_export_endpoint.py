@@ -0,0 +1,197 @@
+"""
+This file is for testing the export endpoint
+- Classes:
+    - ExerciseExportEndpointTest: For exporting the training history
+    as CSV or NDJSON, gzipped or not
+    - ExerciseExportASGITest: For streaming the export from the ASGI
+    application of core/asgi.py
+- Helper functions:
+    - create_user: creates a user and returns it
+    - content: the body of a streamed response
+- static variables:
+    - EXPORT_URL: the url of the export endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+import csv
+import gzip
+import json
+import warnings
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core.test.asgi import asgi_get
+from exercise.export import COLUMNS
+from exercise.models import Exercise, ExerciseLog
+from workout.models import WorkoutLog
+
+EXPORT_URL = reverse('exercise:exercise-export')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def content(response):
+    """The body of a streamed response"""
+    return b''.join(response.streaming_content)
+
+
+class ExerciseExportEndpointTest(TestCase):
+    """Test class for the export endpoint"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_logs = [
+            WorkoutLog.objects.create(user=self.user, name=f"day {i}")
+            for i in range(3)]
+        squat = Exercise.objects.create(name='squat', user=self.user)
+        run = Exercise.objects.create(name='run', user=self.user)
+        self.logs = [
+            ExerciseLog.objects.create(
+                user=self.user, exercise=squat,
+                workout_log=self.workout_logs[0], number_of_sets=3,
+                number_of_reps=10, weight_in_kg=60, notes='felt "good", ok'),
+            ExerciseLog.objects.create(
+                user=self.user, exercise=run,
+                workout_log=self.workout_logs[0], duration_in_minutes=20),
+            ExerciseLog.objects.create(
+                user=self.user, exercise=squat,
+                workout_log=self.workout_logs[2], number_of_sets=5,
+                number_of_reps=5, weight_in_kg=80),
+        ]
+        other_user = create_user(email='other@gmail.com')
+        ExerciseLog.objects.create(
+            user=other_user,
+            exercise=Exercise.objects.create(name='squat', user=other_user),
+            workout_log=WorkoutLog.objects.create(user=other_user))
+
+    def test_export_csv_suc(self):
+        """Test SUCCESS: a CSV file with a row for each log and for each
+        workout log without logs, in order"""
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(res['Content-Disposition'],
+                         'attachment; filename="training_history.csv"')
+        rows = list(csv.DictReader(StringIO(content(res).decode())))
+        self.assertEqual(tuple(rows[0]), COLUMNS)
+        self.assertEqual(
+            [(row['workout_log_name'], row['exercise_log_id'])
+             for row in rows],
+            [('day 0', str(self.logs[0].id)), ('day 0', str(self.logs[1].id)),
+             ('day 1', ''), ('day 2', str(self.logs[2].id))])
+        self.assertEqual(rows[0]['exercise_name'], 'squat')
+        self.assertEqual(rows[0]['weight_in_kg'], '60')
+        self.assertEqual(rows[0]['notes'], 'felt "good", ok')
+        self.assertEqual(rows[1]['weight_in_kg'], '')
+        self.assertEqual(rows[0]['exercise_log_created_at'],
+                         self.logs[0].created_at.isoformat())
+
+    def test_export_ndjson_suc(self):
+        """Test SUCCESS: a JSON object on each line"""
+        res = self.client.get(EXPORT_URL, {'file_format': 'ndjson'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line)
+                for line in content(res).decode().splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(tuple(rows[0]), COLUMNS)
+        self.assertEqual(rows[0]['exercise_log_id'], self.logs[0].id)
+        self.assertEqual(rows[0]['number_of_sets'], 3)
+        self.assertIsNone(rows[2]['exercise_log_id'])
+        self.assertEqual(rows[3]['workout_log_id'], self.workout_logs[2].id)
+
+    def test_export_gzip_suc(self):
+        """Test SUCCESS: the gzipped file holds the same rows"""
+        for export_format in ('csv', 'ndjson'):
+            plain = content(self.client.get(
+                EXPORT_URL, {'file_format': export_format}))
+            res = self.client.get(
+                EXPORT_URL, {'file_format': export_format, 'gzip': 'true'})
+            self.assertEqual(res['Content-Type'], 'application/gzip')
+            self.assertEqual(
+                res['Content-Disposition'],
+                f'attachment; filename="training_history.{export_format}.gz"')
+            self.assertEqual(gzip.decompress(content(res)), plain)
+
+    @override_settings(EXPORT_CURSOR_ROWS=1, EXPORT_CHUNK_BYTES=1)
+    def test_export_small_chunks_suc(self):
+        """Test SUCCESS: the rows are read and sent in small chunks with
+        the same file, in one query"""
+        with self.settings(EXPORT_CURSOR_ROWS=2000,
+                           EXPORT_CHUNK_BYTES=65536):
+            expected = content(self.client.get(EXPORT_URL))
+        res = self.client.get(EXPORT_URL)
+        with CaptureQueriesContext(connection) as context:
+            chunks = list(res.streaming_content)
+        # the header and the 4 rows
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(b''.join(chunks), expected)
+        self.assertEqual(len(context), 1)
+
+    def test_export_empty_suc(self):
+        """Test SUCCESS: a user without workout logs gets the header"""
+        self.client.force_authenticate(create_user(email='new@gmail.com'))
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(content(res).decode().strip(), ','.join(COLUMNS))
+        res = self.client.get(EXPORT_URL, {'file_format': 'ndjson'})
+        self.assertEqual(content(res), b'')
+
+    def test_export_format_error(self):
+        """Test ERROR: an unknown format"""
+        res = self.client.get(EXPORT_URL, {'file_format': 'xml'})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('file_format', res.data)
+
+    def test_export_unauthenticated_error(self):
+        """Test ERROR: the export needs a user"""
+        res = APIClient().get(EXPORT_URL)
+        self.assertEqual(res.status_code, 401)
+
+
+class ExerciseExportASGITest(TransactionTestCase):
+    """Test class for streaming the export under core/asgi.py"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        workout_log = WorkoutLog.objects.create(user=self.user, name='day')
+        squat = Exercise.objects.create(name='squat', user=self.user)
+        for _ in range(4):
+            ExerciseLog.objects.create(user=self.user, exercise=squat,
+                                       workout_log=workout_log)
+
+    @override_settings(EXPORT_CURSOR_ROWS=1, EXPORT_CHUNK_BYTES=1)
+    async def test_export_streamed_suc(self):
+        """Test SUCCESS: the chunks are sent as they are read, with the
+        same file as the sync view"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        expected = await sync_to_async(
+            lambda: content(client.get(EXPORT_URL)))()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            res = await asgi_get(EXPORT_URL, self.token.key)
+        self.assertEqual(res.status, 200)
+        self.assertEqual(res.headers['content-type'],
+                         'text/csv; charset=utf-8')
+        # the header and the 4 rows
+        self.assertEqual(len(res.chunks), 5)
+        self.assertEqual(res.content, expected)
+        # django warns when it reads a sync iterator into a list
+        self.assertFalse([warning for warning in caught
+                          if 'synchronous iterators' in str(warning.message)])
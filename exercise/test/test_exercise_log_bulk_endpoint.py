@@ -0,0 +1,193 @@
+"""
+This file is for testing the bulk creation of exercise logs
+- Classes:
+    - ExerciseLogBulkCreationTest: For the bulk creation endpoint
+- Helper functions:
+    - create_user: creates a user and returns it
+    - create_exercise: create an exercise with specific user and name
+    - create_workout_log: create a workout_log with specific user
+- static variables:
+    - EXERCISE_LOG_BULK_URL: the url for the bulk creation endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from exercise.models import Exercise, ExerciseLog, ExerciseProgress
+from workout.models import WorkoutLog
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+EXERCISE_PROGRESS_URL = reverse('exercise:exercise-progress')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_exercise(name=None, user=None):
+    """A helper method to create an exercise
+    with certain user"""
+    return Exercise.objects.create(name=name, user=user)
+
+
+def create_workout_log(user=None, name='default_name'):
+    """Helper method to create a workoutlog"""
+    return WorkoutLog.objects.create(user=user, name=name)
+
+
+class ExerciseLogBulkCreationTest(TestCase):
+    """class for the test operation related to the bulk creation"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.tmp_user = create_user(email='tmp@gmail.com')
+        self.client = APIClient()
+        self.workout_log = create_workout_log(user=self.user)
+        self.other_workout_log = create_workout_log(user=self.user)
+        self.exercise = create_exercise(name='Bench Press', user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_with_nonauth_user_error(self):
+        """
+        Test ERROR: bulk creating with an unauthinticated user"""
+        tmp_client = APIClient()
+        payload = {'logs': [{'workout_log': self.workout_log.id,
+                             'exercise_name': 'Bench Press'}]}
+        res = tmp_client.post(EXERCISE_LOG_BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_create_suc(self):
+        """
+        Test SUCCESS: creating logs for many workouts and exercises,
+        existing exercises are found case-insensitively"""
+        payload = {'logs': [
+            {'workout_log': self.workout_log.id,
+             'exercise_name': 'bench press', 'number_of_sets': 3,
+             'number_of_reps': 8, 'rest_between_sets_seconds': 2,
+             'rest_is_in_minutes': True, 'weight_in_kg': 60},
+            {'workout_log': self.workout_log.id,
+             'exercise_name': 'Squat', 'number_of_sets': 1,
+             'number_of_reps': 5},
+            {'workout_log': self.other_workout_log.id,
+             'exercise_name': 'squat', 'duration_in_minutes': 10,
+             'notes': 'note'},
+        ]}
+        res = self.client.post(EXERCISE_LOG_BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        self.assertEqual(res.data[0]['exercise']['id'], self.exercise.id)
+        self.assertEqual(res.data[0]['rest_between_sets_seconds'], 120)
+        self.assertEqual(res.data[1]['rest_between_sets_seconds'], 0)
+        self.assertEqual(res.data[1]['exercise']['name'], 'Squat')
+        self.assertEqual(res.data[1]['exercise']['id'],
+                         res.data[2]['exercise']['id'])
+        self.assertEqual(res.data[2]['workout_log'],
+                         self.other_workout_log.id)
+        self.assertEqual(res.data[2]['notes'], 'note')
+        self.assertEqual(
+            Exercise.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(
+            ExerciseLog.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_create_fixed_number_of_queries_suc(self):
+        """
+        Test SUCCESS: the number of queries does not depend
+        on the number of logs"""
+        def payload(count):
+            return {'logs': [
+                {'workout_log': [self.workout_log.id,
+                                 self.other_workout_log.id][i % 2],
+                 'exercise_name': f"exer {i % 20}",
+                 'number_of_sets': 3, 'weight_in_kg': i}
+                for i in range(count)]}
+
+        with CaptureQueriesContext(connection) as small:
+            res = self.client.post(EXERCISE_LOG_BULK_URL, payload(10),
+                                   format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.post(EXERCISE_LOG_BULK_URL, payload(500),
+                                   format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(small), len(large))
+        # with the queries refreshing the rollups of the exercises and
+        # the totals of the workout logs, each one after locking them
+        self.assertLessEqual(len(large), 16)
+        self.assertEqual(
+            ExerciseLog.objects.filter(user=self.user).count(), 510)
+
+    def test_bulk_create_updates_progress_suc(self):
+        """
+        Test SUCCESS: the stored progress is updated with the new logs"""
+        res = self.client.get(EXERCISE_PROGRESS_URL,
+                              {'exercise_id': self.exercise.id})
+        self.assertEqual(len(res.data['progress']), 0)
+        self.assertTrue(ExerciseProgress.objects.filter(
+            exercise=self.exercise).exists())
+        payload = {'logs': [
+            {'workout_log': self.workout_log.id,
+             'exercise_name': 'Bench Press', 'weight_in_kg': weight}
+            for weight in [50, 50, 55]]}
+        self.client.post(EXERCISE_LOG_BULK_URL, payload, format='json')
+        res = self.client.get(EXERCISE_PROGRESS_URL,
+                              {'exercise_id': self.exercise.id})
+        weights = [value for value, _, _ in
+                   res.data['progress']['weight_in_kg']]
+        self.assertEqual(weights, [50, 55])
+        self.assertEqual(
+            res.data['progress']['number_exercises_between_each_weight_in_kg'],
+            [1])
+
+    def test_bulk_create_errors_per_log_error(self):
+        """
+        Test ERROR: errors are returned for each log by its position
+        and nothing is created"""
+        other_workout = create_workout_log(user=self.tmp_user)
+        payload = {'logs': [
+            {'workout_log': self.workout_log.id,
+             'exercise_name': 'Bench Press'},
+            {'workout_log': self.workout_log.id,
+             'exercise_name': '1bad'},
+            {'workout_log': self.workout_log.id,
+             'exercise_name': 'Squat', 'number_of_reps': 3},
+        ]}
+        res = self.client.post(EXERCISE_LOG_BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['logs']
+        self.assertNotIn(0, errors)
+        self.assertIn('Name must start with a letter.',
+                      errors[1]['exercise_name'])
+        self.assertIn(
+            "you can not have reps without a set. at least one set",
+            errors[2]['non_field_errors'])
+
+        payload = {'logs': [
+            {'workout_log': other_workout.id, 'exercise_name': 'Squat'},
+            {'workout_log': self.workout_log.id, 'exercise_name': 'Squat'},
+        ]}
+        res = self.client.post(EXERCISE_LOG_BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("You can only add logs to your own workout logs",
+                      res.data['logs'][0]['workout_log'])
+        self.assertNotIn(1, res.data['logs'])
+        self.assertFalse(ExerciseLog.objects.exists())
+        self.assertFalse(Exercise.objects.filter(name='Squat').exists())
+
+    def test_bulk_create_empty_or_too_many_error(self):
+        """
+        Test ERROR: sending no logs or more logs than allowed"""
+        res = self.client.post(EXERCISE_LOG_BULK_URL, {'logs': []},
+                               format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        payload = {'logs': [{'workout_log': self.workout_log.id,
+                             'exercise_name': 'Squat'}] * 1001}
+        res = self.client.post(EXERCISE_LOG_BULK_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
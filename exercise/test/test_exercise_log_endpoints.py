@@ -26,6 +26,7 @@ actions and constrains on the Exercise endpoints
     - test_...._error: mean that the test is meant to fail the operation
     it meant to do
 """
+from types import SimpleNamespace
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -33,7 +34,11 @@ from django.test import TestCase
 from django.urls import reverse
 from exercise.models import (
     Exercise,
-    ExerciseLog
+    ExerciseLog,
+    ExerciseNameTrigram
+)
+from exercise.serializers.Exercise_Log_serializers import (
+    get_or_create_exercises
 )
 from workout.models import WorkoutLog
 EXERCISE_LOG_LIST_CREATE_URL = reverse('exercise:exerciselog-list')
@@ -198,6 +203,23 @@ class ExerciseLogCreationTest(TestCase):
         self.assertEqual(res.data['exercise']['name'], new_exercise.name)
         self.assertFalse(new_exercise.description)
         self.assertEqual(new_exercise.user, self.user)
+        # the created exercise is indexed for the search
+        self.assertTrue(ExerciseNameTrigram.objects.filter(
+            exercise=new_exercise).exists())
+
+    def test_get_or_create_exercises_memo_suc(self):
+        """
+        Test SUCCESS: the exercises resolved during a request are
+        remembered, resolving them again runs no query
+        """
+        request = SimpleNamespace(user=self.user)
+        exercises = get_or_create_exercises(
+            request, ['DefaultExercise', 'new exercise'])
+        self.assertEqual(exercises['defaultexercise'], self.exercise)
+        with self.assertNumQueries(0):
+            again = get_or_create_exercises(
+                request, ['new exercise ', 'defaultexercise'])
+        self.assertEqual(again, exercises)
 
     def test_create_exercise_log_with_valid_name_cases_suc(self):
         """
@@ -502,8 +524,9 @@ class ExerciseLogRetrieveListTest(TestCase):
                                         notes='note3')
         res = self.client.get(EXERCISE_LOG_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        exer_log_ids = [exer_log['id'] for exer_log in res.data]
-        exer_log_notes = [exer_log['notes'] for exer_log in res.data]
+        results = res.data['results']
+        exer_log_ids = [exer_log['id'] for exer_log in results]
+        exer_log_notes = [exer_log['notes'] for exer_log in results]
         self.assertIn(exer_log1.id, exer_log_ids)
         self.assertIn(exer_log2.id, exer_log_ids)
         self.assertIn(exer_log1.notes, exer_log_notes)
@@ -2,6 +2,8 @@
 This file is for testing the track exercise progress operation
 - Classes:
     - ExerciseProgressTest: For creation related operations
+    - ExerciseProgressStoreTest: For keeping the stored progress
+    up to date with the exercise logs
 - Helper functions:
     - create_user: creates a user and returns it
     - create_exercise: create an exercise with specific user and name
@@ -16,10 +18,18 @@ This file is for testing the track exercise progress operation
     it meant to do
 """
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.urls import reverse
-from exercise.models import Exercise, ExerciseLog
+from exercise.models import Exercise, ExerciseLog, ExerciseProgress
+from exercise.progress import (
+    extract_progress,
+    stream_progress,
+    PROGRESS_ROW_FIELDS
+)
+from exercise.serializers import ExerciseLogProgressListSerializer
 from workout.models import WorkoutLog
 EXERCISE_PROGRESS_URL = reverse('exercise:exercise-progress')
 
@@ -401,3 +411,190 @@ class ExerciseProgressTest(APITestCase):
         for i in range(len(counts_progress)):
             self.assertEqual(counts_progress[i],
                              duration_in_minutes_counter[i])
+
+
+class ExerciseProgressStoreTest(APITestCase):
+    """
+    Test class for the stored progress, it has to be the same as
+    extracting the progress from all the logs after any change
+    """
+
+    def setUp(self):
+        self.user = create_user()
+        self.workout_log = create_workout_log(user=self.user)
+        self.other_workout_log = create_workout_log(user=self.user)
+        self.exercise = create_exercise(name='exer1', user=self.user)
+        self.other_exercise = create_exercise(name='exer2', user=self.user)
+        self.client.force_authenticate(self.user)
+        weights = [10, 10, 20, None, 20, 30, 30, 25]
+        sets = [3, 3, 4, 4, None, 4, 5, 5]
+        self.logs = list()
+        for i in range(len(weights)):
+            workout = self.workout_log if i < 4 else self.other_workout_log
+            self.logs.append(create_exercise_log(
+                user=self.user, exercise=self.exercise, workout=workout,
+                weight_in_kg=weights[i], number_of_sets=sets[i],
+                number_of_reps=8, duration_in_minutes=i % 3))
+
+    def get_progress(self, exercise):
+        """Helper method to get the progress from the endpoint"""
+        res = self.client.get(EXERCISE_PROGRESS_URL,
+                              {'exercise_id': exercise.id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['progress']
+
+    def extracted_progress(self, exercise):
+        """Helper method to extract the progress from all the logs"""
+        logs = ExerciseLog.objects.filter(
+            user=self.user, exercise=exercise).order_by('created_at', 'id')
+        return extract_progress(
+            ExerciseLogProgressListSerializer(logs, many=True).data)
+
+    def test_progress_stored_on_create_suc(self):
+        """
+        Test SUCCESS: the progress is stored while creating the logs
+        """
+        record = ExerciseProgress.objects.get(user=self.user,
+                                              exercise=self.exercise)
+        self.assertEqual(record.last_log_id, self.logs[-1].id)
+        self.assertEqual(record.load()[0],
+                         self.extracted_progress(self.exercise))
+        self.assertEqual(self.get_progress(self.exercise),
+                         self.extracted_progress(self.exercise))
+
+    def test_stream_progress_same_as_extract_suc(self):
+        """
+        Test SUCCESS: streaming the progress over the rows gives the same
+        progress as extracting it from the serialized logs
+        """
+        values = [None, 0, 1, 2, 2]
+        for i in range(60):
+            create_exercise_log(user=self.user, exercise=self.exercise,
+                                workout=self.workout_log,
+                                number_of_sets=values[i % 5],
+                                number_of_reps=values[i // 5 % 5],
+                                rest_between_sets_seconds=values[i // 2 % 5],
+                                duration_in_minutes=values[i // 3 % 5],
+                                weight_in_kg=values[i // 7 % 5])
+        rows = ExerciseLog.objects.filter(
+            user=self.user, exercise=self.exercise)\
+            .order_by('created_at', 'id').values_list(*PROGRESS_ROW_FIELDS)
+        all_progress, _, last_row = stream_progress(rows.iterator())
+        self.assertEqual(all_progress, self.extracted_progress(self.exercise))
+        self.assertEqual(last_row[-1], ExerciseLog.objects.latest('id').id)
+
+    def test_progress_constant_queries_suc(self):
+        """
+        Test SUCCESS: the number of queries does not depend
+        on the number of logs
+        """
+        with self.assertNumQueries(2):
+            self.get_progress(self.exercise)
+        for _ in range(5):
+            create_exercise_log(user=self.user, exercise=self.exercise,
+                                workout=self.workout_log, weight_in_kg=40)
+        with self.assertNumQueries(2):
+            self.get_progress(self.exercise)
+
+    def test_progress_update_middle_log_suc(self):
+        """
+        Test SUCCESS: updating a log in the middle of the history
+        """
+        log = self.logs[3]
+        log.weight_in_kg = 50
+        log.number_of_sets = 2
+        log.save()
+        self.assertEqual(self.get_progress(self.exercise),
+                         self.extracted_progress(self.exercise))
+        self.assertIn((50, log.created_at.strftime("%Y-%m-%d"),
+                       self.workout_log.id),
+                      self.get_progress(self.exercise)['weight_in_kg'])
+
+    def test_progress_change_exercise_of_log_suc(self):
+        """
+        Test SUCCESS: moving a log to another exercise updates
+        the progress of both exercises
+        """
+        log = self.logs[2]
+        log.exercise = self.other_exercise
+        log.save()
+        self.assertEqual(self.get_progress(self.exercise),
+                         self.extracted_progress(self.exercise))
+        self.assertEqual(self.get_progress(self.other_exercise),
+                         self.extracted_progress(self.other_exercise))
+        self.assertEqual(
+            len(self.get_progress(self.other_exercise)['weight_in_kg']), 1)
+
+    def test_progress_delete_middle_log_suc(self):
+        """
+        Test SUCCESS: deleting a log in the middle of the history
+        """
+        self.logs[2].delete()
+        self.logs[5].delete()
+        self.assertEqual(self.get_progress(self.exercise),
+                         self.extracted_progress(self.exercise))
+
+    def test_progress_delete_workout_log_suc(self):
+        """
+        Test SUCCESS: deleting a workout log deletes its logs
+        from the progress
+        """
+        self.other_workout_log.delete()
+        progress = self.get_progress(self.exercise)
+        self.assertEqual(progress, self.extracted_progress(self.exercise))
+        for field in ['weight_in_kg', 'sets_reps_restTime']:
+            for _, _, workout_log in progress[field]:
+                self.assertEqual(workout_log, self.workout_log.id)
+
+    def test_progress_delete_cascade_once_suc(self):
+        """
+        Test SUCCESS: deleting a workout log rebuilds the progress of
+        each of its exercises once, deleting an exercise does not
+        rebuild the progress deleted with it
+        """
+        for _ in range(20):
+            create_exercise_log(user=self.user, exercise=self.exercise,
+                                workout=self.other_workout_log,
+                                weight_in_kg=40)
+        create_exercise_log(user=self.user, exercise=self.other_exercise,
+                            workout=self.other_workout_log, weight_in_kg=40)
+
+        def progress_updates(context):
+            return [query for query in context if query['sql'].startswith(
+                'UPDATE "exercise_exerciseprogress"')]
+
+        with CaptureQueriesContext(connection) as context:
+            self.other_workout_log.delete()
+        self.assertEqual(len(progress_updates(context)), 2)
+        self.assertEqual(self.get_progress(self.exercise),
+                         self.extracted_progress(self.exercise))
+        self.assertEqual(len(self.get_progress(self.other_exercise)), 0)
+
+        with CaptureQueriesContext(connection) as context:
+            self.exercise.delete()
+        self.assertEqual(progress_updates(context), [])
+
+    def test_progress_delete_all_logs_suc(self):
+        """
+        Test SUCCESS: deleting all the logs leaves an empty progress
+        """
+        ExerciseLog.objects.filter(exercise=self.exercise).delete()
+        self.assertEqual(len(self.get_progress(self.exercise)), 0)
+
+    def test_progress_delete_exercise_suc(self):
+        """
+        Test SUCCESS: deleting an exercise deletes its progress
+        """
+        self.exercise.delete()
+        self.assertFalse(ExerciseProgress.objects.filter(
+            user=self.user).exclude(exercise=self.other_exercise).exists())
+
+    def test_progress_built_when_not_stored_suc(self):
+        """
+        Test SUCCESS: the progress is built if it was not stored
+        """
+        ExerciseProgress.objects.all().delete()
+        self.assertEqual(self.get_progress(self.exercise),
+                         self.extracted_progress(self.exercise))
+        self.assertTrue(ExerciseProgress.objects.filter(
+            user=self.user, exercise=self.exercise).exists())
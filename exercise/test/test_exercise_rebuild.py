@@ -0,0 +1,192 @@
+"""
+This file is for testing the rebuild_derived command
+- Classes:
+    - RebuildDerivedTest: For rebuilding the derived data of the users
+    in this process and resuming an interrupted run
+    - RebuildDerivedWorkersTest: For rebuilding with worker processes,
+    a TransactionTestCase so the workers see the committed rows
+- Helper functions:
+    - create_user: creates a user and returns it
+    - create_logs: creates exercises and logs of a user
+    - derived: the derived data of a user
+    - corrupt: changes the derived data of all the users
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from exercise.models import (
+    Exercise,
+    ExerciseLog,
+    ExerciseNameTrigram,
+    ExerciseProgress,
+    ExerciseRollup
+)
+from exercise.rebuild import rebuild_user
+from workout.models import WorkoutLog
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_logs(user):
+    """Create two exercises with logs in two workout logs of the user"""
+    workout_logs = [WorkoutLog.objects.create(user=user) for _ in range(2)]
+    for name in ('squat', 'bench press'):
+        exercise = Exercise.objects.create(name=name, user=user)
+        for i, workout_log in enumerate(workout_logs):
+            ExerciseLog.objects.create(
+                user=user, exercise=exercise, workout_log=workout_log,
+                number_of_sets=3, number_of_reps=10 + i,
+                weight_in_kg=60 + 10 * i)
+
+
+def derived(user):
+    """The progress, workout totals, rollups and trigrams of the user"""
+    return {
+        'progress': {
+            progress.exercise_id: (progress.progress, progress.counters,
+                                   progress.last_log_id)
+            for progress in ExerciseProgress.objects.filter(user=user)},
+        'summaries': set(WorkoutLog.objects.filter(user=user).values_list(
+            'id', 'total_sets', 'total_reps', 'total_volume_kg',
+            'total_duration_minutes')),
+        'rollups': set(ExerciseRollup.objects.filter(user=user).values_list(
+            'exercise_id', 'granularity', 'period_start', 'max_weight_kg',
+            'total_volume_kg', 'session_count', 'total_duration_minutes')),
+        'search': set(ExerciseNameTrigram.objects.filter(user=user)
+                      .values_list('exercise_id', 'trigram')),
+    }
+
+
+def corrupt():
+    """Change the derived data of all the users"""
+    ExerciseProgress.objects.update(progress=[], counters={})
+    WorkoutLog.objects.update(total_sets=0, total_volume_kg=0)
+    ExerciseRollup.objects.filter(granularity='day').delete()
+    ExerciseNameTrigram.objects.filter(trigram='squ').delete()
+
+
+class RebuildDerivedTest(TestCase):
+    """Test class for rebuilding the derived data in this process"""
+
+    def setUp(self):
+        self.users = [create_user(email=f"test{i}@gmail.com")
+                      for i in range(3)]
+        for user in self.users:
+            create_logs(user)
+        self.expected = [derived(user) for user in self.users]
+        self.directory = TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.state_file = os.path.join(self.directory.name, 'state')
+
+    def rebuild(self, *args):
+        out = StringIO()
+        call_command('rebuild_derived', '--state-file', self.state_file,
+                     *args, stdout=out)
+        return out.getvalue()
+
+    def test_rebuild_all_suc(self):
+        """Test SUCCESS: the derived data of all the users is rebuilt,
+        the progress of an exercise without logs is deleted"""
+        corrupt()
+        exercise = Exercise.objects.create(name='run', user=self.users[0])
+        ExerciseProgress.objects.create(user=self.users[0], exercise=exercise)
+        self.expected[0]['search'].add((exercise.id, 'run'))
+        out = self.rebuild('--batch-size', '2')
+        self.assertEqual([derived(user) for user in self.users],
+                         self.expected)
+        self.assertIn("Rebuilding progress, summaries, rollups, search "
+                      "of 3 users", out)
+        self.assertIn("3/3 users", out)
+        self.assertIn("rows/s", out)
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_rebuild_user_suc(self):
+        """Test SUCCESS: the given users and kinds only are rebuilt"""
+        corrupt()
+        first, second, _ = self.users
+        self.rebuild('--user', str(first.id), '--only', 'summaries',
+                     '--only', 'rollups')
+        first_derived = derived(first)
+        self.assertEqual(first_derived['summaries'],
+                         self.expected[0]['summaries'])
+        self.assertEqual(first_derived['rollups'],
+                         self.expected[0]['rollups'])
+        self.assertNotEqual(first_derived['progress'],
+                            self.expected[0]['progress'])
+        self.assertNotEqual(derived(second)['summaries'],
+                            self.expected[1]['summaries'])
+
+    def test_rebuild_twice_suc(self):
+        """Test SUCCESS: rebuilding gives the same rows as the ones kept
+        up to date with the writes"""
+        rebuild_user(self.users[0].id)
+        rebuild_user(self.users[0].id, batch_size=1)
+        self.assertEqual(derived(self.users[0]), self.expected[0])
+
+    def test_resume_suc(self):
+        """Test SUCCESS: an interrupted run is resumed from the users it
+        did not rebuild"""
+        corrupt()
+        calls = list()
+
+        def interrupted(user_id, **kwargs):
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            calls.append(user_id)
+            return rebuild_user(user_id, **kwargs)
+
+        with mock.patch('exercise.management.commands.rebuild_derived.'
+                        'rebuild_user', side_effect=interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.rebuild()
+        with open(self.state_file) as file:
+            self.assertEqual(file.read().split(),
+                             [str(user.id) for user in self.users[:2]])
+
+        with mock.patch('exercise.management.commands.rebuild_derived.'
+                        'rebuild_user', side_effect=rebuild_user) as rebuild:
+            out = self.rebuild('--resume')
+        self.assertEqual([call.args[0] for call in rebuild.call_args_list],
+                         [self.users[2].id])
+        self.assertIn("of 1 users (2 already rebuilt)", out)
+        self.assertEqual(derived(self.users[2])['progress'],
+                         self.expected[2]['progress'])
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_without_resume_suc(self):
+        """Test SUCCESS: without --resume the state file is ignored"""
+        with open(self.state_file, 'w') as file:
+            file.write(f"{self.users[0].id}\n")
+        out = self.rebuild()
+        self.assertIn("of 3 users (0 already rebuilt)", out)
+
+
+class RebuildDerivedWorkersTest(TransactionTestCase):
+    """Test class for rebuilding with worker processes"""
+
+    def test_workers_suc(self):
+        """Test SUCCESS: the users rebuilt by the workers get the same
+        derived data"""
+        users = [create_user(email=f"test{i}@gmail.com") for i in range(4)]
+        for user in users:
+            create_logs(user)
+        expected = [derived(user) for user in users]
+        corrupt()
+        with TemporaryDirectory() as directory:
+            out = StringIO()
+            call_command('rebuild_derived', '--workers', '2', '--state-file',
+                         os.path.join(directory, 'state'), stdout=out)
+        self.assertEqual([derived(user) for user in users], expected)
+        self.assertIn("Rebuilt", out.getvalue())
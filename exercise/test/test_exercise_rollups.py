@@ -0,0 +1,324 @@
+"""
+This file is for testing the rollups of the exercises and the
+analytics endpoint reading them
+- Classes:
+    - ExerciseRollupTest: For keeping the rollups up to date with the
+    exercise logs and rebuilding them
+    - ExerciseAnalyticsEndpointTest: For the analytics endpoint
+- Helper functions:
+    - create_user: creates a user and returns it
+    - at: an aware datetime of a day at noon
+    - rollups: the stored rollups of a user as a dict
+- static variables:
+    - ANALYTICS_URL: the url of the analytics endpoint
+    - EXERCISE_LOG_BULK_URL: the url of the bulk exercise logs endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from datetime import date, datetime, time, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from exercise.models import Exercise, ExerciseLog, ExerciseRollup
+from exercise.rollups import rebuild_rollups, refresh_rollups
+from workout.models import WorkoutLog
+
+ANALYTICS_URL = reverse('exercise:exercise-analytics')
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def at(day):
+    """An aware datetime of the day at noon"""
+    return timezone.make_aware(datetime.combine(day, time(12)))
+
+
+def rollups(user):
+    """{(exercise_id, granularity, period_start): (max weight, volume,
+    sessions, duration)} of the stored rollups of the user"""
+    return {(rollup.exercise_id, rollup.granularity, rollup.period_start):
+            (rollup.max_weight_kg, rollup.total_volume_kg,
+             rollup.session_count, rollup.total_duration_minutes)
+            for rollup in ExerciseRollup.objects.filter(user=user)}
+
+
+class ExerciseRollupTest(TestCase):
+    """Test class for keeping the rollups up to date"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.workout_logs = [WorkoutLog.objects.create(user=self.user)
+                             for _ in range(2)]
+        self.exercise = Exercise.objects.create(name='squat', user=self.user)
+
+    def create_log(self, day, workout_log=0, exercise=None, **kwargs):
+        """Create a log as if it was created at noon of the day"""
+        with mock.patch('django.utils.timezone.now', return_value=at(day)):
+            return ExerciseLog.objects.create(
+                user=self.user, exercise=exercise or self.exercise,
+                workout_log=self.workout_logs[workout_log], **kwargs)
+
+    def test_create_logs_suc(self):
+        """Test SUCCESS: the logs are aggregated in their day, week
+        and month"""
+        # a wednesday and a friday of the same week and month
+        self.create_log(date(2024, 5, 15), number_of_sets=3,
+                        number_of_reps=10, weight_in_kg=60)
+        self.create_log(date(2024, 5, 15), workout_log=1, number_of_sets=2,
+                        number_of_reps=5, weight_in_kg=80)
+        self.create_log(date(2024, 5, 17), duration_in_minutes=20)
+        stored = rollups(self.user)
+        key = self.exercise.id
+        self.assertEqual(stored[(key, 'day', date(2024, 5, 15))],
+                         (80, 2600, 2, 0))
+        self.assertEqual(stored[(key, 'day', date(2024, 5, 17))],
+                         (None, 0, 1, 20))
+        self.assertEqual(stored[(key, 'week', date(2024, 5, 13))],
+                         (80, 2600, 2, 20))
+        self.assertEqual(stored[(key, 'month', date(2024, 5, 1))],
+                         (80, 2600, 2, 20))
+        self.assertEqual(len(stored), 4)
+
+    def test_update_log_suc(self):
+        """Test SUCCESS: the periods of an updated log are recomputed"""
+        log = self.create_log(date(2024, 5, 15), number_of_sets=3,
+                              number_of_reps=10, weight_in_kg=60)
+        log.weight_in_kg = 100
+        log.save()
+        self.assertEqual(
+            rollups(self.user)[(self.exercise.id, 'month', date(2024, 5, 1))],
+            (100, 3000, 1, 0))
+
+    def test_change_exercise_suc(self):
+        """Test SUCCESS: a log moved to another exercise leaves the
+        rollups of the old one"""
+        log = self.create_log(date(2024, 5, 15), weight_in_kg=60)
+        other = Exercise.objects.create(name='lunge', user=self.user)
+        log.exercise = other
+        log.save()
+        self.assertEqual({key[0] for key in rollups(self.user)}, {other.id})
+
+    def test_delete_log_suc(self):
+        """Test SUCCESS: the periods left without logs are deleted"""
+        log = self.create_log(date(2024, 5, 15), weight_in_kg=60)
+        self.create_log(date(2024, 5, 17), weight_in_kg=40)
+        log.delete()
+        self.assertEqual(set(rollups(self.user)), {
+            (self.exercise.id, 'day', date(2024, 5, 17)),
+            (self.exercise.id, 'week', date(2024, 5, 13)),
+            (self.exercise.id, 'month', date(2024, 5, 1))})
+        self.workout_logs[0].delete()
+        self.assertEqual(rollups(self.user), {})
+
+    def test_delete_workout_log_once_suc(self):
+        """Test SUCCESS: deleting a workout log refreshes the periods of
+        all its logs at once"""
+        other = Exercise.objects.create(name='lunge', user=self.user)
+        for i in range(20):
+            self.create_log(date(2024, 5, 1 + i), weight_in_kg=60 + i,
+                            exercise=other if i % 2 else None)
+        self.create_log(date(2024, 5, 15), workout_log=1, weight_in_kg=50)
+        with CaptureQueriesContext(connection) as context:
+            self.workout_logs[0].delete()
+        rollup_queries = [query for query in context
+                          if 'exercise_exerciserollup' in query['sql']]
+        # the upsert and the delete of the emptied periods
+        self.assertEqual(len(rollup_queries), 2)
+        self.assertEqual(set(rollups(self.user)), {
+            (self.exercise.id, 'day', date(2024, 5, 15)),
+            (self.exercise.id, 'week', date(2024, 5, 13)),
+            (self.exercise.id, 'month', date(2024, 5, 1))})
+
+    def test_refresh_locks_exercises_suc(self):
+        """Test SUCCESS: the exercises are locked before their logs are
+        read, so concurrent refreshes do not miss each other's logs"""
+        other = Exercise.objects.create(name='lunge', user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            refresh_rollups(self.user.id, [(other.id, at(date(2024, 5, 1))),
+                                           (self.exercise.id,
+                                            at(date(2024, 5, 2)))])
+        lock, read = context[0]['sql'], context[1]['sql']
+        self.assertIn('exercise_exercise', lock)
+        self.assertIn('FOR NO KEY UPDATE', lock)
+        self.assertIn('exercise_exerciselog', read)
+
+    def test_delete_exercise_suc(self):
+        """Test SUCCESS: the rollups are deleted with the exercise"""
+        self.create_log(date(2024, 5, 15), weight_in_kg=60)
+        self.exercise.delete()
+        self.assertEqual(rollups(self.user), {})
+
+    def test_periods_boundaries_suc(self):
+        """Test SUCCESS: a week across two months and years"""
+        self.create_log(date(2024, 12, 31), weight_in_kg=60)
+        self.create_log(date(2025, 1, 1), weight_in_kg=70)
+        stored = rollups(self.user)
+        self.assertEqual(
+            stored[(self.exercise.id, 'week', date(2024, 12, 30))][0], 70)
+        self.assertEqual(
+            stored[(self.exercise.id, 'month', date(2024, 12, 1))][0], 60)
+        self.assertEqual(
+            stored[(self.exercise.id, 'month', date(2025, 1, 1))][0], 70)
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_time_zone_suc(self):
+        """Test SUCCESS: the days are the days of TIME_ZONE"""
+        with mock.patch('django.utils.timezone.now', return_value=datetime(
+                2024, 6, 1, 2, tzinfo=dt_timezone.utc)):
+            ExerciseLog.objects.create(
+                user=self.user, exercise=self.exercise,
+                workout_log=self.workout_logs[0], weight_in_kg=60)
+        self.assertIn((self.exercise.id, 'month', date(2024, 5, 1)),
+                      rollups(self.user))
+
+    def test_rebuild_same_as_incremental_suc(self):
+        """Test SUCCESS: rebuilding gives the rollups kept up to date"""
+        other = Exercise.objects.create(name='lunge', user=self.user)
+        for i, day in enumerate([date(2024, 1, 31), date(2024, 2, 1),
+                                 date(2024, 2, 1), date(2024, 3, 10)]):
+            self.create_log(day, workout_log=i % 2,
+                            exercise=other if i == 2 else None,
+                            number_of_sets=i + 1, number_of_reps=8,
+                            weight_in_kg=50 + i, duration_in_minutes=i)
+        incremental = rollups(self.user)
+        ExerciseRollup.objects.update(total_volume_kg=0)
+        self.assertEqual(rebuild_rollups(self.user.id), len(incremental))
+        self.assertEqual(rollups(self.user), incremental)
+
+    def test_bulk_create_suc(self):
+        """Test SUCCESS: the bulk created logs are added to the rollups"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        res = client.post(EXERCISE_LOG_BULK_URL, {'logs': [
+            {'workout_log': self.workout_logs[0].id,
+             'exercise_name': 'Squat', 'number_of_sets': 3,
+             'number_of_reps': 10, 'weight_in_kg': 60},
+            {'workout_log': self.workout_logs[1].id,
+             'exercise_name': 'squat', 'number_of_sets': 1,
+             'number_of_reps': 1, 'weight_in_kg': 100}]}, format='json')
+        self.assertEqual(res.status_code, 201)
+        today = timezone.localdate()
+        self.assertEqual(
+            rollups(self.user)[(self.exercise.id, 'day', today)],
+            (100, 1900, 2, 0))
+
+    def test_rebuild_command_suc(self):
+        """Test SUCCESS: the command rebuilds the rollups of all the
+        users or of the given ones"""
+        self.create_log(date(2024, 5, 15), weight_in_kg=60)
+        expected = rollups(self.user)
+        other_user = create_user(email='other@gmail.com')
+        ExerciseRollup.objects.all().delete()
+        ExerciseRollup.objects.create(
+            user=other_user, granularity='day', period_start=date(2024, 1, 1),
+            exercise=Exercise.objects.create(name='run', user=other_user))
+
+        out = StringIO()
+        call_command('rebuild_rollups', '--user', str(self.user.id),
+                     stdout=out)
+        self.assertEqual(rollups(self.user), expected)
+        self.assertIn("Rebuilt 3 rollups of 1 users", out.getvalue())
+        self.assertTrue(rollups(other_user))
+        call_command('rebuild_rollups', stdout=out)
+        self.assertEqual(rollups(other_user), {})
+        self.assertEqual(rollups(self.user), expected)
+
+
+class ExerciseAnalyticsEndpointTest(TestCase):
+    """Test class for the analytics endpoint"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.exercise = Exercise.objects.create(name='squat', user=self.user)
+        ExerciseRollup.objects.bulk_create([
+            ExerciseRollup(user=self.user, exercise=self.exercise,
+                           granularity=granularity, period_start=start,
+                           max_weight_kg=60, total_volume_kg=1800,
+                           session_count=1)
+            for granularity, start in [
+                ('day', date(2024, 5, 15)), ('day', date(2024, 6, 3)),
+                ('week', date(2024, 5, 13)), ('week', date(2024, 6, 3)),
+                ('month', date(2024, 5, 1)), ('month', date(2024, 6, 1))]])
+
+    def get(self, **params):
+        return self.client.get(ANALYTICS_URL, params)
+
+    def test_analytics_suc(self):
+        """Test SUCCESS: the rollups of the range in order"""
+        res = self.get(exercise_id=self.exercise.id, granularity='day',
+                       start='2024-05-01', end='2024-06-30')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['exercise_name'], 'squat')
+        self.assertEqual([rollup['period_start'] for rollup
+                          in res.data['rollups']],
+                         ['2024-05-15', '2024-06-03'])
+        self.assertEqual(res.data['rollups'][0], {
+            'period_start': '2024-05-15', 'max_weight_kg': 60,
+            'total_volume_kg': 1800, 'session_count': 1,
+            'total_duration_minutes': 0})
+
+    def test_analytics_range_suc(self):
+        """Test SUCCESS: a period starting before the start is included,
+        a period after the end is not"""
+        res = self.get(exercise_id=self.exercise.id, granularity='week',
+                       start='2024-05-15', end='2024-06-02')
+        self.assertEqual([rollup['period_start'] for rollup
+                          in res.data['rollups']], ['2024-05-13'])
+        res = self.get(exercise_id=self.exercise.id, granularity='month',
+                       start='2024-05-20', end='2024-12-31')
+        self.assertEqual(len(res.data['rollups']), 2)
+
+    def test_analytics_defaults_suc(self):
+        """Test SUCCESS: weeks of the last year by default"""
+        res = self.get(exercise_id=self.exercise.id)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['granularity'], 'week')
+        self.assertEqual(res.data['end'], timezone.localdate())
+
+    def test_analytics_reads_rollups_only_suc(self):
+        """Test SUCCESS: the logs are not read"""
+        with self.assertNumQueries(2):
+            res = self.get(exercise_id=self.exercise.id, granularity='day',
+                           start='2024-01-01', end='2024-12-31')
+        self.assertEqual(res.status_code, 200)
+
+    def test_analytics_invalid_params_error(self):
+        """Test ERROR: missing exercise, unknown granularity, reversed
+        range and too many periods"""
+        for params in [{}, {'exercise_id': 0},
+                       {'exercise_id': self.exercise.id,
+                        'granularity': 'year'},
+                       {'exercise_id': self.exercise.id,
+                        'start': '2024-02-01', 'end': '2024-01-01'},
+                       {'exercise_id': self.exercise.id, 'granularity': 'day',
+                        'start': '2023-01-01', 'end': '2024-12-31'}]:
+            self.assertEqual(self.get(**params).status_code, 400, params)
+
+    def test_analytics_other_user_exercise_error(self):
+        """Test ERROR: the exercise of another user is not found"""
+        other = Exercise.objects.create(
+            name='squat', user=create_user(email='other@gmail.com'))
+        res = self.get(exercise_id=other.id)
+        self.assertEqual(res.status_code, 404)
+
+    def test_analytics_nonauth_user_error(self):
+        """Test ERROR: the endpoint needs an authenticated user"""
+        res = APIClient().get(ANALYTICS_URL,
+                              {'exercise_id': self.exercise.id})
+        self.assertEqual(res.status_code, 401)
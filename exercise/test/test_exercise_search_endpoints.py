@@ -18,7 +18,7 @@ from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from exercise.models import Exercise
+from exercise.models import Exercise, ExerciseNameTrigram
 EXERCISE_FIELDS_SEARCH_URL = reverse('exercise:exercise-search')
 
 
@@ -156,3 +156,62 @@ class ExerciseFieldSearchTest(APITestCase):
                               {'test': 'test1', 'bool': True})
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("Parameters empty or invalid", res.data)
+
+    def test_search_ranked_by_length_suc(self):
+        """
+        Test SUCCESS: the results are ordered by the length of the name
+        """
+        create_exercise("Bench", self.user)
+        res = self.client.get(EXERCISE_FIELDS_SEARCH_URL, {'name': 'BENCH'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        exercises_name = [exer['name'] for exer in res.data]
+        self.assertEqual(exercises_name, ['Bench',
+                                          'regular bench press (1)',
+                                          'incline bench press (2)'])
+
+    def test_search_short_name_suc(self):
+        """
+        Test SUCCESS: searching with less than three characters
+        """
+        res = self.client.get(EXERCISE_FIELDS_SEARCH_URL, {'name': 'Up'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        exercises_name = [exer['name'] for exer in res.data]
+        self.assertEqual(exercises_name, ['push up', 'pull up'])
+
+    def test_search_trigrams_not_consecutive_suc(self):
+        """
+        Test SUCCESS: an exercise having all the trigrams of the
+        name but not consecutive is not returned
+        """
+        create_exercise("abcx bcd", self.user)
+        res = self.client.get(EXERCISE_FIELDS_SEARCH_URL, {'name': 'abcd'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 0)
+
+    def test_search_after_rename_and_delete_suc(self):
+        """
+        Test SUCCESS: the search follows renaming and deleting exercises
+        """
+        exercise = Exercise.objects.get(name='push up')
+        exercise.name = 'dips'
+        exercise.save()
+        res = self.client.get(EXERCISE_FIELDS_SEARCH_URL, {'name': 'push'})
+        exercises_name = [exer['name'] for exer in res.data]
+        self.assertEqual(exercises_name, ['push down'])
+        res = self.client.get(EXERCISE_FIELDS_SEARCH_URL, {'name': 'dip'})
+        exercises_name = [exer['name'] for exer in res.data]
+        self.assertEqual(exercises_name, ['dips'])
+        exercise.delete()
+        self.assertFalse(ExerciseNameTrigram.objects.filter(
+            exercise_id=exercise.id).exists())
+        res = self.client.get(EXERCISE_FIELDS_SEARCH_URL, {'name': 'dip'})
+        self.assertEqual(len(res.data), 0)
+
+    def test_search_trigrams_stored_suc(self):
+        """
+        Test SUCCESS: the trigrams of the lowered name are stored
+        """
+        exercise = create_exercise("Dips", self.user)
+        trigrams = ExerciseNameTrigram.objects.filter(
+            exercise=exercise).values_list('trigram', flat=True)
+        self.assertEqual(sorted(trigrams), ['dip', 'ips'])
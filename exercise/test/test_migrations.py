@@ -0,0 +1,89 @@
+"""
+This file is for testing the data steps of the exercise migrations
+- Classes:
+    - MergeDuplicateNamesMigrationTest: For merging the exercises whose
+    names only differ by case before adding the unique constraint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MergeDuplicateNamesMigrationTest(TransactionTestCase):
+    """Test class for the data step of 0021_case_insensitive_unique_name"""
+    before = [('exercise', '0020_query_pattern_indexes'),
+              ('workout', '0004_sync_updated_at'),
+              ('sync', '0001_initial')]
+    after = [('exercise', '0021_case_insensitive_unique_name')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.addCleanup(self.migrate_to_latest)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def migrate_to_latest(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        return executor.loader.project_state(self.after).apps
+
+    def test_merge_duplicate_names_suc(self):
+        """Test SUCCESS: the oldest exercise is kept with the logs of
+        the others, the others are deleted with tombstones"""
+        User = self.apps.get_model('user', 'User')
+        Exercise = self.apps.get_model('exercise', 'Exercise')
+        ExerciseLog = self.apps.get_model('exercise', 'ExerciseLog')
+        ExerciseProgress = self.apps.get_model('exercise',
+                                               'ExerciseProgress')
+        WorkoutLog = self.apps.get_model('workout', 'WorkoutLog')
+        user = User.objects.create(email='test@gmail.com')
+        other_user = User.objects.create(email='other@gmail.com')
+        workout_log = WorkoutLog.objects.create(user=user)
+        kept, upper, mixed, other = [
+            Exercise.objects.create(name=name, user=user)
+            for name in ('squat', 'SQUAT', 'Squat', 'lunge')]
+        other_user_squat = Exercise.objects.create(name='Squat',
+                                                   user=other_user)
+        for exercise in (kept, upper, mixed, mixed, other):
+            ExerciseLog.objects.create(user=user, exercise=exercise,
+                                       workout_log=workout_log)
+        ExerciseProgress.objects.create(user=user, exercise=kept)
+
+        apps = self.migrate()
+        Exercise = apps.get_model('exercise', 'Exercise')
+        ExerciseLog = apps.get_model('exercise', 'ExerciseLog')
+        Tombstone = apps.get_model('sync', 'Tombstone')
+        self.assertEqual(
+            set(Exercise.objects.values_list('id', flat=True)),
+            {kept.id, other.id, other_user_squat.id})
+        self.assertEqual(
+            ExerciseLog.objects.filter(exercise_id=kept.id).count(), 4)
+        self.assertEqual(
+            ExerciseLog.objects.filter(exercise_id=other.id).count(), 1)
+        self.assertFalse(apps.get_model('exercise', 'ExerciseProgress')
+                         .objects.filter(exercise_id=kept.id).exists())
+        self.assertEqual(
+            set(Tombstone.objects.values_list('model', 'object_id')),
+            {('exercise.exercise', upper.id),
+             ('exercise.exercise', mixed.id)})
+
+    def test_no_duplicate_names_suc(self):
+        """Test SUCCESS: the exercises without duplicates are kept"""
+        User = self.apps.get_model('user', 'User')
+        Exercise = self.apps.get_model('exercise', 'Exercise')
+        user = User.objects.create(email='test@gmail.com')
+        ids = {Exercise.objects.create(name=name, user=user).id
+               for name in ('squat', 'lunge')}
+        apps = self.migrate()
+        self.assertEqual(set(apps.get_model('exercise', 'Exercise')
+                             .objects.values_list('id', flat=True)), ids)
+        self.assertFalse(apps.get_model('sync', 'Tombstone').objects.exists())
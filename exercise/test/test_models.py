@@ -12,9 +12,12 @@ for the exercises model
     - test_...._error: mean that the test is meant to fail the operation
     it meant to do
 """
+from unittest import mock
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
-from exercise.models import Exercise, ExerciseLog
+from django.test.utils import CaptureQueriesContext
+from exercise.models import Exercise, ExerciseLog, ExerciseManager
 from django.core.exceptions import ValidationError
 from workout.models import WorkoutLog
 
@@ -246,6 +249,93 @@ class ExerciseTest(TestCase):
         self.assertNotIn('TmPExeRcise', exers_name)
         tmp_exer.delete()
 
+    def test_create_exercise_single_insert_suc(self):
+        """Test SUCCESS: saving an exercise is one INSERT without a
+        SELECT of the exercises, the unique name is checked by the
+        database"""
+        table = f'"{Exercise._meta.db_table}"'
+        with CaptureQueriesContext(connection) as context:
+            create_exercise(name='exer3', user=self.user)
+        statements = [query['sql'].split()[0] for query in context
+                      if table in query['sql'].split('WHERE')[0]]
+        self.assertEqual(statements, ['INSERT'])
+
+    def test_unique_lower_name_constraint_error(self):
+        """Test ERROR: the database refuses a duplicate name in another
+        case even without Exercise.save (e.g. a concurrent create)"""
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Exercise.objects.bulk_create(
+                    [Exercise(name='EXER1', user=self.user)])
+        self.assertEqual(
+            Exercise.objects.filter_CI('exer1', user=self.user).count(), 1)
+
+    def test_get_or_create_CI_suc(self):
+        """Test SUCCESS: the existing exercises are found in any case
+        and the missing ones are created once with one INSERT"""
+        with CaptureQueriesContext(connection) as context:
+            exercises, created = Exercise.objects.get_or_create_CI(
+                ['EXER1', ' squat ', 'Squat', 'lunge'], self.user)
+        self.assertEqual(len(context), 2)
+        self.assertIn('ON CONFLICT DO NOTHING', context[1]['sql'])
+        self.assertEqual(set(exercises), {'exer1', 'squat', 'lunge'})
+        self.assertEqual(exercises['exer1'], self.exercise1)
+        self.assertEqual([exercise.name for exercise in created],
+                         ['squat', 'lunge'])
+        for exercise in created:
+            self.assertEqual(Exercise.objects.get(pk=exercise.pk).name,
+                             exercise.name)
+            self.assertFalse(exercise._state.adding)
+
+    def test_get_or_create_CI_concurrent_suc(self):
+        """Test SUCCESS: a name created by another request after the
+        first query is selected after the insert, not duplicated"""
+        lower_names_in = ExerciseManager._lower_names_in
+        calls = list()
+
+        def created_concurrently(manager, user, lowered_names):
+            calls.append(list(lowered_names))
+            if len(calls) == 1:
+                return dict()
+            return lower_names_in(manager, user, lowered_names)
+
+        with mock.patch.object(ExerciseManager, '_lower_names_in',
+                               created_concurrently):
+            exercises, created = Exercise.objects.get_or_create_CI(
+                ['Exer1', 'exer9'], self.user)
+        self.assertEqual(calls[1], ['exer1'])
+        self.assertEqual(exercises['exer1'], self.exercise1)
+        self.assertEqual([exercise.name for exercise in created], ['exer9'])
+        self.assertEqual(
+            Exercise.objects.filter_CI('exer1', user=self.user).count(), 1)
+
+    def test_get_or_create_CI_concurrent_single_suc(self):
+        """Test SUCCESS: a single name created by another request after
+        the first query is selected after the insert"""
+        lower_names_in = ExerciseManager._lower_names_in
+        calls = list()
+
+        def created_concurrently(manager, user, lowered_names):
+            calls.append(list(lowered_names))
+            if len(calls) == 1:
+                return dict()
+            return lower_names_in(manager, user, lowered_names)
+
+        with mock.patch.object(ExerciseManager, '_lower_names_in',
+                               created_concurrently):
+            exercises, created = Exercise.objects.get_or_create_CI(
+                ['Exer1'], self.user)
+        self.assertEqual(exercises, {'exer1': self.exercise1})
+        self.assertEqual(created, [])
+
+    def test_get_or_create_CI_conflict_not_found_error(self):
+        """Test ERROR: a name conflicting with an exercise that is not
+        found after the insert is not returned as a str"""
+        with mock.patch.object(ExerciseManager, '_lower_names_in',
+                               return_value=dict()):
+            with self.assertRaises(IntegrityError):
+                Exercise.objects.get_or_create_CI(['Exer1'], self.user)
+
 
 class ExerciseLogTest(TestCase):
     """Testing the related operations of the ExerciseLog model"""
@@ -1,12 +1,21 @@
 from django.urls import (
     path,
+    re_path,
     include
 )
 from .views import (
     ExerciseViewSet,
     ExerciseLogViewSet,
     ExerciseSearchView,
-    ExerciseProgressView
+    ExerciseAutocompleteView,
+    ExerciseProgressView,
+    ExerciseAnalyticsView,
+    ExerciseExportView
+)
+from .async_views import (
+    AsyncExerciseListView,
+    AsyncExerciseSearchView,
+    AsyncExerciseProgressView
 )
 from rest_framework.routers import DefaultRouter
 app_name = 'exercise'
@@ -18,6 +27,24 @@ urlpatterns = [
     path('', include(router.urls)),
     path('search/', ExerciseSearchView.as_view(),
          name='exercise-search'),
+    path('autocomplete/', ExerciseAutocompleteView.as_view(),
+         name='exercise-autocomplete'),
     path('progress/', ExerciseProgressView.as_view(),
          name='exercise-progress'),
+    path('analytics/', ExerciseAnalyticsView.as_view(),
+         name='exercise-analytics'),
+    path('export/', ExerciseExportView.as_view(),
+         name='exercise-export'),
 ]
+
+# the same endpoints with async views answering their GET requests,
+# served under ASGI, see core/urls_asgi.py
+sync_views = {url.name: url.callback for url in router.urls}
+asgi_urlpatterns = [
+    re_path(r'^exercise/$', AsyncExerciseListView.as_view(
+        sync_view=sync_views['exercise-list']), name='exercise-list'),
+    path('search/', AsyncExerciseSearchView.as_view(
+        sync_view=ExerciseSearchView.as_view()), name='exercise-search'),
+    path('progress/', AsyncExerciseProgressView.as_view(
+        sync_view=ExerciseProgressView.as_view()), name='exercise-progress'),
+] + urlpatterns
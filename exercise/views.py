@@ -3,17 +3,37 @@ from rest_framework.viewsets import ModelViewSet
 from exercise.models import Exercise, ExerciseLog
 from exercise.serializers import (
     ExerciseLogSerializer,
+    ExerciseLogBulkSerializer,
     ExerciseSerializer,
     ExerciseListSerializer,
     ExerciseSearchSerializer,
-    ExerciseLogProgressListSerializer)
+    ExerciseAutocompleteSerializer,
+    ExerciseAnalyticsSerializer,
+    ExerciseRollupSerializer,
+    ExerciseExportSerializer)
+from exercise.export import (
+    CONTENT_TYPES,
+    async_chunks,
+    export_chunks,
+    export_rows
+)
+from exercise.progress import get_progress
+from exercise.rollups import get_rollups
+from exercise.search import search_exercises
+from exercise.autocomplete import autocomplete_cache
 from rest_framework.serializers import ValidationError
-from rest_framework.authentication import TokenAuthentication
+from user.authentication import CachedTokenAuthentication
+from core.conditional import ConditionalListMixin
+from core.response_cache import CachedListMixin, cache_response
 from rest_framework.permissions import IsAuthenticated
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.db.models import Q
+from django.db.models.functions import Length
 import re
 from django.core.exceptions import ValidationError as VE
 from exercise.validators import validate_exercise_name
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
@@ -22,62 +42,8 @@ from drf_spectacular.utils import (
     OpenApiExample)
 from rest_framework import serializers
 from rest_framework.response import Response
-
-
-def extract_progress(all_logs):
-    """
-    Extracts progress for each field from a list of exercise logs.
-    Tracks meaningful progress, ignoring unchanged values.
-    - **Example**
-        - sets, reps and rest_time would be something like that:
-        *[((11, 12, 13), '2024-11-16', 1), ((21, 22, 23), '2024-11-16', 1)]*
-        - duration time will be something like this :
-        *[(214, '2024-11-16', 1), (215, '2024-11-16', 1)]*
-    """
-    all_progress = dict()
-    counter_each_field = dict()
-
-    for log in all_logs:
-        created_at = log.pop('created_at')
-        workout_log = log.pop('workout_log')
-
-        for key, value in log.items():
-            if value is None:
-                if f"count_{key}" in counter_each_field:
-                    counter_each_field[f"count_{key}"] += 1
-                continue
-
-            # initializing the lists and counters
-            same_as_last = False  # if the current value is same as last one
-            if key not in all_progress:
-                all_progress[f"{key}"] = list()
-                all_progress[f"number_exercises_between_each_{key}"] = list()
-                counter_each_field[f"count_{key}"] = 0
-            else:
-                # calculating same_as_last
-                if key == 'sets_reps_restTime':
-                    # if the rest is None, ignore it in the comparing
-                    if value[2] is None:
-                        same_as_last = bool(
-                            value[0:2] == all_progress[f"{key}"][-1][0][0:2])
-                    else:
-                        same_as_last = \
-                            bool(value == all_progress[f"{key}"][-1][0])
-                else:
-                    same_as_last = bool(value == all_progress[f"{key}"][-1][0])
-                if not same_as_last:
-                    all_progress[f"number_exercises_between_each_{key}"].\
-                        append(counter_each_field[f"count_{key}"])
-                    counter_each_field[f"count_{key}"] = 0
-
-            if same_as_last:
-                counter_each_field[f"count_{key}"] += 1
-            else:
-                all_progress[key].append(
-                    (value, created_at, workout_log)
-                    )
-
-    return all_progress
+from rest_framework.decorators import action
+from rest_framework import status
 
 
 @extend_schema(
@@ -100,17 +66,20 @@ def extract_progress(all_logs):
     methods=['DELETE'],
     description='Deleting an Exercise by ID, only by its user'
 )
-class ExerciseViewSet(ModelViewSet):
+class ExerciseViewSet(ConditionalListMixin, CachedListMixin,
+                      ModelViewSet):
     """
     View sets that handle the next for the Exercise model:
     - creation of an exercise
     - updating of an exercise
     - deletion of an exercise
     - retrieving of an exercise
+    - listing of the exercises, answered with a 304 when the list
+    did not change and cached until the next write of the user
     """
     serializer_class = ExerciseSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     queryset = Exercise.objects.all()
 
     def get_serializer_class(self):
@@ -153,15 +122,17 @@ class ExerciseViewSet(ModelViewSet):
     methods=['DELETE'],
     description='Deleting an Exercise_log by ID, only by its user'
 )
-class ExerciseLogViewSet(ModelViewSet):
+class ExerciseLogViewSet(ConditionalListMixin, ModelViewSet):
     serializer_class = ExerciseLogSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = ExerciseLog.objects.all()
 
     def get_queryset(self):
-        """Return exercises for the authenticated user."""
-        return ExerciseLog.objects.filter(user=self.request.user)
+        """Return exercise logs for the authenticated user,
+        with their exercises fetched in the same query"""
+        return ExerciseLog.objects.filter(user=self.request.user)\
+            .select_related('exercise')
 
     @extend_schema(
         methods=['GET'],
@@ -171,6 +142,23 @@ class ExerciseLogViewSet(ModelViewSet):
         """wrote this only for the extent_schema"""
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(
+        request=ExerciseLogBulkSerializer,
+        responses={201: ExerciseLogSerializer(many=True)},
+        description="Creating many Exercise_logs in one request for one or "
+                    "more workout_logs of the current loged user, errors "
+                    "are returned for each log by its position."
+    )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """Create the exercise logs sent in `logs` all together"""
+        serializer = ExerciseLogBulkSerializer(
+            data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        exercise_logs = serializer.save()
+        return Response(ExerciseLogSerializer(exercise_logs, many=True).data,
+                        status=status.HTTP_201_CREATED)
+
 
 @extend_schema(
     parameters=[
@@ -183,7 +171,7 @@ class ExerciseLogViewSet(ModelViewSet):
         ),
     ]
 )
-class ExerciseSearchView(ListAPIView):
+class ExerciseSearchView(CachedListMixin, ListAPIView):
     """
     searching for an exercise by parameters
     - For the name search: search for the exercise that contain this name
@@ -193,10 +181,13 @@ class ExerciseSearchView(ListAPIView):
     - or used in the regular search
     - currently uses name only in the future will handle
     other parameters if added
+    - cached until the next write of the user
     """
     serializer_class = ExerciseListSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # results are ranked by the name length not paginated
+    pagination_class = None
 
     def get_queryset(self):
         """
@@ -214,30 +205,63 @@ class ExerciseSearchView(ListAPIView):
 
         if search_params:
             # Filter based on validated search parameters
+            exercises = None
             name = search_params.pop('name', None)
             if name:
                 try:
                     name = re.sub(r'\s+', ' ', name.strip())
                     validate_exercise_name(name)
-                    query &= Q(name__icontains=name)
+                    # ranked by the name length in the database
+                    exercises = search_exercises(user, name)
                 except VE:
                     pass
             for key, value in search_params.items():
                 query &= Q(**{f"{key}": f"{value}"})
-            if len(query) < 1:
-                return []
-            query &= Q(user=user)
-            exercises = Exercise.objects.filter(query)
-            exercises = list(Exercise.objects.filter(query))
-            if exercises:
-                exercises = \
-                    sorted(exercises, key=lambda exercise: len(exercise.name))
-            return exercises
+            if exercises is None:
+                if len(query) < 1:
+                    return []
+                exercises = Exercise.objects.filter(user=user)\
+                    .order_by(Length('name'), 'id')
+            return exercises.filter(query)
 
         else:
             raise ValidationError("Parameters empty or invalid")
 
 
+@extend_schema(
+    parameters=[ExerciseAutocompleteSerializer],
+    responses={200: ExerciseListSerializer(many=True)}
+)
+class ExerciseAutocompleteView(GenericAPIView):
+    """
+    Endpoint to autocomplete an exercise name while writing it
+    in the exercise log, answered from an in-memory index of the
+    user exercise names instead of the database
+
+    ### Parameters
+    - `name` (query parameter, required): the start of a word of the name
+    - `limit` (query parameter, optional): the number of names
+    to return, 10 by default and 50 at most
+
+    ### Response
+    A list of `id` and `name` of the matching exercises, names starting
+    with `name` first, then the shortest names
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExerciseAutocompleteSerializer
+    pagination_class = None
+
+    def get(self, request):
+        params_serializer = self.get_serializer(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        params = params_serializer.validated_data
+        matches = autocomplete_cache.search(
+            request.user.id, params['name'], params['limit'])
+        return Response([{'id': exercise_id, 'name': name}
+                         for exercise_id, name in matches])
+
+
 @extend_schema(
     parameters=[
         OpenApiParameter(
@@ -309,12 +333,14 @@ class ExerciseProgressView(GenericAPIView):
         - The date the log was created (format: `YY-MM-DD`).
         - The workout log ID.
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @cache_response
     def get(self, request):
         """
-        returns all exercise logs with the same user and exercise
+        returns all exercise logs with the same user and exercise,
+        cached until the next write of the user
         """
         # Check if exercise_id is provided
         exercise_id = request.GET.get('exercise_id')
@@ -338,18 +364,128 @@ class ExerciseProgressView(GenericAPIView):
         except Exercise.DoesNotExist:
             return Response({"detail": "Exercise not found."}, status=404)
 
-        # get the ExerciseLogs for the specified exercise and user
-        exercise_logs = ExerciseLog.objects.filter(
-            exercise=exercise,
-            user=request.user
-        ).order_by('created_at')
-
-        # Serialize the logs
-        serialized_logs = ExerciseLogProgressListSerializer(exercise_logs,
-                                                            many=True)
-        progress = extract_progress(serialized_logs.data)
+        # read the stored progress of the exercise
+        progress = get_progress(request.user.id, exercise.id)
         return Response({
             "exercise_id": exercise.id,
             "exercise_name": exercise.name,
             "progress": progress
         })
+
+
+@extend_schema(
+    parameters=[ExerciseAnalyticsSerializer],
+    responses={
+        200: inline_serializer(
+            name="ExerciseAnalyticsResponse",
+            fields={
+                "exercise_id": serializers.IntegerField(),
+                "exercise_name": serializers.CharField(),
+                "granularity": serializers.CharField(),
+                "start": serializers.DateField(),
+                "end": serializers.DateField(),
+                "rollups": ExerciseRollupSerializer(many=True),
+            },
+        ),
+    }
+)
+class ExerciseAnalyticsView(GenericAPIView):
+    """
+    Endpoint to return the aggregates of an exercise over time,
+    read from the stored rollups and not from the exercise logs
+
+    ### Parameters
+    - `exercise_id` (query parameter, required): ID of the exercise.
+    - `granularity` (query parameter, optional): `day`, `week`
+    (by default, starting on monday) or `month`.
+    - `start`, `end` (query parameters, optional): the range of dates,
+    both included, a year until today by default, with at most 366
+    periods.
+
+    ### Response
+    The exercise, the range and `rollups`: one item for each period
+    with logs in order, with its `period_start`, `max_weight_kg`,
+    `total_volume_kg` (sets x reps x weight), `session_count` (the
+    number of workout logs) and `total_duration_minutes`.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExerciseAnalyticsSerializer
+    pagination_class = None
+
+    @cache_response
+    def get(self, request):
+        """returns the rollups of the range, cached until the next
+        write of the user"""
+        params_serializer = self.get_serializer(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        params = params_serializer.validated_data
+
+        try:
+            exercise = Exercise.objects.get(id=params['exercise_id'],
+                                            user=request.user)
+        except Exercise.DoesNotExist:
+            return Response({"detail": "Exercise not found."}, status=404)
+
+        rollups = get_rollups(request.user.id, exercise.id,
+                              params['granularity'], params['start'],
+                              params['end'])
+        return Response({
+            "exercise_id": exercise.id,
+            "exercise_name": exercise.name,
+            "granularity": params['granularity'],
+            "start": params['start'],
+            "end": params['end'],
+            "rollups": ExerciseRollupSerializer(rollups, many=True).data,
+        })
+
+
+@extend_schema(
+    parameters=[ExerciseExportSerializer],
+    responses={(200, 'text/csv'): OpenApiTypes.BINARY,
+               (200, 'application/x-ndjson'): OpenApiTypes.BINARY,
+               (200, 'application/gzip'): OpenApiTypes.BINARY}
+)
+class ExerciseExportView(GenericAPIView):
+    """
+    Endpoint to download the full training history of the user,
+    streamed so it takes the same memory whatever its size
+
+    ### Parameters
+    - `file_format` (query parameter, optional): `csv` (by default,
+    with a header line) or `ndjson` (a JSON object on each line).
+    - `gzip` (query parameter, optional): `true` to get the file
+    gzipped, compressed while it is streamed.
+
+    ### Response
+    A file with a row for each exercise log with its workout log and
+    its exercise, and a row for each workout log without exercise logs
+    (with empty exercise log columns), in the order of the workout logs.
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = ExerciseExportSerializer
+    pagination_class = None
+
+    def get(self, request):
+        """streams the rows read with a server-side cursor, with an
+        async iterator under ASGI"""
+        params_serializer = self.get_serializer(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        export_format = params_serializer.validated_data['file_format']
+        compress = params_serializer.validated_data['gzip']
+
+        filename = f"training_history.{export_format}"
+        content_type = CONTENT_TYPES[export_format]
+        if compress:
+            filename += '.gz'
+            content_type = 'application/gzip'
+        chunks = export_chunks(export_rows(request.user.id), export_format,
+                               compress=compress)
+        # under ASGI a sync iterator would be read at once
+        if isinstance(request._request, ASGIRequest):
+            chunks = async_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = \
+            f'attachment; filename="{filename}"'
+        return response
@@ -0,0 +1,131 @@
+"""
+The changes of the data of a user since a checkpoint
+- a checkpoint is the position (updated_at, id) reached in each kind
+of rows and (deleted_at, id) in the tombstones, encoded in an opaque
+token
+- the rows after a position are found with the (user, updated_at, id)
+indexes, so the cost follows the number of changes and not the size
+of the account
+- when nothing more is waiting, the new checkpoint is SYNC_CHECKPOINT_LAG
+seconds before the request, so the rows of transactions committed
+after the request are not skipped, some rows are sent twice which
+the clients apply as upserts
+- a position never goes back before the one of the checkpoint sent,
+or the pages of more than the limit changed in the lag would be sent
+again and again until the lag has passed
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from exercise.models import Exercise, ExerciseLog
+from sync.models import Tombstone
+from workout.models import WorkoutLog
+
+# the kinds of rows in the response and their models
+SYNCED_MODELS = {
+    'workout_logs': WorkoutLog,
+    'exercises': Exercise,
+    'exercise_logs': ExerciseLog,
+}
+# the kind of the tombstones in the checkpoint
+DELETED = 'deleted'
+MODEL_KINDS = {model._meta.label_lower: kind
+               for kind, model in SYNCED_MODELS.items()}
+
+
+def encode_checkpoint(positions):
+    """Returns the token of {kind: (datetime, id)}"""
+    token = json.dumps({kind: [moment.isoformat(), pk]
+                        for kind, (moment, pk) in positions.items()},
+                       separators=(',', ':'))
+    return urlsafe_b64encode(token.encode('ascii')).decode('ascii')
+
+
+def decode_checkpoint(token):
+    """
+    Returns the {kind: (datetime, id)} of a token
+    - raises ValueError if the token is not valid
+    """
+    try:
+        positions = json.loads(urlsafe_b64decode(token.encode('ascii')))
+        decoded = dict()
+        for kind in [*SYNCED_MODELS, DELETED]:
+            moment, pk = positions[kind]
+            moment = parse_datetime(moment)
+            if moment is None or timezone.is_naive(moment):
+                raise ValueError("Invalid date")
+            decoded[kind] = (moment, int(pk))
+        return decoded
+    except (TypeError, ValueError, KeyError, UnicodeError):
+        raise ValueError("Invalid checkpoint")
+
+
+def _after(queryset, field, position):
+    """The rows of the queryset after the (field, id) position"""
+    if position is None:
+        return queryset
+    moment, pk = position
+    return queryset.filter(Q(**{f"{field}__gt": moment}) |
+                           Q(**{field: moment, 'id__gt': pk}))
+
+
+def _last_position(previous, safe_position):
+    """The position of a kind without more rows waiting, the safe one
+    unless the checkpoint sent was already after it"""
+    if previous is None:
+        return safe_position
+    return max(previous, safe_position)
+
+
+def get_changes(user, checkpoint, limit):
+    """
+    Returns the rows of the user changed after the checkpoint
+    - checkpoint: the decoded checkpoint, None for all the rows
+    - limit: the most rows returned of each kind, `has_more` tells
+    if more are waiting after the new checkpoint
+    - `reset` is True when the checkpoint is older than the kept
+    tombstones, all the rows are returned and the clients should drop
+    the rows they have that are not returned
+    """
+    now = timezone.now()
+    reset = checkpoint is not None and checkpoint[DELETED][0] < \
+        now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    if reset:
+        checkpoint = None
+    safe_position = (now - timedelta(seconds=settings.SYNC_CHECKPOINT_LAG),
+                     0)
+
+    changes = {'has_more': False, 'reset': reset, 'deleted': dict()}
+    positions = dict()
+    for kind, model in SYNCED_MODELS.items():
+        queryset = _after(model.objects.filter(user=user), 'updated_at',
+                          checkpoint and checkpoint[kind])
+        rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+        positions[kind] = _last_position(checkpoint and checkpoint[kind],
+                                         safe_position)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            positions[kind] = (rows[-1].updated_at, rows[-1].id)
+            changes['has_more'] = True
+        changes[kind] = rows
+        changes['deleted'][kind] = list()
+
+    tombstones = _after(Tombstone.objects.filter(user=user), 'deleted_at',
+                        checkpoint and checkpoint[DELETED])
+    tombstones = list(tombstones.order_by('deleted_at', 'id').values_list(
+        'model', 'object_id', 'deleted_at', 'id')[:limit + 1])
+    positions[DELETED] = _last_position(
+        checkpoint and checkpoint[DELETED], safe_position)
+    if len(tombstones) > limit:
+        tombstones = tombstones[:limit]
+        positions[DELETED] = tombstones[-1][2:]
+        changes['has_more'] = True
+    for model, object_id, _, _ in tombstones:
+        changes['deleted'][MODEL_KINDS[model]].append(object_id)
+
+    changes['checkpoint'] = encode_checkpoint(positions)
+    return changes
@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete the tombstones older than SYNC_TOMBSTONE_DAYS, the " \
+           "clients with an older checkpoint get all their rows again"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int,
+                            default=settings.SYNC_TOMBSTONE_DAYS,
+                            help="keep the tombstones of the last days")
+
+    def handle(self, *args, days, **options):
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+        self.stdout.write(f"Deleted {deleted} tombstones")
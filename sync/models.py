@@ -0,0 +1,25 @@
+from django.db import models
+from django.contrib.auth import get_user_model
+User = get_user_model()
+
+
+class Tombstone(models.Model):
+    """
+    - A deleted row of a user, kept so the sync endpoint can tell
+    the clients to delete it too
+    - model: the label of the model of the row, e.g. 'workout.workoutlog'
+    - removed by the prune_tombstones command after SYNC_TOMBSTONE_DAYS
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at', 'id']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
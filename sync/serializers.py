@@ -0,0 +1,64 @@
+from rest_framework import serializers
+from exercise.models import Exercise, ExerciseLog
+from sync.changes import decode_checkpoint
+from workout.models import WorkoutLog
+
+
+class SyncWorkoutLogSerializer(serializers.ModelSerializer):
+    """Serializer for the workout logs sent by the sync endpoint"""
+    class Meta:
+        model = WorkoutLog
+        fields = ['id', 'name', 'description', 'created_at', 'updated_at',
+                  'started_at', 'finished_at', 'duration', 'total_sets',
+                  'total_reps', 'total_volume_kg', 'total_duration_minutes']
+        read_only_fields = fields
+
+
+class SyncExerciseSerializer(serializers.ModelSerializer):
+    """Serializer for the exercises sent by the sync endpoint"""
+    class Meta:
+        model = Exercise
+        fields = ['id', 'name', 'description', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class SyncExerciseLogSerializer(serializers.ModelSerializer):
+    """Serializer for the exercise logs sent by the sync endpoint,
+    the exercise and the workout_log are sent by their ids"""
+    class Meta:
+        model = ExerciseLog
+        fields = ['id', 'workout_log', 'exercise', 'notes',
+                  'number_of_sets', 'number_of_reps',
+                  'rest_between_sets_seconds', 'duration_in_minutes',
+                  'weight_in_kg', 'created_at', 'updated_at']
+        read_only_fields = fields
+
+
+class SyncDeletedSerializer(serializers.Serializer):
+    """Serializer for the ids of the deleted rows of each kind"""
+    workout_logs = serializers.ListField(child=serializers.IntegerField())
+    exercises = serializers.ListField(child=serializers.IntegerField())
+    exercise_logs = serializers.ListField(child=serializers.IntegerField())
+
+
+class SyncSerializer(serializers.Serializer):
+    """Serializer for the response of the sync endpoint"""
+    checkpoint = serializers.CharField()
+    has_more = serializers.BooleanField()
+    reset = serializers.BooleanField()
+    workout_logs = SyncWorkoutLogSerializer(many=True)
+    exercises = SyncExerciseSerializer(many=True)
+    exercise_logs = SyncExerciseLogSerializer(many=True)
+    deleted = SyncDeletedSerializer()
+
+
+class SyncParamsSerializer(serializers.Serializer):
+    """Serializer for the parameters of the sync endpoint"""
+    checkpoint = serializers.CharField(required=False)
+
+    def validate_checkpoint(self, checkpoint):
+        """decode the checkpoint returned by a previous sync"""
+        try:
+            return decode_checkpoint(checkpoint)
+        except ValueError:
+            raise serializers.ValidationError("Invalid checkpoint")
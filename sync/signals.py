@@ -0,0 +1,53 @@
+"""
+Signals of the sync application
+- keeps a tombstone of every deleted row of the synced models, the
+tombstones of the rows of one delete (with its cascade) are written
+with one INSERT
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, pre_delete
+from sync.changes import SYNCED_MODELS
+from sync.models import Tombstone
+
+
+def deleted_with_user(origin):
+    """Check if a delete started from users, their tombstones are
+    deleted with them"""
+    origin_model = origin.model if isinstance(origin, QuerySet) \
+        else type(origin)
+    return origin_model is get_user_model()
+
+
+def collect_tombstone(sender, instance, origin=None, **kwargs):
+    """
+    Keep the tombstone of a row a delete is about to delete on the
+    origin of the delete
+    - rows deleted with their user are skipped
+    """
+    if deleted_with_user(origin):
+        return
+    origin.__dict__.setdefault('_tombstones', list()).append(
+        Tombstone(user_id=instance.user_id, model=sender._meta.label_lower,
+                  object_id=instance.pk))
+
+
+def record_tombstones(sender, instance, origin=None, **kwargs):
+    """
+    Keep the deleted rows so the clients delete them too
+    - the tombstones collected for the delete are written at the first
+    deleted row, the following rows of the same delete do nothing
+    """
+    if deleted_with_user(origin):
+        return
+    tombstones = origin.__dict__.get('_tombstones')
+    if tombstones:
+        origin._tombstones = list()
+        Tombstone.objects.bulk_create(tombstones)
+
+
+for model in SYNCED_MODELS.values():
+    pre_delete.connect(collect_tombstone, sender=model,
+                       dispatch_uid=f"collect_tombstone_{model._meta.label}")
+    post_delete.connect(record_tombstones, sender=model,
+                        dispatch_uid=f"record_tombstone_{model._meta.label}")
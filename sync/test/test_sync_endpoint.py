@@ -0,0 +1,257 @@
+"""
+This file is for testing the sync endpoint
+- Classes:
+    - SyncEndpointTest: For the changes returned since a checkpoint
+    - PruneTombstonesCommandTest: For the prune_tombstones command
+- Helper functions:
+    - create_user: creates a user and returns it
+- static variables:
+    - SYNC_URL: the url of the sync endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from exercise.models import Exercise, ExerciseLog
+from sync.changes import decode_checkpoint, encode_checkpoint
+from sync.models import Tombstone
+from workout.models import WorkoutLog
+SYNC_URL = reverse('sync:sync')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+@override_settings(SYNC_CHECKPOINT_LAG=0)
+class SyncEndpointTest(TestCase):
+    """Test class for the changes returned by the sync endpoint"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_log = WorkoutLog.objects.create(user=self.user,
+                                                     name='leg day')
+        self.exercise = Exercise.objects.create(name='Squat', user=self.user)
+        self.exercise_log = ExerciseLog.objects.create(
+            user=self.user, exercise=self.exercise,
+            workout_log=self.workout_log, number_of_sets=3)
+
+    def sync(self, checkpoint=None):
+        params = {'checkpoint': checkpoint} if checkpoint else {}
+        res = self.client.get(SYNC_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def ids(self, data, kind):
+        return [row['id'] for row in data[kind]]
+
+    def test_full_sync_suc(self):
+        """Test SUCCESS: without a checkpoint all the rows are returned"""
+        data = self.sync()
+        self.assertEqual(self.ids(data, 'workout_logs'),
+                         [self.workout_log.id])
+        self.assertEqual(self.ids(data, 'exercises'), [self.exercise.id])
+        self.assertEqual(data['exercise_logs'][0]['exercise'],
+                         self.exercise.id)
+        self.assertEqual(data['exercise_logs'][0]['workout_log'],
+                         self.workout_log.id)
+        self.assertIn('updated_at', data['exercise_logs'][0])
+        self.assertEqual(data['deleted'], {'workout_logs': [],
+                                           'exercises': [],
+                                           'exercise_logs': []})
+        self.assertFalse(data['has_more'])
+        self.assertFalse(data['reset'])
+
+    def test_nothing_changed_suc(self):
+        """Test SUCCESS: nothing is returned when nothing changed"""
+        checkpoint = self.sync()['checkpoint']
+        data = self.sync(checkpoint)
+        for kind in ['workout_logs', 'exercises', 'exercise_logs']:
+            self.assertEqual(data[kind], [])
+
+    def test_changed_rows_suc(self):
+        """Test SUCCESS: only the created and updated rows are returned"""
+        other_workout_log = WorkoutLog.objects.create(user=self.user)
+        checkpoint = self.sync()['checkpoint']
+        self.exercise_log.number_of_sets = 5
+        self.exercise_log.save()
+        new_workout_log = WorkoutLog.objects.create(user=self.user)
+        data = self.sync(checkpoint)
+        # the totals of the workout log of the updated log changed
+        self.assertEqual(self.ids(data, 'workout_logs'),
+                         [self.workout_log.id, new_workout_log.id])
+        self.assertEqual(data['workout_logs'][0]['total_sets'], 5)
+        self.assertNotIn(other_workout_log.id,
+                         self.ids(data, 'workout_logs'))
+        self.assertEqual(self.ids(data, 'exercises'), [])
+        self.assertEqual(data['exercise_logs'][0]['number_of_sets'], 5)
+
+    def test_deleted_rows_suc(self):
+        """Test SUCCESS: deleted rows are returned as tombstones,
+        with the rows deleted by the cascade"""
+        workout_log_id = self.workout_log.id
+        exercise_log_id = self.exercise_log.id
+        checkpoint = self.sync()['checkpoint']
+        self.workout_log.delete()
+        data = self.sync(checkpoint)
+        self.assertEqual(data['deleted']['workout_logs'], [workout_log_id])
+        self.assertEqual(data['deleted']['exercise_logs'], [exercise_log_id])
+        self.assertEqual(data['workout_logs'], [])
+
+    def test_deleted_rows_one_insert_suc(self):
+        """Test SUCCESS: the tombstones of a delete and its cascade are
+        written with one INSERT"""
+        for _ in range(20):
+            ExerciseLog.objects.create(
+                user=self.user, exercise=self.exercise,
+                workout_log=self.workout_log)
+        log_ids = set(ExerciseLog.objects.values_list('id', flat=True))
+        exercise_id = self.exercise.id
+        with CaptureQueriesContext(connection) as context:
+            self.exercise.delete()
+        self.assertEqual(len([query for query in context
+                              if query['sql'].startswith(
+                                  'INSERT INTO "sync_tombstone"')]), 1)
+        self.assertEqual(
+            set(Tombstone.objects.filter(model='exercise.exerciselog')
+                .values_list('object_id', flat=True)), log_ids)
+        self.assertTrue(Tombstone.objects.filter(
+            model='exercise.exercise', object_id=exercise_id).exists())
+
+        WorkoutLog.objects.create(user=self.user)
+        with CaptureQueriesContext(connection) as context:
+            WorkoutLog.objects.filter(user=self.user).delete()
+        self.assertEqual(len([query for query in context
+                              if query['sql'].startswith(
+                                  'INSERT INTO "sync_tombstone"')]), 1)
+        self.assertEqual(Tombstone.objects.filter(
+            model='workout.workoutlog').count(), 2)
+
+    def test_more_pages_suc(self):
+        """Test SUCCESS: with more changes than the limit every row is
+        returned over several syncs"""
+        for i in range(4):
+            WorkoutLog.objects.create(user=self.user, name=f"workout {i}")
+        Exercise.objects.create(name='Bench Press', user=self.user).delete()
+        Exercise.objects.create(name='Deadlift', user=self.user).delete()
+        Exercise.objects.create(name='Row', user=self.user).delete()
+        seen, deleted, checkpoint = set(), set(), None
+        with self.settings(SYNC_MAX_CHANGES=2):
+            for _ in range(10):
+                data = self.sync(checkpoint)
+                seen.update(self.ids(data, 'workout_logs'))
+                deleted.update(data['deleted']['exercises'])
+                checkpoint = data['checkpoint']
+                if not data['has_more']:
+                    break
+        self.assertFalse(data['has_more'])
+        self.assertEqual(seen, set(WorkoutLog.objects.filter(
+            user=self.user).values_list('id', flat=True)))
+        self.assertEqual(len(deleted), 3)
+
+    def test_checkpoint_lag_suc(self):
+        """Test SUCCESS: the rows changed just before the sync are sent
+        again by the next one"""
+        with self.settings(SYNC_CHECKPOINT_LAG=60):
+            checkpoint = self.sync()['checkpoint']
+            data = self.sync(checkpoint)
+        self.assertEqual(self.ids(data, 'workout_logs'),
+                         [self.workout_log.id])
+
+    def test_more_pages_in_lag_suc(self):
+        """Test SUCCESS: with more changes than the limit inside the lag
+        the checkpoint never goes back, the last page is sent again
+        without has_more"""
+        for i in range(5):
+            WorkoutLog.objects.create(user=self.user, name=f"workout {i}")
+        positions, checkpoint = list(), None
+        with self.settings(SYNC_MAX_CHANGES=2, SYNC_CHECKPOINT_LAG=60):
+            for _ in range(4):
+                data = self.sync(checkpoint)
+                checkpoint = data['checkpoint']
+                positions.append(
+                    decode_checkpoint(checkpoint)['workout_logs'])
+        self.assertEqual(positions, sorted(positions))
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.ids(data, 'workout_logs'),
+                         list(WorkoutLog.objects.order_by('updated_at', 'id')
+                              .values_list('id', flat=True))[4:])
+
+    def test_queries_suc(self):
+        """Test SUCCESS: a sync runs one query for each kind of rows"""
+        checkpoint = self.sync()['checkpoint']
+        with self.assertNumQueries(4):
+            self.sync(checkpoint)
+
+    def test_old_checkpoint_reset_suc(self):
+        """Test SUCCESS: a checkpoint older than the tombstones gets
+        all the rows with reset"""
+        old = (timezone.now() - timedelta(days=365), 0)
+        checkpoint = encode_checkpoint(
+            {'workout_logs': old, 'exercises': old, 'exercise_logs': old,
+             'deleted': old})
+        data = self.sync(checkpoint)
+        self.assertTrue(data['reset'])
+        self.assertEqual(self.ids(data, 'workout_logs'),
+                         [self.workout_log.id])
+
+    def test_other_user_rows_error(self):
+        """Test ERROR: the rows of other users are not returned"""
+        other = create_user('other@gmail.com')
+        other_workout_log = WorkoutLog.objects.create(user=other)
+        other_workout_log.delete()
+        data = self.sync()
+        self.assertEqual(self.ids(data, 'workout_logs'),
+                         [self.workout_log.id])
+        self.assertEqual(data['deleted']['workout_logs'], [])
+
+    def test_invalid_checkpoint_error(self):
+        """Test ERROR: an invalid checkpoint gets a 400 response"""
+        for checkpoint in ['not a checkpoint', 'e30=']:
+            res = self.client.get(SYNC_URL, {'checkpoint': checkpoint})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('checkpoint', res.data)
+
+    def test_unauthenticated_error(self):
+        """Test ERROR: the sync needs an authenticated user"""
+        res = APIClient().get(SYNC_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_deleted_suc(self):
+        """Test SUCCESS: deleting a user keeps no tombstones of it"""
+        self.user.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class PruneTombstonesCommandTest(TestCase):
+    """Test class for the prune_tombstones command"""
+
+    def test_prune_old_tombstones_suc(self):
+        """Test SUCCESS: only the tombstones older than the days
+        are deleted"""
+        user = create_user()
+        old = Tombstone.objects.create(user=user, model='workout.workoutlog',
+                                       object_id=1)
+        Tombstone.objects.filter(pk=old.pk).update(
+            deleted_at=timezone.now() - timedelta(days=100))
+        recent = Tombstone.objects.create(
+            user=user, model='workout.workoutlog', object_id=2)
+        out = StringIO()
+        call_command('prune_tombstones', '--days', '90', stdout=out)
+        self.assertEqual(list(Tombstone.objects.all()), [recent])
+        self.assertIn('Deleted 1 tombstones', out.getvalue())
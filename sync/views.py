@@ -0,0 +1,46 @@
+from django.conf import settings
+from drf_spectacular.utils import extend_schema
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from sync.changes import get_changes
+from sync.serializers import SyncParamsSerializer, SyncSerializer
+from user.authentication import CachedTokenAuthentication
+
+
+@extend_schema(
+    parameters=[SyncParamsSerializer],
+    responses={200: SyncSerializer}
+)
+class SyncView(GenericAPIView):
+    """
+    Endpoint for the offline-first clients to stay in sync
+    with the data of the user without downloading all of it
+
+    ### Parameters
+    - `checkpoint` (query parameter, optional): the checkpoint returned
+    by the previous sync, without it all the rows are returned
+
+    ### Response
+    - `workout_logs`, `exercises`, `exercise_logs`: the rows created or
+    updated since the checkpoint, at most SYNC_MAX_CHANGES of each kind
+    - `deleted`: the ids of the rows of each kind deleted since the
+    checkpoint
+    - `checkpoint`: to send in the next sync, rows may be sent again
+    after it so they should be applied as upserts
+    - `has_more`: more changes are waiting, sync again right away
+    - `reset`: the checkpoint is too old, all the rows are returned
+    and the rows the client has that are not returned were deleted
+    """
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    serializer_class = SyncSerializer
+    pagination_class = None
+
+    def get(self, request):
+        params_serializer = SyncParamsSerializer(data=request.query_params)
+        params_serializer.is_valid(raise_exception=True)
+        changes = get_changes(
+            request.user, params_serializer.validated_data.get('checkpoint'),
+            settings.SYNC_MAX_CHANGES)
+        return Response(self.get_serializer(changes).data)
@@ -0,0 +1,112 @@
+"""
+Authentication classes of the API
+- CachedTokenAuthentication: token authentication that keeps the users
+of the recently used tokens in memory
+- TokenCache: the LRU cache with expiry used to keep them
+"""
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from time import monotonic
+from django.conf import settings
+from rest_framework.authentication import TokenAuthentication
+from core.routers import read_from_primary
+
+
+class TokenCache:
+    """
+    An in-process LRU cache of token key -> (user, token)
+    - holds at most `max_size` tokens, the least recently used
+    token is dropped first
+    - an entry expires `ttl` seconds after it was added, this bounds how
+    long another process can use a user that was changed or deactivated
+    - entries of a token or a user can be dropped with invalidate_token
+    and invalidate_user
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._keys_by_user = dict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """Returns the (user, token) of a key or None if not cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, expires_at = entry
+            if expires_at <= monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return user, token
+
+    def set(self, key, user, token):
+        """Cache the (user, token) of a key"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (user, token, monotonic() + self.ttl)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_token(self, key):
+        """Drop the cached user of a token"""
+        with self._lock:
+            self._drop(key)
+
+    def invalidate_user(self, user_id):
+        """Drop all the cached tokens of a user"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _drop(self, key):
+        """Remove a key, the lock has to be held by the caller"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        user_keys = self._keys_by_user.get(entry[0].pk)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry[0].pk]
+
+
+token_cache = TokenCache(max_size=settings.AUTH_TOKEN_CACHE_SIZE,
+                         ttl=settings.AUTH_TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that skips the Token + User query for
+    tokens used recently
+    - each request gets its own copy of the cached user
+    - the cache is invalidated when a token is deleted or
+    a user is saved (updated or deactivated), see user/signals.py
+    - the tokens are read from the primary database, a token just
+    created may not be on the replicas yet
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            with read_from_primary():
+                user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            cached = (user, token)
+        user, token = cached
+        return (copy(user), token)
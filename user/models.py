@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth.models import (
     BaseUserManager,
     AbstractBaseUser,
@@ -73,3 +75,49 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     def __str__(self):
         return self.email
+
+
+class UserDataVersionManager(models.Manager):
+    """Class for managing the data versions of the users"""
+
+    def bump(self, user_id):
+        """Increase the version of a user after a write of its data"""
+        self.filter(user_id=user_id).update(version=F('version') + 1,
+                                            updated_at=timezone.now())
+
+    def current(self, user_id):
+        """
+        Returns (version, updated_at) of a user
+        - a user without a version yet gets one and None is returned,
+        so the response of that request is not made conditional
+        """
+        current = self.filter(user_id=user_id)\
+            .values_list('version', 'updated_at').first()
+        if current is None:
+            self.get_or_create(user_id=user_id)
+        return current
+
+    async def acurrent(self, user_id):
+        """current with the async ORM, for the async views"""
+        current = await self.filter(user_id=user_id)\
+            .values_list('version', 'updated_at').afirst()
+        if current is None:
+            await self.aget_or_create(user_id=user_id)
+        return current
+
+
+class UserDataVersion(models.Model):
+    """
+    - A version of the data of a user, increased on every write
+    of its exercises, exercise logs and workout logs
+    - used for the ETag and Last-Modified of the list endpoints
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE,
+                                related_name='data_version')
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = UserDataVersionManager()
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
@@ -0,0 +1,62 @@
+"""
+Signals of the user application
+- keeps the cached token authentication up to date
+- keeps the data version of the users up to date and drops their
+cached responses
+"""
+from django.conf import settings
+from django.db.models import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from core.response_cache import response_cache
+from user.authentication import token_cache
+from user.models import UserDataVersion
+
+# the models whose writes change the data version of their user
+VERSIONED_MODELS = ['exercise.Exercise', 'exercise.ExerciseLog',
+                    'workout.WorkoutLog']
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Drop a token from the cache when it is changed or deleted"""
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop the tokens of a user from the cache when the user is
+    updated, deactivated or deleted"""
+    token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_data_version(sender, instance, created, raw=False, **kwargs):
+    """Give a new user its data version"""
+    if created and not raw:
+        UserDataVersion.objects.get_or_create(user=instance)
+
+
+def bump_data_version(sender, instance, raw=False, origin=None, **kwargs):
+    """
+    Increase the data version of the user of a written row
+    and drop the cached responses of the user
+    - rows deleted by the cascade of another deleted row are skipped,
+    the signal of that row bumps the version once
+    """
+    if raw:
+        return
+    if isinstance(origin, Model) and origin is not instance:
+        return
+    UserDataVersion.objects.bump(instance.user_id)
+    response_cache.invalidate(instance.user_id)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_data_version, sender=model,
+                      dispatch_uid=f"bump_data_version_save_{model}")
+    post_delete.connect(bump_data_version, sender=model,
+                        dispatch_uid=f"bump_data_version_delete_{model}")
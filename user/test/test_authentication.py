@@ -0,0 +1,157 @@
+"""
+This file is for testing the cached token authentication
+- Classes:
+    - TokenCacheTest: For the LRU cache with expiry of the tokens
+    - CachedTokenAuthenticationTest: For authenticating requests
+    with the cached tokens
+- Helper functions:
+    - create_user: creates a user and returns it
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from user.authentication import (
+    CachedTokenAuthentication,
+    TokenCache,
+    token_cache
+)
+GET_OR_UPDATE_URL = reverse('user:get_update')
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+class TokenCacheTest(SimpleTestCase):
+    """Test class for the LRU cache with expiry of the tokens"""
+
+    def setUp(self):
+        self.users = [get_user_model()(pk=i, email=f"u{i}@gmail.com")
+                      for i in range(3)]
+
+    def test_least_recently_used_dropped_suc(self):
+        """Test SUCCESS: the least recently used token is dropped first"""
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', self.users[0], 'token_a')
+        cache.set('b', self.users[1], 'token_b')
+        cache.get('a')
+        cache.set('c', self.users[2], 'token_c')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), (self.users[0], 'token_a'))
+        self.assertEqual(cache.get('c'), (self.users[2], 'token_c'))
+
+    def test_expired_token_dropped_suc(self):
+        """Test SUCCESS: a token is not returned after its ttl"""
+        cache = TokenCache(max_size=2, ttl=60)
+        with mock.patch('user.authentication.monotonic', return_value=0):
+            cache.set('a', self.users[0], 'token_a')
+        with mock.patch('user.authentication.monotonic', return_value=59):
+            self.assertIsNotNone(cache.get('a'))
+        with mock.patch('user.authentication.monotonic', return_value=60):
+            self.assertIsNone(cache.get('a'))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_user_suc(self):
+        """Test SUCCESS: invalidating a user drops all of its tokens"""
+        cache = TokenCache(max_size=5, ttl=60)
+        cache.set('a', self.users[0], 'token_a')
+        cache.set('b', self.users[0], 'token_b')
+        cache.set('c', self.users[1], 'token_c')
+        cache.invalidate_user(self.users[0].pk)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_zero_size_caches_nothing_suc(self):
+        """Test SUCCESS: a cache with no size does not keep tokens"""
+        cache = TokenCache(max_size=0, ttl=60)
+        cache.set('a', self.users[0], 'token_a')
+        self.assertIsNone(cache.get('a'))
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    """Test class for authenticating requests with the cached tokens"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = create_user()
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_no_queries_suc(self):
+        """
+        Test SUCCESS: a token used before is authenticated without queries
+        """
+        with self.assertNumQueries(1):
+            res = self.client.get(GET_OR_UPDATE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            res = self.client.get(GET_OR_UPDATE_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_invalid_token_error(self):
+        """Test ERROR: an unknown token is not authenticated"""
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        res = self.client.get(GET_OR_UPDATE_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_error(self):
+        """Test ERROR: a deleted token is not authenticated anymore"""
+        self.client.get(GET_OR_UPDATE_URL)
+        self.token.delete()
+        res = self.client.get(GET_OR_UPDATE_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_error(self):
+        """Test ERROR: the token of a deactivated user is not
+        authenticated anymore"""
+        self.client.get(GET_OR_UPDATE_URL)
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(GET_OR_UPDATE_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_suc(self):
+        """Test SUCCESS: updating the user through the endpoint
+        is seen by the next requests"""
+        self.client.get(GET_OR_UPDATE_URL)
+        res = self.client.patch(GET_OR_UPDATE_URL, {'name': 'new name'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.get(GET_OR_UPDATE_URL)
+        self.assertEqual(res.data['name'], 'new name')
+
+    def test_update_stale_cached_user_suc(self):
+        """Test SUCCESS: updating the user does not undo a change made
+        while its cached copy was kept, e.g. by another process"""
+        self.client.get(GET_OR_UPDATE_URL)
+        self.user.set_password('changed1234')
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            password=self.user.password, email='changed@gmail.com')
+        res = self.client.patch(GET_OR_UPDATE_URL, {'name': 'new name'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertEqual(user.name, 'new name')
+        self.assertEqual(user.email, 'changed@gmail.com')
+        self.assertTrue(user.check_password('changed1234'))
+
+    def test_requests_get_own_user_copy_suc(self):
+        """Test SUCCESS: changing the user of a request does not change
+        the cached user"""
+        authentication = CachedTokenAuthentication()
+        user, _ = authentication.authenticate_credentials(self.token.key)
+        user.name = 'changed'
+        user, _ = authentication.authenticate_credentials(self.token.key)
+        self.assertEqual(user.name, self.user.name)
@@ -147,6 +147,7 @@ class PrivateEndPointTest(TestCase):
         }
         res = self.client.put(GET_OR_UPDATE_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
         self.assertEqual(self.user.email, payload['email'])
         self.assertTrue(self.user.check_password(payload['password']))
 
@@ -157,6 +158,7 @@ class PrivateEndPointTest(TestCase):
         }
         res = self.client.patch(GET_OR_UPDATE_URL, payload)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
         self.assertEqual(self.user.email, payload['email'])
 
     def test_partial_with_put_error(self):
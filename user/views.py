@@ -1,8 +1,9 @@
 """The endpoints for the user application"""
-from rest_framework.authentication import TokenAuthentication
+from user.authentication import CachedTokenAuthentication
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework import generics
+from django.contrib.auth import get_user_model
 from .serializers import UserSerializer, AuthTokenSerializer
 from drf_spectacular.utils import extend_schema
 
@@ -29,10 +30,17 @@ class UpdateRetriveUserView(generics.RetrieveUpdateAPIView):
     """
     - Updating info for the current logined user
     - Retrieving info for the current logined user"""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
 
     def get_object(self):
-        """retrieve and return the auth user"""
-        return self.request.user
+        """
+        retrieve and return the auth user
+        - the updates read the user from the database, the user of the
+        request may be a cached copy older than a change made by another
+        process, and saving it would undo that change
+        """
+        if self.request.method in SAFE_METHODS:
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.pk)
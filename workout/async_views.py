@@ -0,0 +1,16 @@
+"""
+Async views of the workout read endpoints, served under ASGI
+- see core/async_views.py, the other methods and the error responses
+are left to the DRF views of workout/views.py
+"""
+from core.async_views import AsyncListView, AsyncRetrieveView
+
+
+class AsyncWorkoutLogListView(AsyncListView):
+    """The list of the workout logs, with a 304 and cached"""
+    conditional = True
+    cached = True
+
+
+class AsyncWorkoutLogDetailView(AsyncRetrieveView):
+    """A workout log, with its exercise logs with `?expand`"""
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0002_remove_workoutlog_exercises'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='workout_wor_user_id_dfcc7b_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:08
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_updated_at(apps, schema_editor):
+    """The existing rows were last updated when they were created"""
+    apps.get_model('workout', 'WorkoutLog').objects.update(
+        updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0003_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutlog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='workoutlog',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='workout_wor_user_id_8bccbf_idx'),
+        ),
+        migrations.RunPython(set_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+
+
+def compute_totals(apps, schema_editor):
+    """Compute the totals of the existing workout logs"""
+    ExerciseLog = apps.get_model('exercise', 'ExerciseLog')
+    logs = ExerciseLog.objects.filter(workout_log=OuterRef('pk'))\
+        .order_by().values('workout_log')
+
+    def total(expression):
+        total = Sum(expression, output_field=BigIntegerField())
+        return Coalesce(Subquery(logs.annotate(total=total)
+                                 .values('total')), 0,
+                        output_field=BigIntegerField())
+
+    sets = Cast('number_of_sets', BigIntegerField())
+    apps.get_model('workout', 'WorkoutLog').objects.update(
+        total_sets=total('number_of_sets'),
+        total_reps=total(sets * F('number_of_reps')),
+        total_volume_kg=total(sets * F('number_of_reps') * F('weight_in_kg')),
+        total_duration_minutes=total('duration_in_minutes'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0004_sync_updated_at'),
+        ('exercise', '0021_case_insensitive_unique_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutlog',
+            name='total_duration_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workoutlog',
+            name='total_reps',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workoutlog',
+            name='total_sets',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workoutlog',
+            name='total_volume_kg',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(compute_totals, migrations.RunPython.noop),
+    ]
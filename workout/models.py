@@ -18,14 +18,29 @@ class WorkoutLog(models.Model):
     and sets of each one and info about each of them, and so on
     - name field: the default value that frontend should gave me
                   is the '`dayname`_workout'
+    - total fields: the totals of its exercise logs, kept up to date
+    whenever a log is created, updated or deleted, see workout/summary.py
+        - total_reps: sets x reps of each log
+        - total_volume_kg: sets x reps x weight of each log
     """
     name = models.CharField(max_length=254, null=True, blank=True)
     description = models.TextField(max_length=1000, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
     duration = models.DurationField(null=True, blank=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    total_sets = models.PositiveIntegerField(default=0)
+    total_reps = models.PositiveIntegerField(default=0)
+    total_volume_kg = models.PositiveBigIntegerField(default=0)
+    total_duration_minutes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'updated_at', 'id']),
+        ]
 
     def save(self, *args, **kwargs):
         # set the default value for the name if not given
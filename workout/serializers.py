@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from . import models
 from django.utils import timezone
+from exercise.models import ExerciseLog
+from exercise.serializers import ExerciseListSerializer
 
 
 class WorkoutLogSerializer(serializers.ModelSerializer):
@@ -85,8 +87,32 @@ can not be set on creating"
 
 
 class WorkoutLogListSerializer(serializers.ModelSerializer):
-    """Serializer for listing WorkoutLogs without details."""
+    """Serializer for listing WorkoutLogs without details,
+    with the stored totals of their exercise logs"""
     class Meta:
         model = models.WorkoutLog
-        fields = ['id', 'name', 'created_at']
-        read_only_fields = ['id', 'name', 'created_at']
+        fields = ['id', 'name', 'created_at', 'total_sets', 'total_reps',
+                  'total_volume_kg', 'total_duration_minutes']
+        read_only_fields = fields
+
+
+class WorkoutExerciseLogSerializer(serializers.ModelSerializer):
+    """Serializer for the exercise logs embedded in a workout_log"""
+    exercise = ExerciseListSerializer(read_only=True)
+
+    class Meta:
+        model = ExerciseLog
+        fields = ['id', 'exercise', 'notes', 'number_of_sets',
+                  'number_of_reps', 'rest_between_sets_seconds',
+                  'duration_in_minutes', 'weight_in_kg', 'created_at']
+        read_only_fields = fields
+
+
+class WorkoutLogDetailSerializer(WorkoutLogSerializer):
+    """Serializer for retrieving a workout_log with its exercise logs
+    - the logs are expected to be prefetched in `exercise_logs` with
+    their exercises, see WorkoutLogViewSet.get_queryset"""
+    exercise_logs = WorkoutExerciseLogSerializer(many=True, read_only=True)
+
+    class Meta(WorkoutLogSerializer.Meta):
+        fields = WorkoutLogSerializer.Meta.fields + ['exercise_logs']
@@ -0,0 +1,58 @@
+"""
+The totals of the exercise logs of each workout log
+- stored in the total fields of WorkoutLog, so listing the workout
+logs with their totals does not aggregate the logs on each request
+- refresh_summaries: recomputes the totals of workout logs from their
+exercise logs, called whenever exercise logs are created, updated or
+deleted
+"""
+from django.db import transaction
+from django.db.models import BigIntegerField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+from exercise.models import ExerciseLog
+from workout.models import WorkoutLog
+
+
+def _total(expression):
+    """The sum of the expression over the logs of each workout log,
+    0 without logs"""
+    logs = ExerciseLog.objects.filter(workout_log=OuterRef('pk'))\
+        .order_by().values('workout_log')
+    total = Sum(expression, output_field=BigIntegerField())
+    return Coalesce(Subquery(logs.annotate(total=total).values('total')), 0,
+                    output_field=BigIntegerField())
+
+
+def summary_totals():
+    """Returns {field: expression} of the totals of a workout log"""
+    # bigint so the products of the small integers don't overflow
+    sets = Cast('number_of_sets', BigIntegerField())
+    return {
+        'total_sets': _total('number_of_sets'),
+        'total_reps': _total(sets * F('number_of_reps')),
+        'total_volume_kg': _total(
+            sets * F('number_of_reps') * F('weight_in_kg')),
+        'total_duration_minutes': _total('duration_in_minutes'),
+    }
+
+
+def refresh_summaries(workout_log_ids):
+    """
+    Recompute the totals of the workout logs with one UPDATE
+    - updated_at is set as well, so the sync sends the new totals,
+    the data version of the user is increased by the write of the logs
+    - the workout logs are locked first: an UPDATE waiting for a row
+    lock only checks the row again, its subquery would still miss the
+    logs committed meanwhile, the UPDATE after the lock sees them
+    """
+    workout_log_ids = set(workout_log_ids)
+    if not workout_log_ids:
+        return
+    with transaction.atomic(savepoint=False):
+        # no key: the inserts of logs referencing them are not blocked
+        list(WorkoutLog.objects.select_for_update(no_key=True)
+             .filter(id__in=workout_log_ids).order_by('id')
+             .values_list('id', flat=True))
+        WorkoutLog.objects.filter(id__in=workout_log_ids).update(
+            updated_at=timezone.now(), **summary_totals())
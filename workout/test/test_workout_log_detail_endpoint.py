@@ -0,0 +1,114 @@
+"""
+This file is for testing retrieving a workout log with
+its exercise logs embedded
+- Classes:
+    - WorkoutLogExpandedRetrieveTest: For retrieving with
+    `?expand=exercise_logs`
+- Helper functions:
+    - GET_WORKOUT_LOG_DETAIL_URL: get the url for the endpoint responsibel
+    for retrieving a workout log
+    - create_user: creates a user and returns it
+    - create_exercise_log: create an exercise log in a workout log
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.test import TestCase
+from django.urls import reverse
+from exercise.models import Exercise, ExerciseLog
+from ..models import WorkoutLog
+
+
+def GET_WORKOUT_LOG_DETAIL_URL(id):
+    """Helper method to create the url to the endpoint responsible for
+    retrieving a workout log"""
+    return reverse("workout:workoutlog-detail", args=[id])
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_exercise_log(workout_log, exercise, **kwargs):
+    """A helper method to create an exercise log in a workout log"""
+    return ExerciseLog.objects.create(workout_log=workout_log,
+                                      exercise=exercise,
+                                      user=workout_log.user, **kwargs)
+
+
+class WorkoutLogExpandedRetrieveTest(TestCase):
+    """A class for testing retrieving a workout log
+    with its exercise logs"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.workout_log = WorkoutLog.objects.create(user=self.user)
+        self.exercises = [Exercise.objects.create(name=f"exer {i}",
+                                                  user=self.user)
+                          for i in range(3)]
+
+    def retrieve(self, workout_log, expand='exercise_logs'):
+        return self.client.get(GET_WORKOUT_LOG_DETAIL_URL(workout_log.id),
+                               {'expand': expand})
+
+    def test_retrieve_expanded_suc(self):
+        """Test SUCCESS: the exercise logs are embedded in order with
+        their exercise names"""
+        first = create_exercise_log(self.workout_log, self.exercises[0],
+                                    number_of_sets=3, number_of_reps=8,
+                                    weight_in_kg=60)
+        second = create_exercise_log(self.workout_log, self.exercises[1],
+                                     duration_in_minutes=20)
+        other_workout_log = WorkoutLog.objects.create(user=self.user)
+        create_exercise_log(other_workout_log, self.exercises[0])
+
+        res = self.retrieve(self.workout_log)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], self.workout_log.id)
+        logs = res.data['exercise_logs']
+        self.assertEqual([log['id'] for log in logs], [first.id, second.id])
+        self.assertEqual(logs[0]['exercise'],
+                         {'id': self.exercises[0].id, 'name': 'exer 0'})
+        self.assertEqual(logs[0]['number_of_sets'], 3)
+        self.assertEqual(logs[0]['weight_in_kg'], 60)
+        self.assertEqual(logs[1]['duration_in_minutes'], 20)
+
+    def test_retrieve_expanded_constant_queries_suc(self):
+        """Test SUCCESS: the number of queries does not grow with
+        the number of exercise logs"""
+        small_workout_log = WorkoutLog.objects.create(user=self.user)
+        create_exercise_log(small_workout_log, self.exercises[0])
+        for i in range(30):
+            create_exercise_log(self.workout_log, self.exercises[i % 3])
+
+        # the workout log, then its logs joined with their exercises
+        with self.assertNumQueries(2):
+            res = self.retrieve(small_workout_log)
+        self.assertEqual(len(res.data['exercise_logs']), 1)
+        with self.assertNumQueries(2):
+            res = self.retrieve(self.workout_log)
+        self.assertEqual(len(res.data['exercise_logs']), 30)
+
+    def test_retrieve_not_expanded_suc(self):
+        """Test SUCCESS: the exercise logs are embedded only if asked"""
+        create_exercise_log(self.workout_log, self.exercises[0])
+        res = self.client.get(GET_WORKOUT_LOG_DETAIL_URL(self.workout_log.id))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('exercise_logs', res.data)
+        res = self.retrieve(self.workout_log, expand='other')
+        self.assertNotIn('exercise_logs', res.data)
+
+    def test_retrieve_expanded_other_user_error(self):
+        """Test ERROR: retrieving the workout log of another user"""
+        other_user = create_user(email='other@gmail.com')
+        other_workout_log = WorkoutLog.objects.create(user=other_user)
+        res = self.retrieve(other_workout_log)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -160,7 +160,7 @@ class WorkoutLogsRetrieveListTest(TestCase):
         workout2 = create_workoutLog(name='w2', user=self.user)
         res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        ids = [workout['id'] for workout in res.data]
+        ids = [workout['id'] for workout in res.data['results']]
         self.assertIn(workout1.id, ids)
         self.assertIn(workout2.id, ids)
 
@@ -172,7 +172,7 @@ class WorkoutLogsRetrieveListTest(TestCase):
         other_workout = create_workoutLog(name='w2', user=user2)
         res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        ids = [workout['id'] for workout in res.data]
+        ids = [workout['id'] for workout in res.data['results']]
         self.assertIn(my_workout.id, ids)
         self.assertNotIn(other_workout.id, ids)
 
@@ -183,7 +183,7 @@ class WorkoutLogsRetrieveListTest(TestCase):
         create_workoutLog(name='w2', user=self.user)
         res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        for workout in res.data:
+        for workout in res.data['results']:
             self.assertNotIn('started_at', workout)
             self.assertNotIn('finished_at', workout)
             self.assertNotIn('duration', workout)
@@ -239,7 +239,7 @@ class WorkoutLogsUpdateTest(TestCase):
         URL = GET_WORKOUT_LOG_DETAIL_URL(workout.id)
         self.client.patch(URL, payload)
         res = self.client.get(WORKOUT_LOG_LIST_CREATE_URL)
-        ids = [workout['id'] for workout in res.data]
+        ids = [workout['id'] for workout in res.data['results']]
         self.assertIn(workout.id, ids)
 
     def test_update_with_start_finish_together_error(self):
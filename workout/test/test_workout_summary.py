@@ -0,0 +1,193 @@
+"""
+This file is for testing the stored totals of the workout logs
+- Classes:
+    - WorkoutSummaryTest: For keeping the totals up to date with the
+    exercise logs
+    - WorkoutSummaryEndpointTest: For the totals in the responses
+- Helper functions:
+    - create_user: creates a user and returns it
+    - totals: the total fields of a workout log from the database
+- static variables:
+    - WORKOUT_LOG_LIST_URL: the url of the workout logs list
+    - EXERCISE_LOG_BULK_URL: the url of the bulk exercise logs endpoint
+- naming conventions:
+    - test_...._suc: mean that the test is meant to success the operation
+    it meant to do
+    - test_...._error: mean that the test is meant to fail the operation
+    it meant to do
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from exercise.models import Exercise, ExerciseLog
+from workout.models import WorkoutLog
+from workout.summary import refresh_summaries
+
+WORKOUT_LOG_LIST_URL = reverse('workout:workoutlog-list')
+EXERCISE_LOG_BULK_URL = reverse('exercise:exerciselog-bulk-create')
+EMPTY = (0, 0, 0, 0)
+
+
+def create_user(email='test@gmail.com', password='test1234'):
+    """Helper method to create a user"""
+    return get_user_model().objects.create_user(email, password)
+
+
+def totals(workout_log):
+    """(total_sets, total_reps, total_volume_kg, total_duration_minutes)
+    of the workout log stored in the database"""
+    return WorkoutLog.objects.values_list(
+        'total_sets', 'total_reps', 'total_volume_kg',
+        'total_duration_minutes').get(pk=workout_log.pk)
+
+
+class WorkoutSummaryTest(TestCase):
+    """Test class for keeping the totals up to date"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.workout_log = WorkoutLog.objects.create(user=self.user)
+        self.exercise = Exercise.objects.create(name='squat', user=self.user)
+
+    def create_log(self, workout_log=None, exercise=None, **kwargs):
+        return ExerciseLog.objects.create(
+            user=self.user, exercise=exercise or self.exercise,
+            workout_log=workout_log or self.workout_log, **kwargs)
+
+    def test_create_logs_suc(self):
+        """Test SUCCESS: the totals add the created logs, the missing
+        values count as 0"""
+        self.assertEqual(totals(self.workout_log), EMPTY)
+        self.create_log(number_of_sets=3, number_of_reps=10, weight_in_kg=60)
+        self.create_log(number_of_sets=2, number_of_reps=5)
+        self.create_log(duration_in_minutes=20)
+        self.assertEqual(totals(self.workout_log), (5, 40, 1800, 20))
+
+    def test_update_log_suc(self):
+        """Test SUCCESS: the totals follow an updated log"""
+        log = self.create_log(number_of_sets=3, number_of_reps=10,
+                              weight_in_kg=60)
+        log.weight_in_kg = 100
+        log.save()
+        self.assertEqual(totals(self.workout_log), (3, 30, 3000, 0))
+
+    def test_move_log_suc(self):
+        """Test SUCCESS: moving a log updates both workout logs"""
+        other = WorkoutLog.objects.create(user=self.user)
+        log = self.create_log(number_of_sets=3, number_of_reps=10,
+                              weight_in_kg=60)
+        log.workout_log = other
+        log.save()
+        self.assertEqual(totals(self.workout_log), EMPTY)
+        self.assertEqual(totals(other), (3, 30, 1800, 0))
+
+    def test_delete_log_suc(self):
+        """Test SUCCESS: the totals drop a deleted log, or the logs of
+        a deleted exercise"""
+        log = self.create_log(number_of_sets=3, number_of_reps=10)
+        self.create_log(number_of_sets=1, number_of_reps=1)
+        log.delete()
+        self.assertEqual(totals(self.workout_log), (1, 1, 0, 0))
+        self.exercise.delete()
+        self.assertEqual(totals(self.workout_log), EMPTY)
+
+    def test_delete_exercise_once_suc(self):
+        """Test SUCCESS: deleting an exercise refreshes the totals of
+        its workout logs with one UPDATE"""
+        other = WorkoutLog.objects.create(user=self.user)
+        run = Exercise.objects.create(name='run', user=self.user)
+        for workout_log in (self.workout_log, other):
+            for _ in range(10):
+                self.create_log(workout_log, number_of_sets=3)
+            self.create_log(workout_log, exercise=run, number_of_sets=1)
+        with CaptureQueriesContext(connection) as context:
+            self.exercise.delete()
+        self.assertEqual(len([query for query in context
+                              if query['sql'].startswith(
+                                  'UPDATE "workout_workoutlog"')]), 1)
+        self.assertEqual(totals(self.workout_log), (1, 0, 0, 0))
+        self.assertEqual(totals(other), (1, 0, 0, 0))
+
+    def test_delete_workout_log_suc(self):
+        """Test SUCCESS: deleting a workout log deletes its logs without
+        refreshing its totals"""
+        self.create_log(number_of_sets=3)
+        with CaptureQueriesContext(connection) as context:
+            self.workout_log.delete()
+        self.assertFalse(ExerciseLog.objects.exists())
+        self.assertFalse([query for query in context
+                          if query['sql'].startswith(
+                              'UPDATE "workout_workoutlog"')])
+
+    def test_large_values_suc(self):
+        """Test SUCCESS: the products of the values don't overflow"""
+        self.create_log(number_of_sets=32767, number_of_reps=32767,
+                        weight_in_kg=1000)
+        self.assertEqual(totals(self.workout_log)[2], 32767 ** 2 * 1000)
+
+    def test_refresh_summaries_suc(self):
+        """Test SUCCESS: refreshing locks the workout logs then
+        recomputes the totals from the logs and sets updated_at"""
+        self.create_log(number_of_sets=3, number_of_reps=10)
+        WorkoutLog.objects.update(total_sets=99)
+        updated_at = WorkoutLog.objects.get().updated_at
+        with self.assertNumQueries(2) as context:
+            refresh_summaries([self.workout_log.id, self.workout_log.id])
+        self.assertIn('FOR NO KEY UPDATE', context[0]['sql'])
+        self.assertTrue(context[1]['sql'].startswith(
+            'UPDATE "workout_workoutlog"'))
+        self.assertEqual(totals(self.workout_log), (3, 30, 0, 0))
+        self.assertGreater(WorkoutLog.objects.get().updated_at, updated_at)
+        with self.assertNumQueries(0):
+            refresh_summaries([])
+
+
+class WorkoutSummaryEndpointTest(TestCase):
+    """Test class for the totals in the responses"""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.workout_logs = [WorkoutLog.objects.create(user=self.user)
+                             for _ in range(3)]
+
+    def test_bulk_create_suc(self):
+        """Test SUCCESS: the bulk created logs are added to the totals
+        of their workout logs"""
+        first, second, _ = self.workout_logs
+        res = self.client.post(EXERCISE_LOG_BULK_URL, {'logs': [
+            {'workout_log': first.id, 'exercise_name': 'squat',
+             'number_of_sets': 3, 'number_of_reps': 10, 'weight_in_kg': 60},
+            {'workout_log': first.id, 'exercise_name': 'lunge',
+             'number_of_sets': 2, 'number_of_reps': 8},
+            {'workout_log': second.id, 'exercise_name': 'run',
+             'duration_in_minutes': 30}]}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(totals(first), (5, 46, 1800, 0))
+        self.assertEqual(totals(second), (0, 0, 0, 30))
+
+    def test_list_totals_suc(self):
+        """Test SUCCESS: the list has the totals of each workout log
+        with the same queries as without logs"""
+        exercise = Exercise.objects.create(name='squat', user=self.user)
+        with CaptureQueriesContext(connection) as without_logs:
+            self.client.get(WORKOUT_LOG_LIST_URL)
+        ExerciseLog.objects.create(
+            user=self.user, exercise=exercise,
+            workout_log=self.workout_logs[0], number_of_sets=3,
+            number_of_reps=10, weight_in_kg=60, duration_in_minutes=15)
+        with CaptureQueriesContext(connection) as with_logs:
+            res = self.client.get(WORKOUT_LOG_LIST_URL)
+        self.assertEqual(len(with_logs), len(without_logs))
+        self.assertFalse([query for query in with_logs
+                          if 'exercise_exerciselog' in query['sql']])
+        workout = next(workout for workout in res.data['results']
+                       if workout['id'] == self.workout_logs[0].id)
+        self.assertEqual(workout['total_sets'], 3)
+        self.assertEqual(workout['total_reps'], 30)
+        self.assertEqual(workout['total_volume_kg'], 1800)
+        self.assertEqual(workout['total_duration_minutes'], 15)
@@ -1,8 +1,10 @@
 from django.urls import (
     path,
+    re_path,
     include
 )
 from .views import WorkoutLogViewSet
+from .async_views import AsyncWorkoutLogListView, AsyncWorkoutLogDetailView
 from rest_framework.routers import DefaultRouter
 app_name = 'workout'
 router = DefaultRouter()
@@ -11,3 +13,15 @@ router.register('workout_log', WorkoutLogViewSet)
 urlpatterns = [
     path('', include(router.urls))
 ]
+
+# the same endpoints with async views answering their GET requests,
+# served under ASGI, see core/urls_asgi.py
+sync_views = {url.name: url.callback for url in router.urls}
+asgi_urlpatterns = [
+    re_path(r'^workout_log/$', AsyncWorkoutLogListView.as_view(
+        sync_view=sync_views['workoutlog-list']), name='workoutlog-list'),
+    re_path(r'^workout_log/(?P<pk>[^/.]+)/$',
+            AsyncWorkoutLogDetailView.as_view(
+                sync_view=sync_views['workoutlog-detail']),
+            name='workoutlog-detail'),
+] + urlpatterns
@@ -1,9 +1,17 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
-from .serializers import WorkoutLogSerializer, WorkoutLogListSerializer
+from user.authentication import CachedTokenAuthentication
+from core.conditional import ConditionalListMixin
+from core.response_cache import CachedListMixin
+from django.db.models import Prefetch
+from exercise.models import ExerciseLog
+from .serializers import (
+    WorkoutLogSerializer,
+    WorkoutLogListSerializer,
+    WorkoutLogDetailSerializer
+)
 from .models import WorkoutLog
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 
 @extend_schema(
@@ -26,15 +34,19 @@ from drf_spectacular.utils import extend_schema
     methods=['DELETE'],
     description='Deleting a workout_log by ID, only by its user'
 )
-class WorkoutLogViewSet(ModelViewSet):
+class WorkoutLogViewSet(ConditionalListMixin, CachedListMixin,
+                        ModelViewSet):
     """The view for handling workout endpoints:
     - Create
     - Retrieve
     - Update
     - Destroy (Delete)
-    - List
+    - List, answered with a 304 when the list did not change and
+    cached until the next write of the user
+    - Retrieve with `?expand=exercise_logs` embeds the exercise logs
+    of the workout_log with their exercises in two queries
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = WorkoutLog.objects.all()
 
@@ -42,16 +54,44 @@ class WorkoutLogViewSet(ModelViewSet):
         """Handle different serializers for different actions."""
         if self.action == 'list':
             return WorkoutLogListSerializer
+        if self.is_expanded():
+            return WorkoutLogDetailSerializer
         return WorkoutLogSerializer
 
+    def is_expanded(self):
+        """Whether the exercise logs are asked to be embedded"""
+        return self.action == 'retrieve' and \
+            self.request.query_params.get('expand') == 'exercise_logs'
+
     def get_queryset(self):
         """Return workout logs for the authenticated user."""
-        return WorkoutLog.objects.filter(user=self.request.user)\
+        queryset = WorkoutLog.objects.filter(user=self.request.user)\
             .order_by('-created_at')
+        if self.is_expanded():
+            # one query for all the logs with their exercises
+            queryset = queryset.prefetch_related(Prefetch(
+                'exerciselog_set',
+                queryset=ExerciseLog.objects.select_related('exercise')
+                .order_by('created_at', 'id'),
+                to_attr='exercise_logs'))
+        return queryset
 
     @extend_schema(
         methods=['GET'],
         description="Retrieving specific workout_log by ID, only by its user."
+        " With `?expand=exercise_logs` the exercise logs of the workout_log"
+        " are embedded with their exercises.",
+        parameters=[
+            OpenApiParameter(
+                name="expand",
+                type=str,
+                enum=['exercise_logs'],
+                location=OpenApiParameter.QUERY,
+                description="Embed the exercise logs of the workout_log.",
+                required=False,
+            ),
+        ],
+        responses=WorkoutLogDetailSerializer
     )
     def retrieve(self, request, *args, **kwargs):
         """wrote this only for the extent_schema"""